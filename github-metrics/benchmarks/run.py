@@ -0,0 +1,453 @@
+"""
+Benchmark suite for the insight and evaluation functions on synthetic data.
+
+Generates a synthetic export, times every benchmark (best wall time over
+--repeat runs, so caches built by the first run are warm, plus one run under
+tracemalloc for the peak allocation) and stores the results as JSON under
+benchmarks/results, so versions can be compared.
+
+Usage (from the github-metrics directory):
+    python benchmarks/run.py --size 1m --months 60
+    python benchmarks/run.py --rows 250000 --only process_input calculate_developer_retention
+    python benchmarks/run.py --size 100k --compare benchmarks/results/<previous>.json
+    python benchmarks/run.py --only import_main import_homepage import_program_evaluation
+
+The import_* benchmarks time a fresh interpreter importing the app's entry point
+(and a page on top of it); the script exits with status 1 when one of them goes
+over its budget in IMPORT_BUDGETS.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from synthetic import SIZES, developers_for_rows, write_commits_csv
+from termcolor import colored
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.join(BENCHMARKS_DIR, "..", "github_metrics")
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+sys.path.insert(0, os.path.abspath(PACKAGE_DIR))
+
+REGRESSION_THRESHOLD = 1.2
+
+# Import-time budgets in seconds, for cold starts: the entry point alone, and
+# with each page.
+IMPORT_BUDGETS = {
+    "import_main": 1.6,
+    "import_homepage": 1.8,
+    "import_program_evaluation": 1.8,
+}
+
+
+def _general_insights(name):
+    def run(ctx):
+        import general_insights
+
+        return getattr(general_insights, name)(ctx["df"].copy())
+
+    return run
+
+
+def _import_time(*modules):
+    def run(ctx):
+        subprocess.run(
+            [sys.executable, "-c", f"import {', '.join(modules)}"],
+            cwd=PACKAGE_DIR,
+            check=True,
+        )
+
+    return run
+
+
+def _load_dataset(ctx):
+    from utils import load_all_developers_dataset
+
+    return load_all_developers_dataset()
+
+
+def _load_and_prepare_data(ctx):
+    from developer_survival_plot import load_and_prepare_data
+
+    return load_and_prepare_data(ctx["csv_path"])
+
+
+def _package_growth_rate(ctx):
+    from general_insights import calculate_starknet_package_growth_rate
+
+    return calculate_starknet_package_growth_rate(ctx["downloads"].copy())
+
+
+def _process_input(ctx):
+    from program_evaluation import process_input
+
+    result = process_input(
+        ",".join(ctx["cohort"]),
+        None,
+        ctx["program_end_date"],
+        "Benchmark",
+        df=ctx["df"],
+    )
+    if result[0] is None:
+        raise RuntimeError(result[4])
+    return result
+
+
+def _read_handles(ctx):
+    from handles import read_handles
+
+    # A 100,000-row export with a header row, profile URLs and duplicates.
+    upload = io.BytesIO(ctx["handle_upload"])
+    upload.name = "cohort.csv"
+    return read_handles(None, upload, ctx["df"])
+
+
+def _developer_flow(ctx):
+    import transitions
+    from general_insights import developer_flow_figure
+
+    # Cold tensor, then the flow between the last two months.
+    transitions._tensor_cache.clear()
+    tensor = transitions.get_transition_tensor(ctx["df"])
+    return developer_flow_figure(tensor, tensor.months[-2], tensor.months[-1])
+
+
+def _event_study(ctx):
+    import event_study
+
+    # Cold control pool, then the study of the cohort around its end date.
+    event_study._control_cache.clear()
+    return event_study.event_study(ctx["df"], ctx["cohort"], ctx["program_end_date"])
+
+
+def _matched_control(ctx):
+    import matching
+
+    # Cold index, then 3 neighbors for each of 1,000 participants.
+    matching._index_cache.clear()
+    return matching.matched_control(
+        ctx["df"], ctx["large_cohort"], ctx["program_end_date"]
+    )
+
+
+def _month_close_history(ctx):
+    from month_close import close_pending_months
+
+    metrics_dir = tempfile.mkdtemp(dir=ctx["workdir"])
+    close_pending_months(ctx["df"], metrics_dir)
+    return shutil.rmtree(metrics_dir)
+
+
+def _month_close_one_month(ctx):
+    import month_close
+
+    # Everything but the last closable month was closed by an earlier run.
+    metrics_dir = os.path.join(tempfile.mkdtemp(dir=ctx["workdir"]), "metrics")
+    shutil.copytree(ctx["metrics_before_last_month"], metrics_dir)
+    month_close._up_to_date.clear()
+    month_close.close_pending_months(ctx["df"], metrics_dir)
+    return shutil.rmtree(os.path.dirname(metrics_dir))
+
+
+def _homepage_panels(ctx):
+    import panels
+    from general_insights import HOMEPAGE_PANELS
+
+    # Cold render: every panel of the homepage computed concurrently, from
+    # series closed during setup.
+    panels._futures.clear()
+    futures = panels.submit_panels(HOMEPAGE_PANELS, ctx["df"])
+    return [future.result() for future in futures.values()]
+
+
+BENCHMARKS = {
+    "load_all_developers_dataset": _load_dataset,
+    "total_commits_per_month": _general_insights("total_commits_per_month"),
+    "commits_growth_rate": _general_insights("commits_growth_rate"),
+    "total_developers_per_month": _general_insights("total_developers_per_month"),
+    "developers_growth_rate": _general_insights("developers_growth_rate"),
+    "classify_developers_per_month": _general_insights("classify_developers_per_month"),
+    "developer_flow": _developer_flow,
+    "developer_commits_difference": _general_insights("developer_commits_difference"),
+    "calculate_developer_tenure": _general_insights("calculate_developer_tenure"),
+    "monthly_active_devs_by_tenure": _general_insights("monthly_active_devs_by_tenure"),
+    "calculate_developer_retention": _general_insights("calculate_developer_retention"),
+    "calculate_starknet_package_growth_rate": _package_growth_rate,
+    "load_and_prepare_data": _load_and_prepare_data,
+    "process_input": _process_input,
+    "read_handles": _read_handles,
+    "event_study": _event_study,
+    "matched_control": _matched_control,
+    "month_close_history": _month_close_history,
+    "month_close_one_month": _month_close_one_month,
+    "homepage_panels": _homepage_panels,
+    "import_main": _import_time("main"),
+    "import_homepage": _import_time("main", "general_insights"),
+    "import_program_evaluation": _import_time("main", "program_evaluation"),
+}
+
+
+def _handle_upload(rng, developers, rows=100_000):
+    handles = rng.choice(developers, size=rows)
+    urls = rng.random(rows) < 0.5
+    handles = np.where(urls, "https://github.com/" + handles.astype(object), handles)
+    upload = pd.DataFrame(
+        {"name": [f"Participant {i}" for i in range(rows)], "GitHub": handles}
+    )
+    return upload.to_csv(index=False).encode()
+
+
+def _synthetic_downloads(months):
+    calendar = pd.period_range(end=pd.Timestamp.now(), periods=months, freq="M")
+    rng = np.random.default_rng(0)
+    return pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "month": calendar.strftime("%Y-%m"),
+                    "downloads": rng.integers(1_000, 50_000, size=months),
+                    "source": source,
+                }
+            )
+            for source in ["Python (PyPI)", "JavaScript (NPM)", "Rust (Cargo)"]
+        ]
+    )
+
+
+def _close_months_before_last(df, workdir):
+    """
+    Series with every closable month but the last one closed.
+    """
+    from month_close import close_pending_months
+
+    metrics_dir = os.path.join(workdir, "metrics_before_last_month")
+    months = np.sort(df["month_year"].unique())
+    truncated = df[df["month_year"] <= months[-2]]
+    close_pending_months(truncated, metrics_dir)
+    return metrics_dir
+
+
+def run_benchmark(fn, ctx, repeat):
+    wall_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(ctx)
+        wall_times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(ctx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "wall_time_s": min(wall_times),
+        "wall_times_s": wall_times,
+        "peak_memory_mb": peak / 2**20,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCHMARKS_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _package_version():
+    import tomllib
+
+    with open(os.path.join(BENCHMARKS_DIR, "..", "pyproject.toml"), "rb") as f:
+        return tomllib.load(f)["tool"]["poetry"]["version"]
+
+
+def compare_results(previous, current):
+    previous_times = {
+        result["name"]: result["wall_time_s"]
+        for result in previous["results"]
+        if result["status"] == "ok"
+    }
+    print(colored(f"Comparison with {previous.get('git_commit')}:", "blue"))
+    for result in current["results"]:
+        if result["status"] != "ok" or result["name"] not in previous_times:
+            continue
+        ratio = result["wall_time_s"] / previous_times[result["name"]]
+        color = "red" if ratio > REGRESSION_THRESHOLD else "green"
+        print(
+            colored(
+                f"  {result['name']:<40} {previous_times[result['name']]:>9.3f}s -> "
+                f"{result['wall_time_s']:>9.3f}s  (x{ratio:.2f})",
+                color,
+            )
+        )
+
+
+def check_import_budgets(results):
+    """
+    Record the budget of every import benchmark and return the names of the ones
+    over budget.
+    """
+    over_budget = []
+    for result in results:
+        budget = IMPORT_BUDGETS.get(result["name"])
+        if budget is None or result["status"] != "ok":
+            continue
+        result["budget_s"] = budget
+        if result["wall_time_s"] > budget:
+            over_budget.append(result["name"])
+            print(
+                colored(
+                    f"{result['name']} over budget: "
+                    f"{result['wall_time_s']:.3f}s > {budget:.3f}s",
+                    "red",
+                )
+            )
+    return over_budget
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark github_metrics.")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--size", choices=SIZES, default="100k")
+    size.add_argument("--rows", type=int, help="Approximate number of rows")
+    parser.add_argument("--months", type=int, default=48)
+    parser.add_argument(
+        "--developers", type=int, help="Overrides the count derived from the rows"
+    )
+    parser.add_argument("--cohort-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS)
+    parser.add_argument("--output", help="Results file (defaults to results/)")
+    parser.add_argument("--compare", help="Previous results file to compare with")
+    args = parser.parse_args()
+
+    rows = args.rows or SIZES[args.size]
+    developers = args.developers or developers_for_rows(rows, args.months)
+
+    workdir = tempfile.mkdtemp(prefix="github_metrics_bench_")
+    csv_path = os.path.join(workdir, "commits.csv")
+    print(
+        colored(f"Generating {developers} developers x {args.months} months...", "blue")
+    )
+    rows = write_commits_csv(csv_path, developers, args.months, seed=args.seed)
+    os.environ["STAR_TRACKER_DATASET"] = csv_path
+    os.environ["STAR_TRACKER_METRICS_DIR"] = os.path.join(workdir, "metrics")
+
+    # Some functions write debug files to the working directory.
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        from utils import load_all_developers_dataset
+
+        df = load_all_developers_dataset()
+        downloads = _synthetic_downloads(args.months)
+        os.makedirs(os.path.join("data", "source"))
+        downloads.to_csv(
+            os.path.join("data", "source", "starknet_downloads.csv"), index=False
+        )
+        rng = np.random.default_rng(args.seed)
+        active = df.loc[df["total_commits"] > 0, "developer"].unique()
+        months = np.sort(df["month_year"].unique())
+        ctx = {
+            "df": df,
+            "csv_path": csv_path,
+            "downloads": downloads,
+            "cohort": list(
+                rng.choice(
+                    active, size=min(args.cohort_size, len(active)), replace=False
+                )
+            ),
+            "program_end_date": str(pd.Timestamp(months[len(months) // 2]).date()),
+            "large_cohort": list(
+                rng.choice(active, size=min(1000, len(active)), replace=False)
+            ),
+            "workdir": workdir,
+        }
+        ctx["handle_upload"] = _handle_upload(rng, df["developer"].unique())
+        ctx["metrics_before_last_month"] = _close_months_before_last(df, workdir)
+
+        from month_close import close_pending_months
+
+        close_pending_months(df)
+
+        results = []
+        for name in args.only or BENCHMARKS:
+            print(colored(f"Running {name}...", "blue"))
+            try:
+                result = {"name": name, "status": "ok"}
+                result.update(run_benchmark(BENCHMARKS[name], ctx, args.repeat))
+            except ImportError as e:
+                result = {"name": name, "status": f"skipped: {e}"}
+            except Exception as e:
+                result = {"name": name, "status": f"error: {e!r}"}
+            results.append(result)
+            if result["status"] == "ok":
+                print(
+                    colored(
+                        f"  {result['wall_time_s']:.3f}s, "
+                        f"peak {result['peak_memory_mb']:.1f} MB",
+                        "green",
+                    )
+                )
+            else:
+                print(colored(f"  {result['status']}", "red"))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    over_budget = check_import_budgets(results)
+    report = {
+        "package_version": _package_version(),
+        "git_commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "dataset": {
+            "rows": rows,
+            "developers": developers,
+            "months": args.months,
+            "seed": args.seed,
+            "cohort_size": len(ctx["cohort"]),
+        },
+        "results": results,
+    }
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(
+            RESULTS_DIR,
+            f"{datetime.now():%Y-%m-%dT%H%M%S}_{report['git_commit']}_{rows}rows.json",
+        )
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(colored(f"Results written to {output}", "blue"))
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare_results(json.load(f), report)
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Synthetic commits datasets in the schema of the source exports.
+
+Each developer joins in a random month and has one row per month from then on,
+most of them zero-commit padding, like the real exports. Activity is
+zero-inflated: every developer gets a probability of committing in a given month
+and a typical commit count when they do.
+"""
+
+import numpy as np
+import pandas as pd
+
+SIZES = {
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+    "100m": 100_000_000,
+}
+
+
+def developers_for_rows(rows, months):
+    """
+    Number of developers that yields about `rows` rows over `months` months
+    (developers are around for half of the months on average).
+    """
+    return max(1, int(np.ceil(rows / max(1, (months + 1) / 2))))
+
+
+def generate_commits(developers, months, end_month=None, seed=0, first_developer=0):
+    """
+    Synthetic commits frame with `month_year` as datetime, as returned by
+    `load_all_developers_dataset`. `end_month` defaults to the current month so
+    that the app's "last N months" windows are populated.
+    """
+    rng = np.random.default_rng(seed)
+    end_month = pd.Timestamp(end_month or pd.Timestamp.now()).to_period("M")
+    calendar = pd.period_range(end=end_month, periods=months, freq="M").to_timestamp()
+
+    start = rng.integers(0, months, size=developers)
+    span = months - start
+    dev_codes = np.repeat(np.arange(developers), span)
+    offsets = np.arange(len(dev_codes)) - np.repeat(np.cumsum(span) - span, span)
+    month_codes = start[dev_codes] + offsets
+
+    activity = rng.beta(0.6, 3.0, size=developers)
+    typical = rng.lognormal(mean=1.5, sigma=1.0, size=developers)
+    active = rng.random(len(dev_codes)) < activity[dev_codes]
+    commits = np.where(active, 1 + rng.poisson(typical[dev_codes]), 0)
+
+    names = np.array(
+        [f"dev{i:08d}" for i in range(first_developer, first_developer + developers)]
+    )
+    return pd.DataFrame(
+        {
+            "developer": names[dev_codes],
+            "month_year": calendar[month_codes],
+            "network": "starknet",
+            "total_commits": commits,
+        }
+    )
+
+
+def write_commits_csv(path, developers, months, end_month=None, seed=0):
+    """
+    Write a synthetic export to `path` in chunks of developers, so datasets larger
+    than memory can be produced. Returns the number of rows written.
+    """
+    chunk_developers = 200_000
+    rows = 0
+    for chunk, first in enumerate(range(0, developers, chunk_developers)):
+        df = generate_commits(
+            min(chunk_developers, developers - first),
+            months,
+            end_month=end_month,
+            seed=seed + chunk,
+            first_developer=first,
+        )
+        df["month_year"] = df["month_year"].dt.strftime("%B_%Y")
+        df.to_csv(path, mode="w" if chunk == 0 else "a", header=chunk == 0, index=False)
+        rows += len(df)
+    return rows
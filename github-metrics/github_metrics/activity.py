@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+from termcolor import colored
+from utils import dataset_snapshot
+
+_matrix_cache = {}
+_MAX_CACHED_SNAPSHOTS = 4
+
+
+def month_ordinal(month_year):
+    """
+    Number of months since January 1970 for a datetime Series or Timestamp.
+    """
+    if isinstance(month_year, pd.Series):
+        return (
+            month_year.dt.year * 12 + month_year.dt.month - 1 - 1970 * 12
+        ).to_numpy()
+    return month_year.year * 12 + month_year.month - 1 - 1970 * 12
+
+
+class ActivityMatrix:
+    """
+    Dense developer x month view of the commits table.
+
+    `commits[i, j]` holds the commits of `developers[i]` in `months[j]`, with one
+    column per calendar month between the first and last month of the data.
+    `present[i, j]` tells whether the source had a row for that cell at all: the
+    exports pad some months with zero-commit rows, and a few analyses count a
+    padding row as the developer being around (for sparse storage, whether the
+    month is within the developer's tracked months).
+    """
+
+    def __init__(self, developers, months, commits, present):
+        self.developers = developers
+        self.months = months
+        self.commits = commits
+        self.present = present
+        self._first_active = None
+
+    @classmethod
+    def from_frame(cls, df):
+        month_year = df["month_year"]
+        if not pd.api.types.is_datetime64_any_dtype(month_year):
+            month_year = pd.to_datetime(month_year, format="%B_%Y")
+
+        roster = df.attrs.get("roster")
+        if roster is None:
+            dev_codes, developers = pd.factorize(df["developer"], sort=True)
+        else:
+            # Sparse storage: every developer of the roster (sorted by name)
+            # gets a row, with commits or not.
+            dev_codes = df["developer"].cat.codes.to_numpy()
+            developers = roster["developer"]
+        # Dictionary-encoded names factorize in category order; rows are kept
+        # in name order either way.
+        developers = pd.Index(np.asarray(developers, dtype=object))
+        if not developers.is_monotonic_increasing:
+            order = developers.argsort()
+            dev_codes = np.argsort(order)[dev_codes]
+            developers = developers[order]
+
+        ordinals = month_ordinal(month_year)
+        start = month_year.min()
+        if roster is not None:
+            tracked_first = month_ordinal(roster["first_month"])
+            tracked_last = month_ordinal(roster["last_month"])
+            start = min(start, roster["first_month"].min())
+        first = month_ordinal(start)
+        end = (
+            ordinals.max()
+            if roster is None
+            else max(ordinals.max(), tracked_last.max())
+        )
+        month_codes = ordinals - first
+        months = pd.date_range(start, periods=end - first + 1, freq="MS")
+
+        shape = (len(developers), len(months))
+        flat = dev_codes.astype(np.int64) * shape[1] + month_codes
+        commits = np.bincount(
+            flat, weights=df["total_commits"].to_numpy(), minlength=shape[0] * shape[1]
+        )
+        commits = commits.astype(np.int64).reshape(shape)
+        if roster is None:
+            present = np.zeros(shape[0] * shape[1], dtype=bool)
+            present[flat] = True
+            present = present.reshape(shape)
+        else:
+            # The padding rows dropped by sparse storage are the tracked months.
+            columns = np.arange(shape[1]) + first
+            present = (columns >= tracked_first[:, None]) & (
+                columns <= tracked_last[:, None]
+            )
+        return cls(developers, months, commits, present)
+
+    def month_position(self, timestamp):
+        """
+        Column of the first month starting on or after `timestamp`.
+        """
+        return int(self.months.searchsorted(pd.Timestamp(timestamp), side="left"))
+
+    @property
+    def first_active(self):
+        """
+        Column of the first month in which each developer has commits (-1 for
+        developers without any), computed on first use.
+        """
+        if self._first_active is None:
+            active = self.commits > 0
+            self._first_active = np.where(active.any(axis=1), active.argmax(axis=1), -1)
+        return self._first_active
+
+    def tenure_months(self):
+        """
+        Months since each developer's first active month, for every cell of the
+        matrix (negative before it, and for developers never active).
+        """
+        first_active = np.where(
+            self.first_active < 0, len(self.months), self.first_active
+        )
+        return np.arange(len(self.months)) - first_active[:, None]
+
+    def closed_months(self):
+        """
+        Number of leading months that are complete: the calendar has moved past
+        them and the data has a later month (the last month of an export is
+        still running when it is taken).
+        """
+        current_month = pd.Timestamp.now().to_period("M").to_timestamp()
+        return min(len(self.months) - 1, self.month_position(current_month))
+
+    def developer_positions(self, handles):
+        """
+        Row positions of the given handles, skipping unknown ones and duplicates.
+        """
+        positions = self.developers.get_indexer(pd.Index(handles).unique())
+        return positions[positions >= 0]
+
+
+def get_activity_matrix(df):
+    """
+    Activity matrix for `df`, built once per dataset snapshot.
+    """
+    key = dataset_snapshot(df)
+    matrix = _matrix_cache.get(key)
+    if matrix is None:
+        print(colored("Building activity matrix...", "blue"))
+        matrix = ActivityMatrix.from_frame(df)
+        if len(_matrix_cache) >= _MAX_CACHED_SNAPSHOTS:
+            _matrix_cache.pop(next(iter(_matrix_cache)))
+        _matrix_cache[key] = matrix
+    return matrix
@@ -0,0 +1,217 @@
+"""
+JSON API for the homepage series and program evaluation results.
+
+Serves the monthly series persisted by the month-close job (see
+month_close.SERIES) and program evaluations, so that dashboards can poll them
+instead of rendering the app. From the github-metrics directory:
+
+    python github_metrics/api.py --port 8502
+
+    GET /series                         names of the series
+    GET /series/<name>?start=&end=      rows of a series, months as YYYY-MM
+    GET /program-evaluation?handles=a,b&date=YYYY-MM-DD&event=&matched=0
+
+Every response body is built once per version of the data it is computed from
+(the series file, or the dataset, current month and activity tier thresholds
+for an evaluation) and kept with its ETag. Clients sending the ETag back in
+If-None-Match get a 304 Not Modified, without a body, until the data changes.
+Computations go through the compute service when one is configured (see
+compute_service.py).
+"""
+
+import argparse
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import orjson
+import pandas as pd
+from classifier import get_thresholds
+from compute_service import call, current_dataset, service_address
+from month_close import SERIES, close_pending_months, get_series_dir, load_series
+from program_evaluation import evaluation_summary
+from termcolor import colored
+from utils import get_dataset_path
+
+DEFAULT_PORT = 8502
+
+_responses = {}
+_responses_lock = threading.Lock()
+_MAX_CACHED_RESPONSES = 256
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _dataset():
+    # With a compute service, the dataset is only loaded by the service.
+    return None if service_address() else current_dataset()
+
+
+def _dataset_version():
+    path = get_dataset_path()
+    return (os.path.abspath(path), os.path.getmtime(path))
+
+
+def _cached_response(key, build):
+    """
+    (ETag, body) of the response `key`, built with `build` on first use.
+    """
+    with _responses_lock:
+        response = _responses.get(key)
+    if response is None:
+        body = orjson.dumps(build(), option=orjson.OPT_SERIALIZE_NUMPY)
+        response = (f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', body)
+        with _responses_lock:
+            if len(_responses) >= _MAX_CACHED_RESPONSES:
+                _responses.pop(next(iter(_responses)))
+            _responses[key] = response
+    return response
+
+
+def _query_value(query, name, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+
+def series_response(name, query):
+    if name not in SERIES:
+        raise ApiError(404, f"Unknown series {name!r}")
+    start, end = _query_value(query, "start"), _query_value(query, "end")
+    try:
+        bounds = [pd.Timestamp(bound) if bound else None for bound in (start, end)]
+    except ValueError:
+        raise ApiError(400, "start and end must be dates (YYYY-MM)")
+
+    # Cheap when every month is already closed.
+    call(close_pending_months, _dataset())
+    path = os.path.join(get_series_dir(), f"{name}.csv")
+    stat = os.stat(path) if os.path.exists(path) else None
+    version = (stat.st_mtime_ns, stat.st_size) if stat else None
+
+    def build():
+        series = load_series(name)
+        if bounds[0] is not None:
+            series = series[series["month"] >= bounds[0]]
+        if bounds[1] is not None:
+            series = series[series["month"] <= bounds[1]]
+        series = series.assign(month=series["month"].dt.strftime("%Y-%m"))
+        return {
+            "series": name,
+            "columns": list(series.columns),
+            # orjson writes missing values (NaN) as null.
+            "rows": series.to_dict("records"),
+        }
+
+    return ("series", name, start, end, version), build
+
+
+def evaluation_response(query):
+    handles = _query_value(query, "handles", "")
+    if not handles.strip():
+        raise ApiError(400, "handles is required (comma separated)")
+    program_end_date = _query_value(query, "date") or None
+    if program_end_date is not None:
+        try:
+            program_end_date = pd.Timestamp(program_end_date).strftime("%Y-%m-%d")
+        except ValueError:
+            raise ApiError(400, "date must be a date (YYYY-MM-DD)")
+    event_name = _query_value(query, "event", "")
+    matched = _query_value(query, "matched", "0") == "1"
+
+    key = (
+        "program-evaluation",
+        handles,
+        program_end_date,
+        event_name,
+        matched,
+        _dataset_version(),
+        # The results look back from the current month.
+        pd.Timestamp.now().strftime("%Y-%m"),
+        get_thresholds(),
+    )
+    return key, lambda: call(
+        evaluation_summary, _dataset(), handles, program_end_date, event_name, matched
+    )
+
+
+def route(path, query):
+    """
+    Cache key and body builder of the response to `path`.
+    """
+    parts = [part for part in path.split("/") if part]
+    if parts == ["series"]:
+        return ("series",), lambda: {"series": list(SERIES)}
+    if len(parts) == 2 and parts[0] == "series":
+        return series_response(parts[1], query)
+    if parts == ["program-evaluation"]:
+        return evaluation_response(query)
+    raise ApiError(404, f"Unknown endpoint {path!r}")
+
+
+def _etag_matches(header, etag):
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            key, build = route(url.path, parse_qs(url.query))
+            etag, body = _cached_response(key, build)
+        except ApiError as e:
+            return self._send_json(e.status, {"error": str(e)})
+        except Exception as e:
+            print(colored(f"Error serving {self.path}: {e}", "red"))
+            return self._send_json(500, {"error": str(e)})
+
+        if _etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self._send_json(200, body, etag)
+
+    def _send_json(self, status, body, etag=None):
+        if not isinstance(body, bytes):
+            body = orjson.dumps(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+            # Polling clients revalidate every time; unchanged data costs a 304.
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the insights as JSON.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), _ApiHandler)
+    print(colored(f"API listening on http://{args.host}:{args.port}", "blue"))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import numpy as np
+from activity import get_activity_matrix
+from rank_stats import SortedSample, remove_values
+from utils import dataset_snapshot
+
+_baseline_cache = {}
+_MAX_CACHED_BASELINES = 16
+
+
+def average_growth_rates(matrix):
+    """
+    Vectorized `calculate_average_growth_rate` for every developer: the mean
+    relative change between consecutive rows of the developer's history, skipping
+    pairs whose previous value is zero.
+    """
+    rows, _ = np.nonzero(matrix.present)
+    values = matrix.commits[matrix.present].astype(float)
+
+    same_developer = rows[1:] == rows[:-1]
+    previous = values[:-1]
+    valid = same_developer & (previous != 0)
+    rates = (values[1:][valid] - previous[valid]) / previous[valid]
+    rate_rows = rows[1:][valid]
+
+    n_developers = len(matrix.developers)
+    sums = np.bincount(rate_rows, weights=rates, minlength=n_developers)
+    counts = np.bincount(rate_rows, minlength=n_developers)
+    return np.divide(sums, counts, out=np.zeros(n_developers), where=counts > 0)
+
+
+class EcosystemBaseline:
+    """
+    Commit distributions of the whole ecosystem for the developers active since
+    `window_start`, computed once per snapshot and window.
+
+    Program evaluations compare a cohort against "everyone else"; instead of
+    rebuilding that frame for every cohort, the cohort's own values are
+    subtracted from these sorted distributions (see rank_stats).
+    """
+
+    def __init__(self, matrix, window_start):
+        self.matrix = matrix
+        self.window_start = matrix.month_position(window_start)
+
+        window = matrix.commits[:, self.window_start :]
+        self.active = (window > 0).any(axis=1)
+        self.active_commits = SortedSample(window[window > 0])
+        self.growth_rates = average_growth_rates(matrix)
+        self.active_growth_rates = SortedSample(self.growth_rates[self.active])
+        self._commits_since = {}
+
+    def cohort_active(self, github_handles):
+        """
+        Positions of the cohort developers that are active within the window.
+        """
+        positions = self.matrix.developer_positions(github_handles)
+        return positions[self.active[positions]]
+
+    def other_active_commits(self, github_handles):
+        """
+        Monthly commits of the active months within the window, cohort excluded.
+        """
+        positions = self.cohort_active(github_handles)
+        window = self.matrix.commits[positions, self.window_start :]
+        return remove_values(self.active_commits.values, window[window > 0])
+
+    def commits_since(self, since, positions):
+        """
+        Monthly commits recorded from `since` onwards for the given developers.
+        """
+        start = self.matrix.month_position(since)
+        commits = self.matrix.commits[positions, start:]
+        return commits[self.matrix.present[positions, start:]]
+
+    def ecosystem_commits_since(self, since):
+        """
+        Monthly commits recorded from `since` onwards for every developer active
+        within the window, as a SortedSample cached per starting month.
+        """
+        start = self.matrix.month_position(since)
+        if start not in self._commits_since:
+            commits = self.matrix.commits[self.active, start:]
+            present = self.matrix.present[self.active, start:]
+            self._commits_since[start] = SortedSample(commits[present])
+        return self._commits_since[start]
+
+
+def get_ecosystem_baseline(df, window_start):
+    """
+    Baseline for the window starting at `window_start`, cached per snapshot and
+    per first month of the window.
+    """
+    matrix = get_activity_matrix(df)
+    key = (dataset_snapshot(df), matrix.month_position(window_start))
+    baseline = _baseline_cache.get(key)
+    if baseline is None:
+        baseline = EcosystemBaseline(matrix, window_start)
+        if len(_baseline_cache) >= _MAX_CACHED_BASELINES:
+            _baseline_cache.pop(next(iter(_baseline_cache)))
+        _baseline_cache[key] = baseline
+    return baseline
@@ -0,0 +1,52 @@
+"""
+Chart payloads summarized on the server.
+
+A chart spec carries every value it plots to the browser: the box plot of the
+ecosystem's monthly commits held every active month of every developer, and the
+commits per month of a 1,000-handle cohort one line per developer, megabytes of
+JSON that stall the browser. Box plots are drawn from their precomputed
+statistics instead of raw values, and large cohorts as percentile bands over
+their developers, month by month, with individual developers only drawn on
+request.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Cohorts larger than this are drawn as percentile bands.
+MAX_INDIVIDUAL_LINES = 50
+BAND_PERCENTILES = (10, 50, 90)
+
+
+def box_statistics(values):
+    """
+    Precomputed go.Box statistics of `values`: quartiles (linear interpolation),
+    mean, and whiskers at the most extreme values within 1.5 IQR of the box.
+    None for an empty sample.
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return None
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    reach = 1.5 * (q3 - q1)
+    return {
+        "q1": [q1],
+        "median": [median],
+        "q3": [q3],
+        "mean": [values.mean()],
+        "lowerfence": [values[values >= q1 - reach].min()],
+        "upperfence": [values[values <= q3 + reach].max()],
+    }
+
+
+def percentile_bands(monthly, percentiles=BAND_PERCENTILES):
+    """
+    Percentiles over developers of a (developer x month) frame of commits, as a
+    frame indexed by month with one `p<percentile>` column per percentile.
+    """
+    bands = np.percentile(monthly.to_numpy(dtype=float), percentiles, axis=0)
+    return pd.DataFrame(
+        bands.T,
+        index=monthly.columns,
+        columns=[f"p{percentile}" for percentile in percentiles],
+    )
@@ -0,0 +1,96 @@
+"""
+Activity tiers shared by every chart, table and report.
+
+A developer's tier in a month follows from their commits that month: below the
+first threshold they are low-level active, below the second moderately active,
+otherwise highly involved. The thresholds default to 10 and 20 commits and can
+be changed with STAR_TRACKER_TIER_THRESHOLDS (e.g. "5,15"); the labels follow
+them. Tiers are assigned to whole arrays with a single np.searchsorted, and the
+tier matrix of a dataset is cached per snapshot for every caller to reuse.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from activity import get_activity_matrix
+from utils import dataset_snapshot
+
+TIERS = ["low", "moderate", "high"]
+DEFAULT_THRESHOLDS = (10, 20)
+INACTIVE = -1
+
+_tier_matrix_cache = {}
+_MAX_CACHED_MATRICES = 4
+
+
+def get_thresholds():
+    """
+    Tier thresholds from STAR_TRACKER_TIER_THRESHOLDS, or the defaults.
+    """
+    value = os.environ.get("STAR_TRACKER_TIER_THRESHOLDS")
+    if not value:
+        return DEFAULT_THRESHOLDS
+    thresholds = tuple(int(threshold) for threshold in value.split(","))
+    if len(thresholds) != len(TIERS) - 1 or not 0 < thresholds[0] < thresholds[1]:
+        raise ValueError(
+            f"STAR_TRACKER_TIER_THRESHOLDS must be two increasing positive "
+            f"commit counts, got {value!r}"
+        )
+    return thresholds
+
+
+def tier_labels(thresholds=None):
+    """
+    Display label of each tier, by tier name.
+    """
+    low, high = thresholds or get_thresholds()
+    return {
+        "low": f"Low-level active (<{low} commits)",
+        "moderate": f"Moderately active ({low}-{high - 1} commits)",
+        "high": f"Highly involved ({high}+ commits)",
+    }
+
+
+def classify(commits, thresholds=None):
+    """
+    Tier codes (positions in TIERS) of an array of commit counts. Zero counts are
+    coded as low-level active, callers decide whether those count as active.
+    """
+    return np.searchsorted(
+        thresholds or get_thresholds(), np.asarray(commits), side="right"
+    ).astype(np.int8)
+
+
+def classify_labels(commits, thresholds=None, inactive_label=None):
+    """
+    Ordered categorical of tier labels for an array of commit counts, like
+    `pd.cut` with the tier bins. With `inactive_label`, zero counts get that
+    label (placed after the tiers) instead of the low tier.
+    """
+    commits = np.asarray(commits)
+    categories = list(tier_labels(thresholds).values())
+    codes = classify(commits, thresholds).astype(np.int64)
+    if inactive_label is not None:
+        categories.append(inactive_label)
+        codes[commits == 0] = len(TIERS)
+    return pd.Categorical.from_codes(codes, categories=categories, ordered=True)
+
+
+def get_tier_matrix(df, thresholds=None):
+    """
+    Tier code of every developer and month of the activity matrix of `df`
+    (INACTIVE where the developer has no commits), built once per snapshot and
+    thresholds.
+    """
+    thresholds = tuple(thresholds or get_thresholds())
+    key = (dataset_snapshot(df), thresholds)
+    tiers = _tier_matrix_cache.get(key)
+    if tiers is None:
+        commits = get_activity_matrix(df).commits
+        tiers = np.where(commits > 0, classify(commits, thresholds), INACTIVE)
+        tiers = tiers.astype(np.int8)
+        if len(_tier_matrix_cache) >= _MAX_CACHED_MATRICES:
+            _tier_matrix_cache.pop(next(iter(_tier_matrix_cache)))
+        _tier_matrix_cache[key] = tiers
+    return tiers
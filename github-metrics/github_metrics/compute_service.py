@@ -0,0 +1,244 @@
+"""
+Shared compute service for multi-user serving.
+
+By default every app process loads the dataset and builds the activity matrix
+and the other per-snapshot caches itself. Set STAR_TRACKER_COMPUTE_SERVICE to
+the address of a compute service (`host:port`) to hand the computations over
+to it: the service holds the dataset in a pool of worker processes, each
+loading it once and keeping its caches warm, and answers the requests of any
+number of app processes over a local socket. The app then only renders
+results, and concurrency scales with the number of workers instead of
+duplicating the dataset in every app process.
+
+Start the service from the github-metrics directory:
+
+    python github_metrics/compute_service.py --port 6150 --workers 4
+
+A request is a function with its arguments, run as `function(df, *args,
+**kwargs)` on a worker's dataset; the function must be importable (a
+module-level function) and its arguments and result picklable. Requests are
+unpickled and run as is, so connections are always authenticated: with
+STAR_TRACKER_COMPUTE_KEY (the same value on both sides), or else with a random
+key that the service writes to a file only readable by its user
+(STAR_TRACKER_COMPUTE_KEY_FILE, ~/.star_tracker_compute_key by default) and
+that local clients of the same user read. The service listens on localhost
+unless told otherwise; listening on another interface requires
+STAR_TRACKER_COMPUTE_KEY, and should only be done on a trusted network.
+"""
+
+import argparse
+import ipaddress
+import multiprocessing
+import os
+import pickle
+import secrets
+import signal
+import socket
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.connection import Client, Listener
+
+from termcolor import colored
+from utils import get_dataset_path, load_all_developers_dataset
+
+DEFAULT_PORT = 6150
+
+_dataset = None
+_dataset_lock = threading.Lock()
+
+
+def service_address():
+    """
+    (host, port) of the compute service the app should use, or None.
+    """
+    address = os.environ.get("STAR_TRACKER_COMPUTE_SERVICE")
+    if not address:
+        return None
+    host, _, port = address.rpartition(":")
+    return (host or "localhost", int(port))
+
+
+def get_key_path():
+    if os.environ.get("STAR_TRACKER_COMPUTE_KEY_FILE"):
+        return os.environ["STAR_TRACKER_COMPUTE_KEY_FILE"]
+    return os.path.join(os.path.expanduser("~"), ".star_tracker_compute_key")
+
+
+def _authkey(create=False):
+    """
+    Key authenticating the connections: STAR_TRACKER_COMPUTE_KEY, or the key
+    file (written with a random key first when `create` is set).
+    """
+    key = os.environ.get("STAR_TRACKER_COMPUTE_KEY")
+    if key:
+        return key.encode()
+
+    path = get_key_path()
+    if create:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+            print(colored(f"Compute service key written to {path}", "blue"))
+    if not os.path.exists(path):
+        raise RuntimeError(
+            f"No compute service key: set STAR_TRACKER_COMPUTE_KEY, or start the "
+            f"service to write one to {path}"
+        )
+    if os.stat(path).st_mode & 0o077:
+        raise RuntimeError(
+            f"The compute service key file {path} must only be accessible by its "
+            f"owner (chmod 600)"
+        )
+    with open(path) as f:
+        key = f.read().strip()
+    if not key:
+        raise RuntimeError(f"The compute service key file {path} is empty")
+    return key.encode()
+
+
+def _is_loopback(host):
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def call(function, df, *args, **kwargs):
+    """
+    `function(df, *args, **kwargs)`, run by the compute service on its own
+    dataset when one is configured (`df` is then ignored and may be None), and
+    in this process otherwise.
+    """
+    address = service_address()
+    if address is None:
+        return function(df, *args, **kwargs)
+    with Client(address, authkey=_authkey()) as connection:
+        connection.send((function, args, kwargs))
+        status, result = connection.recv()
+    if status == "error":
+        raise result
+    return result
+
+
+def current_dataset():
+    """
+    The dataset of this process (a service worker's, or the API's without a
+    service), reloaded when the export changes on disk (as the app does on
+    every rerun).
+    """
+    global _dataset
+    path = get_dataset_path()
+    source = (os.path.abspath(path), os.path.getmtime(path))
+    with _dataset_lock:
+        if _dataset is None or _dataset.attrs.get("source") != source:
+            _dataset = load_all_developers_dataset()
+        return _dataset
+
+
+def _run(function, args, kwargs):
+    return function(current_dataset(), *args, **kwargs)
+
+
+class ComputeService:
+    """
+    Listener answering requests on a pool of `workers` processes. Every
+    connection is served by a thread, which hands its requests to the pool.
+    """
+
+    def __init__(self, host="localhost", port=DEFAULT_PORT, workers=None):
+        if not _is_loopback(host) and not os.environ.get("STAR_TRACKER_COMPUTE_KEY"):
+            raise RuntimeError(
+                f"Set STAR_TRACKER_COMPUTE_KEY to listen on {host}, which is not "
+                f"a loopback address"
+            )
+        self.listener = Listener((host, port), authkey=_authkey(create=True))
+        self.workers = workers or os.cpu_count() or 1
+        # Spawned workers start from a clean interpreter (no inherited locks);
+        # each one loads the dataset up front.
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=current_dataset,
+        )
+
+    @property
+    def address(self):
+        return self.listener.address
+
+    def serve_forever(self):
+        while True:
+            try:
+                connection = self.listener.accept()
+            except multiprocessing.AuthenticationError as e:
+                print(colored(f"Rejected connection: {e}", "yellow"))
+                continue
+            except OSError:
+                # The listener was closed.
+                return
+            threading.Thread(
+                target=self._serve_connection, args=(connection,), daemon=True
+            ).start()
+
+    def _serve_connection(self, connection):
+        with connection:
+            while True:
+                try:
+                    function, args, kwargs = connection.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = (
+                        "ok",
+                        self.pool.submit(_run, function, args, kwargs).result(),
+                    )
+                except Exception as e:
+                    print(colored(f"Error in {function!r}: {e}", "red"))
+                    reply = ("error", e)
+                try:
+                    connection.send(reply)
+                except (pickle.PicklingError, TypeError, AttributeError) as e:
+                    connection.send(("error", RuntimeError(f"Unpicklable reply: {e}")))
+
+    def close(self):
+        self.listener.close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the app's computations.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (default: CPUs)"
+    )
+    args = parser.parse_args()
+
+    try:
+        service = ComputeService(args.host, args.port, args.workers)
+    except RuntimeError as e:
+        print(colored(str(e), "red"))
+        sys.exit(1)
+    print(
+        colored(
+            f"Compute service listening on {args.host}:{args.port} "
+            f"with {service.workers} workers",
+            "blue",
+        )
+    )
+    # Shut the workers down on `kill` as on Ctrl+C.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Commit deltas per developer between two months or windows of months.
+
+A delta is a column difference on the activity matrix: each developer's
+commits in the window ending with one month minus their commits in the window
+ending with another, for the developers the source has rows for in both. The
+biggest movers are picked with np.argpartition, so only the k selected rows
+get sorted.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def window_commits(matrix, end, window=1):
+    """
+    Commits of every developer in the `window` months ending with month
+    position `end`, and whether the source has a row for them in any of those
+    months. Months before the first one of the matrix are left out; a window
+    ending before it has no commits and no rows.
+    """
+    if end < 0:
+        n_developers = len(matrix.developers)
+        return np.zeros(n_developers, dtype=matrix.commits.dtype), np.zeros(
+            n_developers, dtype=bool
+        )
+    start = max(end - window + 1, 0)
+    return (
+        matrix.commits[:, start : end + 1].sum(axis=1),
+        matrix.present[:, start : end + 1].any(axis=1),
+    )
+
+
+def developer_deltas(matrix, later=None, earlier=None, window=1):
+    """
+    Commits in the `window` months ending with `later` and with `earlier`, and
+    their difference, per developer present in both windows. By default
+    `later` is the last complete month of the data and `earlier` the window
+    just before it. Empty when a window reaches back past the first month of
+    the data, rather than comparing windows of different lengths.
+    """
+    later = (
+        matrix.closed_months() - 1 if later is None else matrix.month_position(later)
+    )
+    earlier = later - window if earlier is None else matrix.month_position(earlier)
+    if min(later, earlier) - window + 1 < 0:
+        return pd.DataFrame(
+            columns=[
+                "developer",
+                "earlier_commits",
+                "later_commits",
+                "commits_difference",
+            ]
+        )
+    later_commits, later_present = window_commits(matrix, later, window)
+    earlier_commits, earlier_present = window_commits(matrix, earlier, window)
+    both = later_present & earlier_present
+    return pd.DataFrame(
+        {
+            "developer": matrix.developers[both],
+            "earlier_commits": earlier_commits[both],
+            "later_commits": later_commits[both],
+            "commits_difference": (later_commits - earlier_commits)[both],
+        }
+    )
+
+
+def top_movers(deltas, k=10):
+    """
+    The (at most) `k` developers whose commits grew the most and the `k` whose
+    commits dropped the most, each sorted from the biggest change.
+    """
+    values = deltas["commits_difference"].to_numpy()
+    k = min(k, len(values))
+    if k == 0:
+        return deltas.iloc[:0], deltas.iloc[:0]
+    gainers = np.argpartition(-values, k - 1)[:k]
+    gainers = gainers[np.argsort(-values[gainers], kind="stable")]
+    decliners = np.argpartition(values, k - 1)[:k]
+    decliners = decliners[np.argsort(values[decliners], kind="stable")]
+    return (
+        deltas.iloc[gainers[values[gainers] > 0]],
+        deltas.iloc[decliners[values[decliners] < 0]],
+    )
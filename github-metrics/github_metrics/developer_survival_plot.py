@@ -4,6 +4,7 @@ import pandas as pd
 import seaborn as sns
 from lifelines import KaplanMeierFitter
 from matplotlib.colors import LinearSegmentedColormap
+from storage import read_dataset, tracked_rows
 from utils import save_plot
 
 
@@ -13,14 +14,15 @@ def load_and_prepare_data(file_path):
     Filter data to include only entries from 2021 onwards and adjust the cohort calculation based on the first active month.
     Additionally, eliminate all months with a negative 'Order' so we only get the months after the cohort of the individual.
     """
-    df = pd.read_csv(file_path)
-    df["month_year"] = pd.to_datetime(df["month_year"], format="%B_%Y")
-    df = df[df["month_year"] >= "2021-09-01"]
+    df = tracked_rows(read_dataset(file_path), start="2021-09-01").copy()
     df["Active"] = df["total_commits"] > 0
     df.sort_values(by=["developer", "month_year"], inplace=True)
 
     first_active_month = (
-        df[df["Active"]].groupby("developer")["month_year"].min().reset_index()
+        df[df["Active"]]
+        .groupby("developer", observed=True)["month_year"]
+        .min()
+        .reset_index()
     )
     first_active_month.rename(columns={"month_year": "FirstActiveMonth"}, inplace=True)
 
@@ -36,14 +38,18 @@ def load_and_prepare_data(file_path):
     df["Order"] = df.apply(calculate_order, axis=1)
 
     df = df[df["Order"] >= 0]
-    df["Inactive_Month"] = df.groupby("developer")["Active"].transform(
+    df["Inactive_Month"] = df.groupby("developer", observed=True)["Active"].transform(
         lambda x: x.rolling(window=2, min_periods=2).sum() == 0
     )
     df["inactive_for_two_months"] = (
-        df.groupby("developer")["Inactive_Month"].transform("max").astype(int)
+        df.groupby("developer", observed=True)["Inactive_Month"]
+        .transform("max")
+        .astype(int)
     )
 
-    df["duration"] = df.groupby("developer")["month_year"].transform("nunique")
+    df["duration"] = df.groupby("developer", observed=True)["month_year"].transform(
+        "nunique"
+    )
     df.to_csv("debug.csv", index=False)
 
     return df
@@ -93,7 +99,7 @@ def survival_curve_analysis_and_plot(df):
     Adjust the event definition and perform Log-Rank Test.
     """
     summary_df = (
-        df.groupby("developer")
+        df.groupby("developer", observed=True)
         .agg({"duration": "first", "inactive_for_two_months": "last"})
         .reset_index()
     )
@@ -0,0 +1,218 @@
+"""
+Event-time (difference-in-differences) analysis of a cohort.
+
+The before/after test compares a cohort with itself, so an ecosystem-wide
+slowdown after the program end date reads as a program effect. The event study
+aligns monthly commits on event time (months relative to the program end
+date), and for each relative month compares the cohort's change from its own
+pre-period level with the change of a control group over the same months:
+
+    effect[k] = (cohort[k] - cohort[pre]) - (control[k] - control[pre])
+
+where `cohort[k]` is the cohort's mean monthly commits `k` months after the
+event and `cohort[pre]` its mean over the pre-period. Confidence bands come
+from a bootstrap over developers (cohort and control resampled independently),
+with every resample evaluated in one batch as weighted sums.
+
+Both groups only include developers active before the event month: cohort
+members whose first commits came after it would count as a jump from nothing
+to activity. They are left out of the study and listed in
+`attrs["excluded_cohort"]`. The control defaults to every such developer
+outside the cohort. Its event-aligned commits are cached per snapshot and
+window, so a study is a few small matrix products.
+"""
+
+import numpy as np
+import pandas as pd
+from activity import get_activity_matrix
+from utils import dataset_snapshot
+
+DEFAULT_PRE_MONTHS = 6
+DEFAULT_POST_MONTHS = 6
+
+_control_cache = {}
+_MAX_CACHED_CONTROLS = 16
+
+
+def align_event_time(values, event_positions, pre, post):
+    """
+    `values` (developers x months) realigned to event time: column `pre + k`
+    holds each developer's value `k` months after their event month (given as
+    a column of `values`, per developer or for all). Months outside the data
+    are NaN.
+    """
+    offsets = np.arange(-pre, post + 1)
+    columns = np.asarray(event_positions).reshape(-1, 1) + offsets
+    inside = (columns >= 0) & (columns < values.shape[1])
+    rows = np.arange(values.shape[0]).reshape(-1, 1)
+    aligned = values[rows, np.clip(columns, 0, values.shape[1] - 1)].astype(float)
+    aligned[~np.broadcast_to(inside, aligned.shape)] = np.nan
+    return aligned
+
+
+def active_before(matrix, event_position):
+    """
+    Mask of the matrix rows with commits before `event_position`.
+    """
+    return (matrix.first_active >= 0) & (matrix.first_active < event_position)
+
+
+class EventControl:
+    """
+    Event-aligned monthly commits of the default control pool: the developers
+    with commits before `event_position`.
+    """
+
+    def __init__(self, matrix, event_position, pre, post):
+        self.positions = np.nonzero(active_before(matrix, event_position))[0]
+        self.aligned = align_event_time(
+            matrix.commits[self.positions], event_position, pre, post
+        )
+
+    def without(self, positions):
+        """
+        Aligned commits of the pool without the given developers.
+        """
+        keep = ~np.isin(self.positions, positions)
+        return self.aligned[keep]
+
+
+def get_event_control(df, event_position, pre, post):
+    key = (dataset_snapshot(df), event_position, pre, post)
+    control = _control_cache.get(key)
+    if control is None:
+        control = EventControl(get_activity_matrix(df), event_position, pre, post)
+        if len(_control_cache) >= _MAX_CACHED_CONTROLS:
+            _control_cache.pop(next(iter(_control_cache)))
+        _control_cache[key] = control
+    return control
+
+
+def _resample_weights(rng, n, n_resamples):
+    """
+    Bootstrap resamples of `n` rows as counts per row (n_resamples x n).
+    """
+    draws = rng.integers(0, n, size=(n_resamples, n))
+    offsets = np.arange(n_resamples).reshape(-1, 1) * n
+    counts = np.bincount((draws + offsets).ravel(), minlength=n_resamples * n)
+    return counts.reshape(n_resamples, n).astype(float)
+
+
+def _effects(cohort_means, control_means, pre):
+    """
+    Difference in differences of mean trajectories (the last axis is event
+    time), against the mean of the `pre` months before the event.
+    """
+    cohort_change = cohort_means - cohort_means[..., :pre].mean(axis=-1)[..., None]
+    control_change = control_means - control_means[..., :pre].mean(axis=-1)[..., None]
+    return cohort_change - control_change
+
+
+def did_estimates(
+    cohort, control, pre, n_resamples=1000, confidence_level=0.95, seed=None
+):
+    """
+    Effect per event-time column of two aligned blocks (developers x event
+    time, without NaN), with percentile bootstrap bands. Returns the cohort and
+    control mean trajectories, the effects, their low and high bands, and the
+    average effect over the post-period with its band.
+    """
+    rng = np.random.default_rng(seed)
+    cohort_means = cohort.mean(axis=0)
+    control_means = control.mean(axis=0)
+    effects = _effects(cohort_means, control_means, pre)
+
+    cohort_resamples = _resample_weights(rng, len(cohort), n_resamples) @ cohort
+    control_resamples = _resample_weights(rng, len(control), n_resamples) @ control
+    resampled = _effects(
+        cohort_resamples / len(cohort), control_resamples / len(control), pre
+    )
+    alpha = (1 - confidence_level) / 2
+    low, high = np.quantile(resampled, [alpha, 1 - alpha], axis=0)
+    post_low, post_high = np.quantile(
+        resampled[:, pre:].mean(axis=1), [alpha, 1 - alpha]
+    )
+    post_effect = (float(effects[pre:].mean()), float(post_low), float(post_high))
+    return cohort_means, control_means, effects, low, high, post_effect
+
+
+def event_study(
+    df,
+    github_handles,
+    event_date,
+    pre=DEFAULT_PRE_MONTHS,
+    post=DEFAULT_POST_MONTHS,
+    control_positions=None,
+    n_resamples=1000,
+    seed=0,
+):
+    """
+    Event study of the cohort around `event_date` (the program end date; event
+    month 0 is the first month starting on or after it).
+
+    The control is the cached default pool minus the cohort, or the matrix rows
+    in `control_positions` (e.g. a matched control, drawn from the developers
+    active before the event). Cohort members without commits before the event
+    are left out (listed in `attrs["excluded_cohort"]`), and so are relative
+    months outside the complete months of the data. Returns one row per
+    relative month with the month, the cohort and control mean monthly commits,
+    the difference-in-differences effect and its bootstrap band (the average
+    post-period effect and its band in `attrs["post_effect"]`), or an empty
+    frame without enough data.
+    """
+    matrix = get_activity_matrix(df)
+    positions = matrix.developer_positions(github_handles)
+    event_position = matrix.month_position(event_date)
+    included = active_before(matrix, event_position)[positions]
+    excluded_cohort = list(matrix.developers[positions[~included]])
+    positions = positions[included]
+    columns = [
+        "relative_month",
+        "month",
+        "cohort_mean",
+        "control_mean",
+        "effect",
+        "effect_low",
+        "effect_high",
+    ]
+
+    if control_positions is None:
+        control = get_event_control(df, event_position, pre, post).without(positions)
+    else:
+        control = align_event_time(
+            matrix.commits[control_positions], event_position, pre, post
+        )
+    cohort = align_event_time(matrix.commits[positions], event_position, pre, post)
+
+    # Event-time columns within the complete months of the data, needing the
+    # whole pre-period.
+    empty = pd.DataFrame(columns=columns)
+    empty.attrs["excluded_cohort"] = excluded_cohort
+    if len(cohort) == 0 or len(control) == 0:
+        return empty
+    relative_months = np.arange(-pre, post + 1)
+    inside = event_position + relative_months < matrix.closed_months()
+    inside &= ~np.isnan(cohort).any(axis=0)
+    if not inside[:pre].all() or not inside[pre:].any():
+        return empty
+    cohort, control = cohort[:, inside], control[:, inside]
+
+    cohort_means, control_means, effects, low, high, post_effect = did_estimates(
+        cohort, control, pre, n_resamples=n_resamples, seed=seed
+    )
+    relative_months = relative_months[inside]
+    study = pd.DataFrame(
+        {
+            "relative_month": relative_months,
+            "month": matrix.months[event_position + relative_months],
+            "cohort_mean": cohort_means,
+            "control_mean": control_means,
+            "effect": effects,
+            "effect_low": low,
+            "effect_high": high,
+        }
+    )
+    # Average effect over the post-period months, with its bootstrap band.
+    study.attrs["post_effect"] = post_effect
+    study.attrs["excluded_cohort"] = excluded_cohort
+    return study
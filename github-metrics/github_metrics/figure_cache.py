@@ -0,0 +1,78 @@
+"""
+Figures shared across reruns and sessions.
+
+The homepage charts are drawn from a few closed monthly series, so most reruns,
+in any session, ask for a chart that was already built: the same panel, the same
+data and selection, the same theme. `cached_figure` builds each figure once per
+(panel, data version, theme) and hands the same figure to every later rerun.
+
+The data version of a figure is taken from its arguments: their `version`
+attribute when they have one (e.g. the transition tensor, versioned by dataset
+snapshot), a hash of the values of frames and arrays, and the values themselves
+otherwise (dates, selected tiers...). Cached figures are shared and must not be
+modified by their callers.
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+_figures = {}
+_MAX_CACHED_FIGURES = 128
+
+
+def data_version(value):
+    """
+    Hashable key standing for the data of a figure argument.
+    """
+    version = getattr(value, "version", None)
+    if version is not None:
+        return version
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+        names = value.columns if isinstance(value, pd.DataFrame) else [value.name]
+        digest.update(repr(list(names)).encode())
+        return digest.hexdigest()
+    if isinstance(value, np.ndarray):
+        digest = hashlib.blake2b(np.ascontiguousarray(value).tobytes(), digest_size=16)
+        return (value.dtype.str, value.shape, digest.hexdigest())
+    if isinstance(value, (list, tuple)):
+        return tuple(data_version(item) for item in value)
+    return value
+
+
+def current_theme():
+    """
+    Type of the viewer's theme ("light" or "dark"), None when unknown (before
+    Streamlit 1.46, or outside of a session).
+    """
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    try:
+        return st.context.theme.type
+    except AttributeError:
+        return None
+
+
+def cached_figure(panel, build, *args, **kwargs):
+    """
+    `build(*args, **kwargs)`, built once per panel, data version of the
+    arguments and theme.
+    """
+    key = (
+        panel,
+        data_version(args),
+        tuple(sorted((name, data_version(value)) for name, value in kwargs.items())),
+        current_theme(),
+    )
+    figure = _figures.get(key)
+    if figure is None:
+        figure = build(*args, **kwargs)
+        if len(_figures) >= _MAX_CACHED_FIGURES:
+            _figures.pop(next(iter(_figures)))
+        _figures[key] = figure
+    return figure
@@ -1,45 +1,91 @@
 import os
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import pypistats
-import requests
 import streamlit as st
+from activity import get_activity_matrix, month_ordinal
+from classifier import (
+    TIERS,
+    get_thresholds,
+    get_tier_matrix,
+    tier_labels,
+)
+from compute_service import call
+from deltas import developer_deltas, top_movers
+from figure_cache import cached_figure
+from instrumentation import profile_panel, profiled
+from month_close import (
+    TENURE_BUCKETS,
+    close_pending_months,
+    load_series,
+    tenure_buckets,
+)
+from panels import Panel, render_panels
+from rollups import MonthlyRollup
+from transitions import STATES, get_transition_tensor
+from utils import get_starknet_downloads_csv_path, with_month_dates
+
+
+def _recent_month_columns(matrix):
+    """
+    Activity matrix columns from January 2023, leaving out the current month.
+    """
+    current_month = pd.Timestamp.now().strftime("%Y-%m")
+    return np.nonzero(
+        (matrix.months >= "2023-01-01")
+        & (matrix.months.strftime("%Y-%m") != current_month)
+    )[0]
 
 
-def total_commits_per_month(df):
-    df["month_year"] = pd.to_datetime(df["month_year"], format="%B_%Y")
-    current_month = pd.Timestamp.now().strftime("%Y-%m")
-    total_commits_df = (
-        df[
-            (df["month_year"] >= "2023-01-01")
-            & (df["month_year"].dt.strftime("%Y-%m") != current_month)
-        ]
-        .groupby([pd.Grouper(key="month_year", freq="ME"), "developer"])
-        .agg({"total_commits": "sum"})
-        .reset_index()
+def _per_month_and_tier(matrix, columns, cells, tiers, weights, value_name):
+    """
+    Sum of `weights` (or the number of cells without weights) per month and tier
+    for the given (row, column) cells, over the observed combinations only.
+    """
+    rows, positions = cells
+    keys = positions * len(TIERS) + tiers[rows, columns[positions]]
+    counts = np.bincount(keys, minlength=len(columns) * len(TIERS))
+    values = (
+        counts
+        if weights is None
+        else np.bincount(keys, weights=weights, minlength=len(counts))
     )
-    total_commits_df["classification"] = pd.cut(
-        total_commits_df["total_commits"],
-        bins=[-1, 9, 19, float("inf")],
-        labels=[
-            "Low-level active (<10 commits)",
-            "Moderately active (10-19 commits)",
-            "Highly involved (20+ commits)",
-        ],
-    )
-    total_commits_df = (
-        total_commits_df.groupby(["month_year", "classification"], observed=True)[
-            "total_commits"
-        ]
-        .sum()
-        .reset_index()
+    observed = np.nonzero(counts)[0]
+    return pd.DataFrame(
+        {
+            "month_year": matrix.months[columns[observed // len(TIERS)]].strftime(
+                "%B %Y"
+            ),
+            "classification": pd.Categorical.from_codes(
+                observed % len(TIERS),
+                categories=list(tier_labels().values()),
+                ordered=True,
+            ),
+            value_name: values[observed].astype(np.int64),
+        }
     )
-    total_commits_df["month_year"] = total_commits_df["month_year"].dt.strftime("%B %Y")
-    return total_commits_df
 
 
+@profiled(rows=lambda df: len(df))
+def total_commits_per_month(df):
+    matrix = get_activity_matrix(df)
+    columns = _recent_month_columns(matrix)
+    # Zero-commit rows count towards the low tier, as they did with pd.cut.
+    tiers = np.maximum(get_tier_matrix(df), 0)
+    rows, positions = np.nonzero(matrix.present[:, columns])
+    return _per_month_and_tier(
+        matrix,
+        columns,
+        (rows, positions),
+        tiers,
+        matrix.commits[rows, columns[positions]],
+        "total_commits",
+    )
+
+
+@profiled(rows=lambda df: len(df))
 def commits_growth_rate(df):
     total_commits_df = total_commits_per_month(df)
     current_month = pd.Timestamp.now().strftime("%B %Y")
@@ -55,39 +101,22 @@ def commits_growth_rate(df):
     return total_commits_df
 
 
+@profiled(rows=lambda df: len(df))
 def total_developers_per_month(df):
-    df["month_year"] = pd.to_datetime(df["month_year"], format="%B_%Y")
-    current_month = pd.Timestamp.now().strftime("%Y-%m")
-    total_developers_df = (
-        df[
-            (df["month_year"] >= "2023-01-01")
-            & (df["month_year"].dt.strftime("%Y-%m") != current_month)
-        ]
-        .groupby([pd.Grouper(key="month_year", freq="ME"), "developer"])
-        .agg({"total_commits": "sum"})
-        .reset_index()
-    )
-    total_developers_df = total_developers_df[total_developers_df["total_commits"] > 0]
-    total_developers_df["classification"] = pd.cut(
-        total_developers_df["total_commits"],
-        bins=[-1, 9, 19, float("inf")],
-        labels=[
-            "Low-level active (<10 commits)",
-            "Moderately active (10-19 commits)",
-            "Highly involved (20+ commits)",
-        ],
-    )
-    total_developers_df = (
-        total_developers_df.groupby(["month_year", "classification"], observed=True)
-        .size()
-        .reset_index(name="total_developers")
+    matrix = get_activity_matrix(df)
+    columns = _recent_month_columns(matrix)
+    rows, positions = np.nonzero(matrix.commits[:, columns] > 0)
+    return _per_month_and_tier(
+        matrix,
+        columns,
+        (rows, positions),
+        get_tier_matrix(df),
+        None,
+        "total_developers",
     )
-    total_developers_df["month_year"] = total_developers_df["month_year"].dt.strftime(
-        "%B %Y"
-    )
-    return total_developers_df
 
 
+@profiled(rows=lambda df: len(df))
 def developers_growth_rate(df):
     total_developers_df = total_developers_per_month(df)
     current_month = pd.Timestamp.now().strftime("%B %Y")
@@ -107,30 +136,24 @@ def developers_growth_rate(df):
     return total_developers_df
 
 
+@profiled(rows=lambda df: len(df))
 def classify_developers_per_month(df):
-    df["month_year"] = pd.to_datetime(df["month_year"], format="%B_%Y")
-    last_month = df["month_year"].max()
-    last_month_df = df[df["month_year"] == last_month]
-    classification_df = (
-        last_month_df.groupby("developer")["total_commits"].sum().reset_index()
-    )
-    classification_df["classification"] = pd.cut(
-        classification_df["total_commits"],
-        bins=[-1, 9, 19, float("inf")],
-        labels=[
-            "Low-level active (<10 commits)",
-            "Moderately active (10-19 commits)",
-            "Highly involved (20+ commits)",
-        ],
-    )
-    classification_df = classification_df[classification_df["total_commits"] > 0]
-    classification_df["sort_key"] = classification_df["classification"].map(
+    matrix = get_activity_matrix(df)
+    commits = matrix.commits[:, -1]
+    active = commits > 0
+    tiers = get_tier_matrix(df)[active, -1]
+    # Index rows by their position among the developers of the last month.
+    classification_df = pd.DataFrame(
         {
-            "Highly involved (20+ commits)": 0,
-            "Moderately active (10-19 commits)": 1,
-            "Low-level active (<10 commits)": 2,
-        }
+            "developer": matrix.developers[active],
+            "classification": pd.Categorical.from_codes(
+                tiers, categories=list(tier_labels().values()), ordered=True
+            ),
+            "total_commits": commits[active],
+        },
+        index=(np.cumsum(matrix.present[:, -1]) - 1)[active],
     )
+    classification_df["sort_key"] = tiers
     classification_df = classification_df.sort_values(
         by=["sort_key", "total_commits"], ascending=[False, False]
     )
@@ -140,185 +163,135 @@ def classify_developers_per_month(df):
     return classification_df
 
 
-def developer_flow_plot(df):
-    df["month_year"] = pd.to_datetime(df["month_year"], format="%B_%Y")
-    last_month = df["month_year"].max()
-    prev_month = last_month - pd.DateOffset(months=1)
-
-    def get_classification(commits):
-        if commits == 0:
-            return "Not active"
-        elif commits < 10:
-            return "Low-level active (<10 commits)"
-        elif commits < 20:
-            return "Moderately active (10-19 commits)"
-        else:
-            return "Highly involved (20+ commits)"
-
-    last_month_df = df[df["month_year"] == last_month]
-    prev_month_df = df[df["month_year"] == prev_month]
-
-    last_month_classification = (
-        last_month_df.groupby("developer")["total_commits"]
-        .sum()
-        .apply(get_classification)
-    )
-    prev_month_classification = (
-        prev_month_df.groupby("developer")["total_commits"]
-        .sum()
-        .apply(get_classification)
-    )
-
-    flow_data = pd.concat(
-        [prev_month_classification, last_month_classification], axis=1
-    )
-    flow_data.columns = ["Previous Month", "Current Month"]
-    flow_data = flow_data.reset_index()
-
-    labels = list(
-        set(flow_data["Previous Month"].unique())
-        | set(flow_data["Current Month"].unique())
-    )
-    labels_prev = [f"{label} (Previous Month)" for label in labels]
-    labels_curr = [f"{label} (Current Month)" for label in labels]
-    labels = labels_prev + labels_curr
-
-    source = [
-        labels_prev.index(f"{prev} (Previous Month)")
-        for prev in flow_data["Previous Month"]
-    ]
-    target = [
-        labels_curr.index(f"{curr} (Current Month)")
-        for curr in flow_data["Current Month"]
-    ]
-    value = flow_data.groupby(["Previous Month", "Current Month"]).size().values
-
-    node_colors = ["#fe4a49", "#28286e", "#74b0ff", "#808080"]
-    node_colors_dict = {}
-    for i, label in enumerate(labels):
-        node_colors_dict[label] = node_colors[i % len(node_colors)]
-
-    fig_flow = go.Figure(
-        data=[
-            go.Sankey(
-                node=dict(
-                    pad=15,
-                    thickness=20,
-                    line=dict(color="black", width=0.5),
-                    label=labels,
-                    color=[node_colors_dict[label] for label in labels],
-                ),
-                link=dict(source=source, target=target, value=value),
-            )
-        ]
-    )
-
-    # fig_flow.update_layout(title_text="Developer Flow: Category Changes (Last Two Months)", font_size=10)
-    # st.plotly_chart(fig_flow)
-    # st.markdown("<p style='font-size: 12px;'><b>Source:</b> Open Source repositories in GitHub</p>", unsafe_allow_html=True)
-    # st.markdown("<p style='font-size: 12px;'><b>Description:</b> The flow of developers between different activity categories (low-level activity, moderately active, highly involved, and not active) from the previous month to the current month.</p>", unsafe_allow_html=True)
-
-
-def developer_commits_difference(df):
-    df["month_year"] = pd.to_datetime(df["month_year"], format="%B_%Y")
-    current_month = pd.Timestamp.now().strftime("%B_%Y")
-
-    current_month_dt = pd.to_datetime(current_month, format="%B_%Y")
-    prev_month_dt = current_month_dt - pd.DateOffset(months=1)
-    prev_prev_month_dt = current_month_dt - pd.DateOffset(months=2)
-
-    prev_month_df = df[df["month_year"] == prev_month_dt]
-    prev_prev_month_df = df[df["month_year"] == prev_prev_month_dt]
+def developer_flow_figure(tensor, start, end, monthly=False):
+    """
+    Sankey of the developers moving between activity tiers from `start` to
+    `end`, directly or (with `monthly`) through every month in between.
+    """
+    months = pd.date_range(start, end, freq="MS") if monthly else [start, end]
+    counts = tensor.path(start, end) if monthly else [tensor.between(start, end)]
+    with profile_panel("fig_developer_flow", rows=len(months)):
+        labels = {**tier_labels(), "inactive": "Not active"}
+        colors = {**TIER_COLORS, "inactive": "#808080"}
+        # One node per month and state, one link per nonzero count except
+        # developers staying inactive.
+        steps, sources, targets = np.nonzero(np.asarray(counts))
+        moving = (sources != len(TIERS)) | (targets != len(TIERS))
+        steps, sources, targets = steps[moving], sources[moving], targets[moving]
+        fig_flow = go.Figure(
+            data=[
+                go.Sankey(
+                    node=dict(
+                        pad=15,
+                        thickness=20,
+                        line=dict(color="black", width=0.5),
+                        label=[
+                            f"{labels[state]} ({month:%b %Y})"
+                            for month in months
+                            for state in STATES
+                        ],
+                        color=[colors[state] for _ in months for state in STATES],
+                    ),
+                    link=dict(
+                        source=steps * len(STATES) + sources,
+                        target=(steps + 1) * len(STATES) + targets,
+                        value=np.asarray(counts)[steps, sources, targets],
+                    ),
+                )
+            ]
+        )
+        fig_flow.update_layout(
+            title_text=f"Developer Flow: {start:%B %Y} to {end:%B %Y}", font_size=10
+        )
+    return fig_flow
 
-    prev_month_commits = prev_month_df.groupby("developer")["total_commits"].sum()
-    prev_prev_month_commits = prev_prev_month_df.groupby("developer")[
-        "total_commits"
-    ].sum()
 
-    commits_difference_df = pd.concat(
-        [prev_month_commits, prev_prev_month_commits], axis=1
-    )
-    commits_difference_df.columns = [
-        prev_month_dt.strftime("%B_%Y"),
-        prev_prev_month_dt.strftime("%B_%Y"),
-    ]
-    commits_difference_df["commits_difference"] = (
-        commits_difference_df[prev_month_dt.strftime("%B_%Y")]
-        - commits_difference_df[prev_prev_month_dt.strftime("%B_%Y")]
+def commits_difference_table(deltas, window=1):
+    if window == 1:
+        column = "How many more commits they had this month compared to the last one?"
+    else:
+        column = f"How many more commits they had in these {window} months compared to the {window} before?"
+    commits_difference_df = deltas[["developer", "commits_difference"]]
+    commits_difference_df = commits_difference_df.sort_values(
+        "commits_difference", kind="stable"
     )
+    return commits_difference_df.rename(columns={"commits_difference": column})
 
-    commits_difference_df = commits_difference_df.reset_index()
-    commits_difference_df = commits_difference_df[["developer", "commits_difference"]]
-    commits_difference_df = commits_difference_df[
-        commits_difference_df["commits_difference"].notnull()
-    ]
-    commits_difference_df = commits_difference_df.sort_values("commits_difference")
-    commits_difference_df = commits_difference_df.rename(
-        columns={
-            "commits_difference": "How many more commits they had this month compared to the last one?"
-        }
-    )
 
+@profiled(rows=lambda df, **kwargs: len(df))
+def developer_commits_difference(df, later=None, earlier=None, window=1):
+    """
+    Commits difference per developer between two months (by default the last
+    complete month of the data and the one before), or two windows of
+    `window` months ending with them.
+    """
+    matrix = get_activity_matrix(df)
+    deltas = developer_deltas(matrix, later, earlier, window)
+    later = matrix.months[matrix.closed_months() - 1] if later is None else later
+    earlier = later - pd.DateOffset(months=window) if earlier is None else earlier
     return (
-        commits_difference_df,
-        prev_month_dt.strftime("%B_%Y"),
-        prev_prev_month_dt.strftime("%B_%Y"),
+        commits_difference_table(deltas, window),
+        pd.Timestamp(later).strftime("%B_%Y"),
+        pd.Timestamp(earlier).strftime("%B_%Y"),
     )
 
 
+@profiled(rows=lambda df: len(df))
 def calculate_developer_tenure(df):
-    df["month_year"] = pd.to_datetime(df["month_year"], format="%B_%Y")
-    df = df.sort_values("month_year")
-    first_commit = df.groupby("developer")["month_year"].min().reset_index()
-    first_commit.columns = ["developer", "first_commit"]
-    df = pd.merge(df, first_commit, on="developer", how="left")
-    df["tenure"] = (df["month_year"] - df["first_commit"]).dt.days / 365.25
+    """
+    `df` with each row's tenure in years since the developer's first month with
+    commits (negative before it, NaN for developers who never committed).
+    """
+    df = with_month_dates(df).copy()
+    matrix = get_activity_matrix(df)
+    first_active = matrix.first_active[matrix.developers.get_indexer(df["developer"])]
+    tenure_months = month_ordinal(df["month_year"]) - month_ordinal(matrix.months[0])
+    tenure_months = tenure_months - first_active
+    df["tenure"] = np.where(first_active >= 0, tenure_months / 12, np.nan)
     return df
 
 
+@profiled(rows=lambda df: len(df))
 def monthly_active_devs_by_tenure(df):
-    df = calculate_developer_tenure(df)
-    df["tenure_category"] = pd.cut(
-        df["tenure"],
-        bins=[-float("inf"), 1, 2, float("inf")],
-        labels=["0-1y", "1y-2y", "2y+"],
-    )
-
-    last_complete_month = pd.Timestamp.now().replace(day=1) - pd.DateOffset(days=1)
-    last_complete_month = last_complete_month.replace(day=1)
-
-    df = df[df["month_year"] < last_complete_month]
-
-    monthly_active = (
-        df[df["total_commits"] > 0]
-        .groupby(["month_year", "tenure_category"], observed=True)
-        .size()
-        .unstack(fill_value=0)
+    matrix = get_activity_matrix(df)
+    closed = matrix.closed_months()
+    rows, columns = np.nonzero(matrix.commits[:, :closed] > 0)
+    buckets = tenure_buckets(matrix.tenure_months()[rows, columns])
+    counts = np.bincount(
+        columns * len(TENURE_BUCKETS) + buckets,
+        minlength=closed * len(TENURE_BUCKETS),
+    ).reshape(closed, len(TENURE_BUCKETS))
+    observed = counts.sum(axis=1) > 0
+    monthly_active = pd.DataFrame(
+        counts[observed],
+        columns=pd.Index(TENURE_BUCKETS, name="tenure_category"),
     )
-    monthly_active = monthly_active.reset_index()
-    monthly_active["month_year"] = pd.to_datetime(monthly_active["month_year"])
-    monthly_active = monthly_active.sort_values("month_year")
-
-    return monthly_active
-
+    monthly_active.insert(0, "month_year", matrix.months[:closed][observed])
     return monthly_active
 
 
-def plot_monthly_active_devs_by_tenure(monthly_active):
+@profiled(rows=lambda monthly_active, **kwargs: len(monthly_active))
+def plot_monthly_active_devs_by_tenure(
+    monthly_active, start="2022-01-01", end=None, buckets=TENURE_BUCKETS
+):
+    """
+    Active developers per tenure bucket from `start` to `end`. Expects complete
+    months only, as in the closed `active_by_tenure` series.
+    """
     monthly_active["month_year"] = pd.to_datetime(monthly_active["month_year"])
 
-    last_complete_month = pd.Timestamp.now().replace(day=1) - pd.DateOffset(days=1)
-    last_complete_month = last_complete_month.replace(day=1)
-
-    monthly_active = monthly_active[monthly_active["month_year"] < last_complete_month]
-    monthly_active = monthly_active[monthly_active["month_year"] >= "2022-01-01"]
+    monthly_active = monthly_active[monthly_active["month_year"] >= start]
+    if end is not None:
+        monthly_active = monthly_active[monthly_active["month_year"] <= end]
     last_month = monthly_active["month_year"].max()
 
     fig = go.Figure()
 
     colors = {"0-1y": "#74b0ff", "1y-2y": "#28286e", "2y+": "#fe4a49"}
 
-    for category in ["2y+", "1y-2y", "0-1y"]:
+    for category in [
+        bucket for bucket in ["2y+", "1y-2y", "0-1y"] if bucket in buckets
+    ]:
         fig.add_trace(
             go.Scatter(
                 x=monthly_active["month_year"],
@@ -333,10 +306,10 @@ def plot_monthly_active_devs_by_tenure(monthly_active):
         title="Monthly Active Devs by Tenure",
         xaxis_title="Date",
         yaxis_title="Number of Devs",
-        yaxis_range=[0, 500],
+        yaxis_rangemode="tozero",
         legend_title_text="Tenure",
         hovermode="x unified",
-        xaxis=dict(range=[pd.Timestamp("2022-01-01"), last_month], dtick="M3"),
+        xaxis=dict(range=[pd.Timestamp(start), last_month], dtick="M3"),
         plot_bgcolor="rgba(0,0,0,0)",
         paper_bgcolor="rgba(0,0,0,0)",
         font=dict(color="black"),
@@ -368,13 +341,18 @@ def is_developer_retained(dev_commits, period_months):
         return active_months >= 8 and total_commits >= 15 and avg_commits >= 1.25
 
 
+@profiled(rows=lambda df: len(df))
 def calculate_developer_retention(df):
-    df["month_year"] = pd.to_datetime(df["month_year"], format="%B_%Y")
+    df = with_month_dates(df)
     df = df.sort_values("month_year")
-    latest_date = df["month_year"].max()
+    # Months the source has rows for, zero-commit padding included (sparse
+    # storage keeps it in the roster).
+    matrix = get_activity_matrix(df)
+    months = matrix.months[matrix.present.any(axis=0)]
+    latest_date = months.max()
 
     retention_data = []
-    for month in df["month_year"].unique():
+    for month in months:
         active_devs = set(
             df[(df["month_year"] == month) & (df["total_commits"] > 0)]["developer"]
         )
@@ -390,7 +368,8 @@ def calculate_developer_retention(df):
 
                 dev_commits = (
                     dev_activity.groupby(
-                        ["developer", pd.Grouper(key="month_year", freq="ME")]
+                        ["developer", pd.Grouper(key="month_year", freq="ME")],
+                        observed=True,
                     )["total_commits"]
                     .sum()
                     .unstack(fill_value=0)
@@ -418,16 +397,22 @@ def calculate_developer_retention(df):
     return pd.DataFrame(retention_data)
 
 
-def plot_developer_retention(retention_df):
+@profiled(rows=lambda retention_df, **kwargs: len(retention_df))
+def plot_developer_retention(
+    retention_df, start="2022-01-01", end=None, periods=(3, 6, 12)
+):
     # Filter the data for plotting, but keep full dataset for calculations
-    plot_df = retention_df[retention_df["month"] >= "2022-01-01"]
+    plot_df = retention_df[retention_df["month"] >= start]
+    if end is not None:
+        plot_df = plot_df[plot_df["month"] <= end]
+    plot_df = plot_df[plot_df["period"].isin(periods)]
 
     fig = go.Figure()
 
     colors = {3: "#74b0ff", 6: "#28286e", 12: "#fe4a49"}
     names = {3: "3-month retention", 6: "6-month retention", 12: "1-year retention"}
 
-    for period in [3, 6, 12]:
+    for period in [period for period in [3, 6, 12] if period in periods]:
         period_df = plot_df[plot_df["period"] == period]
         fig.add_trace(
             go.Scatter(
@@ -437,11 +422,12 @@ def plot_developer_retention(retention_df):
                 name=names[period],
                 line=dict(color=colors[period], width=2),
                 marker=dict(size=8, color=colors[period], symbol="circle"),
+                customdata=period_df[["active_devs", "retained_devs"]],
             )
         )
 
     fig.update_layout(
-        title="Developer Retention Rate (Displayed from 2022 onwards)",
+        title=f"Developer Retention Rate (Displayed from {pd.Timestamp(start):%B %Y})",
         xaxis_title="Date",
         yaxis_title="Retention Rate",
         yaxis_tickformat=",.0%",
@@ -451,7 +437,7 @@ def plot_developer_retention(retention_df):
         hovermode="x unified",
         yaxis_range=[0, 1],
         xaxis=dict(
-            range=[pd.Timestamp("2022-01-01"), plot_df["month"].max()],
+            range=[pd.Timestamp(start), plot_df["month"].max()],
             dtick="M3",
             tickformat="%b\n%Y",
         ),
@@ -465,12 +451,12 @@ def plot_developer_retention(retention_df):
         + "<b>Retention Rate</b>: %{y:.1%}<br>"
         + "<b>Active Devs</b>: %{customdata[0]}<br>"
         + "<b>Retained Devs</b>: %{customdata[1]}",
-        customdata=plot_df[["active_devs", "retained_devs"]],
     )
 
     return fig
 
 
+@profiled()
 def update_downloads_data(csv_path):
     try:
         end_date = pd.Timestamp.now().strftime("%Y-%m-%d")
@@ -498,6 +484,9 @@ def update_downloads_data(csv_path):
 
 
 def get_pypi_downloads(package, start_date, end_date):
+    # The download clients are only needed once the panels are rendered.
+    import pypistats
+
     downloads_list = []
     for i in range(5, 0, -1):
         start_month = pd.Timestamp(end_date) - pd.DateOffset(months=i)
@@ -520,6 +509,8 @@ def get_pypi_downloads(package, start_date, end_date):
 
 
 def get_npm_downloads(package, start_date, end_date):
+    import requests
+
     url = f"https://api.npmjs.org/downloads/range/{start_date}:{end_date}/{package}"
     response = requests.get(url)
     if response.status_code == 200:
@@ -538,6 +529,8 @@ def get_npm_downloads(package, start_date, end_date):
 
 
 def get_cargo_downloads(package):
+    import requests
+
     url = f"https://crates.io/api/v1/crates/{package}/downloads"
     response = requests.get(url)
     if response.status_code == 200:
@@ -555,6 +548,7 @@ def get_cargo_downloads(package):
     return pd.DataFrame()
 
 
+@profiled(rows=lambda downloads_combined: len(downloads_combined))
 def calculate_starknet_package_growth_rate(downloads_combined):
     downloads_combined["month"] = pd.to_datetime(downloads_combined["month"])
     downloads_combined = downloads_combined.sort_values(["source", "month"])
@@ -580,6 +574,7 @@ def calculate_starknet_package_growth_rate(downloads_combined):
     return avg_growth_rate
 
 
+@profiled(rows=lambda avg_growth_rate: len(avg_growth_rate))
 def plot_starknet_package_growth_rate(avg_growth_rate):
     # Calculate the overall date range and average month count
     overall_start = avg_growth_rate["start_date"].min().strftime("%B %Y")
@@ -610,18 +605,15 @@ def plot_starknet_package_growth_rate(avg_growth_rate):
     return fig
 
 
-def add_starknet_growth_rate_visualization():
-    try:
-        csv_path = get_starknet_downloads_csv_path()
-    except FileNotFoundError as e:
-        st.error(f"Error: {str(e)}")
-        return
-
-    downloads_combined = pd.read_csv(csv_path)
+def starknet_growth_rate_figure(df=None):
+    get_starknet_downloads_csv_path()
+    downloads_combined = load_series("downloads")
 
     avg_growth_rate = calculate_starknet_package_growth_rate(downloads_combined)
-    fig_growth_rate = plot_starknet_package_growth_rate(avg_growth_rate)
+    return plot_starknet_package_growth_rate(avg_growth_rate)
 
+
+def render_starknet_growth_rate(fig_growth_rate):
     st.plotly_chart(fig_growth_rate)
 
     st.markdown(
@@ -638,122 +630,278 @@ def add_starknet_growth_rate_visualization():
     )
 
 
-def get_starknet_downloads_csv_path():
-    possible_paths = [
-        "data/source/starknet_downloads.csv",
-        "github-metrics/data/source/starknet_downloads.csv",
-    ]
+def add_starknet_growth_rate_visualization():
+    try:
+        fig_growth_rate = starknet_growth_rate_figure()
+    except FileNotFoundError as e:
+        st.error(f"Error: {str(e)}")
+        return
 
-    for path in possible_paths:
-        if os.path.exists(path):
-            return path
+    render_starknet_growth_rate(fig_growth_rate)
 
-    raise FileNotFoundError(
-        f"CSV file not found in any of the expected locations: {', '.join(possible_paths)}"
-    )
 
+TIER_COLORS = {"low": "#fe4a49", "moderate": "#28286e", "high": "#74b0ff"}
+DOWNLOAD_COLORS = {
+    "Python (PyPI)": "#fe4a49",
+    "JavaScript (NPM)": "#28286e",
+    "Rust (Cargo)": "#74b0ff",
+}
+RETENTION_PERIODS = {3: "3-month", 6: "6-month", 12: "1-year"}
 
-def homepage(df):
-    try:
-        with open("./github-metrics/assets/style.css") as f:
-            st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
-    except:
-        try:
-            with open("../assets/style.css") as f:
-                st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
-        except:
-            with open("assets/style.css") as f:
-                st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
-    st.title("Starknet Star Tracker: GitHub Starknet Developer Insights")
-    st.markdown(
-        """
-        This tool is maintained and created by Omar Espejel ([@espejelomar](https://twitter.com/espejelomar) on Twitter and Telegram). Feel free to contact him for feedback or comments.
-        """
+def month_range_control(key, months, default_start=None):
+    """
+    Range slider over `months`, selecting from `default_start` (or the first
+    month) to the last month by default.
+    """
+    months = list(months)
+    default = months[0]
+    if default_start is not None:
+        default = next(
+            (month for month in months if month >= pd.Timestamp(default_start)),
+            months[0],
+        )
+    return st.select_slider(
+        "Months",
+        options=months,
+        value=(default, months[-1]),
+        format_func=lambda month: month.strftime("%b %Y"),
+        key=f"{key}_months",
     )
 
-    total_developers_df = total_developers_per_month(df)
-    fig_total_developers = px.bar(
-        total_developers_df,
-        x="month_year",
-        y="total_developers",
-        color="classification",
-        title="Total Developers per Month",
-        color_discrete_sequence=["#fe4a49", "#28286e", "#74b0ff"],
+
+def tier_totals(window, value_name):
+    """
+    Monthly values per activity tier (a rollup window) in the long format of
+    total_developers_per_month / total_commits_per_month.
+    """
+    totals = window.rename_axis("month").reset_index()
+    totals = totals.melt(
+        id_vars="month",
+        value_vars=window.columns,
+        var_name="tier",
+        value_name=value_name,
     )
-    fig_total_developers.update_yaxes(rangemode="tozero", title="Number of Developers")
-    fig_total_developers.update_layout(
-        xaxis=dict(
-            categoryorder="array",
-            categoryarray=sorted(
-                total_developers_df["month_year"].unique(),
-                key=lambda x: pd.to_datetime(x, format="%B %Y"),
-            ),
+    # melt stacks the tiers in order, keep that order within each month
+    totals = totals[totals[value_name] > 0].sort_values("month", kind="stable")
+    return pd.DataFrame(
+        {
+            "month_year": totals["month"].dt.strftime("%B %Y"),
+            "classification": totals["tier"].map(tier_labels()),
+            value_name: totals[value_name],
+        }
+    )
+
+
+def tier_descriptions():
+    low, high = get_thresholds()
+    return (
+        f"low-level activity (<{low} commits), moderately active "
+        f"({low}-{high - 1} commits), and highly involved ({high}+ commits)"
+    )
+
+
+def tier_chart_controls(key, rollup, default_start):
+    columns = st.columns([3, 2])
+    with columns[0]:
+        start, end = month_range_control(key, rollup.months, default_start)
+    with columns[1]:
+        tiers = st.multiselect(
+            "Activity tiers",
+            TIERS,
+            default=TIERS,
+            format_func=tier_labels().get,
+            key=f"{key}_tiers",
+        )
+    return start, end, [tier for tier in TIERS if tier in tiers]
+
+
+def developers_by_tier_rollup(df):
+    return MonthlyRollup.from_series("developers_by_tier", TIERS)
+
+
+def commits_by_tier_rollup(df):
+    return MonthlyRollup.from_series("commits_by_tier", TIERS)
+
+
+def total_developers_figure(total_developers_df):
+    with profile_panel("fig_total_developers", rows=len(total_developers_df)):
+        fig_total_developers = px.bar(
+            total_developers_df,
+            x="month_year",
+            y="total_developers",
+            color="classification",
+            title="Total Developers per Month",
+            color_discrete_map={tier_labels()[t]: TIER_COLORS[t] for t in TIERS},
+            category_orders={"classification": [tier_labels()[t] for t in TIERS]},
+        )
+        fig_total_developers.update_yaxes(
+            rangemode="tozero", title="Number of Developers"
+        )
+        fig_total_developers.update_layout(
+            xaxis=dict(
+                categoryorder="array",
+                categoryarray=sorted(
+                    total_developers_df["month_year"].unique(),
+                    key=lambda x: pd.to_datetime(x, format="%B %Y"),
+                ),
+            )
         )
+        fig_total_developers.update_layout(legend_title_text="Classification")
+    return fig_total_developers
+
+
+def render_total_developers(rollup):
+    if len(rollup) == 0:
+        st.info("No closed months yet.")
+        return
+    start, end, tiers = tier_chart_controls("total_developers", rollup, "2023-01-01")
+    total_developers_df = tier_totals(
+        rollup.window(start, end, tiers), "total_developers"
+    )
+    st.plotly_chart(
+        cached_figure("total_developers", total_developers_figure, total_developers_df)
+    )
+    average = rollup.total(start, end, tiers).sum() / rollup.months_between(start, end)
+    st.caption(
+        f"{average:,.0f} active developers per month on average over the selected months."
     )
-    fig_total_developers.update_layout(legend_title_text="Classification")
-    st.plotly_chart(fig_total_developers)
     st.markdown(
         "<p style='font-size: 12px;'><b>Source:</b> Open Source repositories in GitHub</p>",
         unsafe_allow_html=True,
     )
     st.markdown(
-        "<p style='font-size: 12px;'><b>Description:</b> Number of developers active per month by three different groups of developers: those with low-level activity (<10 commits), moderately active (10-19 commits), and highly involved (20+ commits).</p>",
+        f"<p style='font-size: 12px;'><b>Description:</b> Number of developers active per month by three different groups of developers: those with {tier_descriptions()}.</p>",
         unsafe_allow_html=True,
     )
 
-    st.markdown("---")
 
-    total_commits_df = total_commits_per_month(df)
-    fig_total_commits = px.bar(
-        total_commits_df,
-        x="month_year",
-        y="total_commits",
-        color="classification",
-        title="Total Commits per Month",
-        color_discrete_sequence=["#fe4a49", "#28286e", "#74b0ff"],
-    )
-    fig_total_commits.update_yaxes(
-        rangemode="tozero", title="Open Source Repos Commits"
-    )
-    fig_total_commits.update_layout(
-        xaxis=dict(
-            categoryorder="array",
-            categoryarray=sorted(
-                total_commits_df["month_year"].unique(),
-                key=lambda x: pd.to_datetime(x, format="%B %Y"),
-            ),
+def total_commits_figure(total_commits_df):
+    with profile_panel("fig_total_commits", rows=len(total_commits_df)):
+        fig_total_commits = px.bar(
+            total_commits_df,
+            x="month_year",
+            y="total_commits",
+            color="classification",
+            title="Total Commits per Month",
+            color_discrete_map={tier_labels()[t]: TIER_COLORS[t] for t in TIERS},
+            category_orders={"classification": [tier_labels()[t] for t in TIERS]},
+        )
+        fig_total_commits.update_yaxes(
+            rangemode="tozero", title="Open Source Repos Commits"
         )
+        fig_total_commits.update_layout(
+            xaxis=dict(
+                categoryorder="array",
+                categoryarray=sorted(
+                    total_commits_df["month_year"].unique(),
+                    key=lambda x: pd.to_datetime(x, format="%B %Y"),
+                ),
+            )
+        )
+        fig_total_commits.update_layout(legend_title_text="Classification")
+    return fig_total_commits
+
+
+def render_total_commits(rollup):
+    if len(rollup) == 0:
+        st.info("No closed months yet.")
+        return
+    start, end, tiers = tier_chart_controls("total_commits", rollup, "2023-01-01")
+    total_commits_df = tier_totals(rollup.window(start, end, tiers), "total_commits")
+    st.plotly_chart(
+        cached_figure("total_commits", total_commits_figure, total_commits_df)
+    )
+    st.caption(
+        f"{rollup.total(start, end, tiers).sum():,.0f} commits over the selected months."
     )
-    fig_total_commits.update_layout(legend_title_text="Classification")
-    st.plotly_chart(fig_total_commits)
     st.markdown(
         "<p style='font-size: 12px;'><b>Source:</b> Open Source repositories in GitHub</p>",
         unsafe_allow_html=True,
     )
     st.markdown(
-        "<p style='font-size: 12px;'><b>Description:</b> The total number of commits done per month by three different groups of developers: those with low-level activity (<10 commits), moderately active (10-19 commits), and highly involved (20+ commits).</p>",
+        f"<p style='font-size: 12px;'><b>Description:</b> The total number of commits done per month by three different groups of developers: those with {tier_descriptions()}.</p>",
         unsafe_allow_html=True,
     )
 
-    st.markdown("---")
 
-    monthly_active = monthly_active_devs_by_tenure(df)
-    fig_monthly_active = plot_monthly_active_devs_by_tenure(monthly_active)
+def tenure_rollup(df):
+    return MonthlyRollup.from_series("active_by_tenure", TENURE_BUCKETS)
+
+
+def render_monthly_active_devs(rollup):
+    if len(rollup) == 0:
+        st.info("No closed months yet.")
+        return
+    columns = st.columns([3, 2])
+    with columns[0]:
+        start, end = month_range_control(
+            "monthly_active_devs", rollup.months, "2022-01-01"
+        )
+    with columns[1]:
+        buckets = st.multiselect(
+            "Tenure",
+            TENURE_BUCKETS,
+            default=TENURE_BUCKETS,
+            key="monthly_active_devs_tenure",
+        )
+    monthly_active = rollup.window(start, end).rename_axis("month_year").reset_index()
+    fig_monthly_active = cached_figure(
+        "monthly_active_devs",
+        plot_monthly_active_devs_by_tenure,
+        monthly_active,
+        start=start,
+        end=end,
+        buckets=buckets,
+    )
     st.plotly_chart(fig_monthly_active, use_container_width=True)
+    average = rollup.total(start, end, buckets).sum() / rollup.months_between(
+        start, end
+    )
+    st.caption(
+        f"{average:,.0f} active developers per month on average over the selected months."
+    )
     st.markdown(
         "<p style='font-size: 12px;'><b>Source:</b> Open Source repositories in GitHub</p>",
         unsafe_allow_html=True,
     )
     st.markdown(
-        "<p style='font-size: 12px;'><b>Description:</b> Number of active developers per month categorized by their tenure in the project, from 2022 to the most recent data available. Each line represents a different tenure category.</p>",
+        "<p style='font-size: 12px;'><b>Description:</b> Number of active developers per month categorized by their tenure in the project, from 2022 (by default) to the most recent closed month. Each line represents a different tenure category.</p>",
         unsafe_allow_html=True,
     )
 
-    st.markdown("---")
 
-    retention_df = calculate_developer_retention(df)
-    fig_retention = plot_developer_retention(retention_df)
+def retention_series(df):
+    return load_series("retention")
+
+
+def render_developer_retention(retention_df):
+    if retention_df.empty:
+        st.info("No closed months yet.")
+        return
+    columns = st.columns([3, 2])
+    with columns[0]:
+        start, end = month_range_control(
+            "developer_retention",
+            retention_df["month"].drop_duplicates().sort_values(),
+            "2022-01-01",
+        )
+    with columns[1]:
+        periods = st.multiselect(
+            "Periods",
+            list(RETENTION_PERIODS),
+            default=list(RETENTION_PERIODS),
+            format_func=RETENTION_PERIODS.get,
+            key="developer_retention_periods",
+        )
+    fig_retention = cached_figure(
+        "developer_retention",
+        plot_developer_retention,
+        retention_df,
+        start=start,
+        end=end,
+        periods=periods,
+    )
     st.plotly_chart(fig_retention, use_container_width=True)
     st.markdown(
         "<p style='font-size: 12px;'><b>Source:</b> Open Source repositories in GitHub</p>",
@@ -761,10 +909,11 @@ def homepage(df):
     )
     st.markdown(
         """
-    <p style='font-size: 12px;'><b>Description:</b> This graph shows developer retention rates for 3-month, 6-month, and 1-year periods, calculated using all available data but displayed from 2022 onwards. Each data point represents the retention rate for developers who were active in that specific month (the "initial month").</p>
-    
+    <p style='font-size: 12px;'><b>Description:</b> This graph shows developer retention rates for 3-month, 6-month, and 1-year periods, calculated using all available data but displayed from 2022 onwards by default. Each data point represents the retention rate for developers who were active in that specific month (the "initial month").</p>
+
     <p style='font-size: 12px;'>For example, a data point for January 2023 shows the percentage of developers active in January 2023 who met the retention criteria for the subsequent period (3 months, 6 months, or 1 year). Recent months may not have data points due to incomplete retention periods.</p>
-    
+
+
     <p style='font-size: 12px;'>To quote a specific data point: "X% of developers active in [Month Year] were retained over the following [3-month/6-month/1-year] period, meeting the activity and contribution criteria."</p>
     """,
         unsafe_allow_html=True,
@@ -782,10 +931,9 @@ def homepage(df):
         unsafe_allow_html=True,
     )
 
-    st.markdown("---")
 
+def render_classified_developers(classification_df):
     st.subheader("Last Month's Active Developers by Category")
-    classification_df = classify_developers_per_month(df)
     st.dataframe(classification_df)
     st.markdown(
         "<p style='font-size: 12px;'><b>Source:</b> Open Source repositories in GitHub</p>",
@@ -796,79 +944,172 @@ def homepage(df):
         unsafe_allow_html=True,
     )
 
-    st.markdown("---")
 
-    commits_difference_df, prev_month, prev_prev_month = developer_commits_difference(
-        df
+def render_developer_flow(tensor):
+    if len(tensor.months) < 2:
+        st.info("Not enough months of data.")
+        return
+    columns = st.columns([3, 2])
+    with columns[0]:
+        start, end = month_range_control(
+            "developer_flow", tensor.months, tensor.months[-2]
+        )
+    with columns[1]:
+        monthly = st.checkbox("Every month in between", key="developer_flow_monthly")
+    if start == end:
+        st.info("Select two different months.")
+        return
+    if monthly and len(pd.date_range(start, end, freq="MS")) > 13:
+        st.info("Showing every month is limited to a year, comparing the two ends.")
+        monthly = False
+    st.plotly_chart(
+        cached_figure(
+            "developer_flow", developer_flow_figure, tensor, start, end, monthly
+        )
     )
+    st.markdown(
+        "<p style='font-size: 12px;'><b>Source:</b> Open Source repositories in GitHub</p>",
+        unsafe_allow_html=True,
+    )
+    st.markdown(
+        "<p style='font-size: 12px;'><b>Description:</b> The flow of developers between different activity categories (low-level activity, moderately active, highly involved, and not active) from the first to the last selected month, by default the last two months. Developers not active in either month are left out.</p>",
+        unsafe_allow_html=True,
+    )
+
 
-    if not commits_difference_df.empty:
-        st.subheader(f"Developer Commits Difference: {prev_month} vs {prev_prev_month}")
-        st.dataframe(commits_difference_df)
-        st.markdown(
-            "<p style='font-size: 12px;'><b>Source:</b> Open Source repositories in GitHub</p>",
-            unsafe_allow_html=True,
+def render_commits_difference(matrix):
+    months = matrix.months[: matrix.closed_months()]
+    if len(months) < 2:
+        st.info("Not enough complete months of data.")
+        return
+    columns = st.columns(3)
+    with columns[0]:
+        later = st.selectbox(
+            "Month",
+            months[1:][::-1],
+            format_func=lambda month: month.strftime("%B %Y"),
+            key="commits_difference_month",
+        )
+    with columns[1]:
+        # Only windows whose earlier window starts within the data.
+        later_position = matrix.month_position(later)
+        window = st.selectbox(
+            "Compared over",
+            [
+                window
+                for window in [1, 3, 6, 12]
+                if later_position - 2 * window + 1 >= 0
+            ],
+            format_func=lambda window: f"{window} month{'s' if window > 1 else ''}",
+            key="commits_difference_window",
         )
-        st.markdown(
-            "<p style='font-size: 12px;'><b>Description:</b> The difference in the number of commits for each developer compared to the previous month. Negative values indicate fewer commits than the previous month.</p>",
-            unsafe_allow_html=True,
+    with columns[2]:
+        k = st.number_input(
+            "Top movers",
+            min_value=1,
+            max_value=100,
+            value=10,
+            key="commits_difference_k",
         )
+
+    deltas = developer_deltas(matrix, later, window=window)
+    earlier = later - pd.DateOffset(months=window)
+    if window == 1:
+        title = f"{later:%B_%Y} vs {earlier:%B_%Y}"
     else:
-        st.subheader(f"Developer Commits Difference: {prev_month} vs {prev_prev_month}")
+        title = f"{window} months to {later:%B_%Y} vs the {window} months before"
+    st.subheader(f"Developer Commits Difference: {title}")
+    if deltas.empty:
         st.write("No data available for the selected months.")
+        return
 
-    st.markdown("---")
-
-    # developer_flow_plot(df)
-
-    # st.markdown("---")
+    gainers, decliners = top_movers(deltas, k)
+    columns = st.columns(2)
+    for column, movers, caption in [
+        (columns[0], gainers, "Most increased"),
+        (columns[1], decliners, "Most decreased"),
+    ]:
+        with column:
+            st.markdown(f"**{caption}**")
+            st.dataframe(
+                movers[["developer", "commits_difference"]].rename(
+                    columns={"commits_difference": "Difference"}
+                ),
+                hide_index=True,
+            )
+    with st.expander("All developers"):
+        st.dataframe(commits_difference_table(deltas, window))
+    st.markdown(
+        "<p style='font-size: 12px;'><b>Source:</b> Open Source repositories in GitHub</p>",
+        unsafe_allow_html=True,
+    )
+    st.markdown(
+        "<p style='font-size: 12px;'><b>Description:</b> The difference in the number of commits for each developer compared to the previous month (or window of months), by default for the last complete month of the data. Negative values indicate fewer commits than the previous month.</p>",
+        unsafe_allow_html=True,
+    )
 
-    # New code for Starknet package downloads
-    try:
-        csv_path = get_starknet_downloads_csv_path()
-    except FileNotFoundError as e:
-        st.error(f"Error: {str(e)}")
-        return
 
-    downloads_combined = pd.read_csv(csv_path)
+def downloads_rollup(df):
+    get_starknet_downloads_csv_path()
+    return MonthlyRollup.from_series(
+        "downloads", list(DOWNLOAD_COLORS), column="source", value="downloads"
+    )
 
-    # Convert 'month' to datetime for proper sorting
-    downloads_combined["month"] = pd.to_datetime(downloads_combined["month"])
 
-    # Filter out the current month
-    current_month = pd.Timestamp.now().replace(day=1)
-    downloads_combined = downloads_combined[downloads_combined["month"] < current_month]
+def starknet_downloads_figure(downloads_combined):
+    with profile_panel("fig_starknet_downloads", rows=len(downloads_combined)):
+        # Convert 'month' to string format for display
+        downloads_combined["month"] = downloads_combined["month"].dt.strftime("%B %Y")
+
+        # Create a stacked bar chart for combined downloads
+        fig_starknet_downloads = px.bar(
+            downloads_combined,
+            x="month",
+            y="downloads",
+            color="source",
+            title="Monthly Downloads of Starknet Packages",
+            color_discrete_map=DOWNLOAD_COLORS,
+            category_orders={"source": list(DOWNLOAD_COLORS)},
+        )
 
-    # Sort the data by date
-    downloads_combined = downloads_combined.sort_values("month")
+        fig_starknet_downloads.update_layout(
+            xaxis=dict(
+                categoryorder="array",
+                categoryarray=sorted(
+                    downloads_combined["month"].unique(),
+                    key=lambda x: pd.to_datetime(x, format="%B %Y"),
+                ),
+            )
+        )
+        fig_starknet_downloads.update_layout(legend_title_text="Package")
+        fig_starknet_downloads.update_yaxes(title="Downloads")
+    return fig_starknet_downloads
 
-    # Convert 'month' back to string format for display
-    downloads_combined["month"] = downloads_combined["month"].dt.strftime("%B %Y")
 
-    # Create a stacked bar chart for combined downloads
-    fig_starknet_downloads = px.bar(
-        downloads_combined,
-        x="month",
-        y="downloads",
-        color="source",
-        title="Monthly Downloads of Starknet Packages",
-        color_discrete_sequence=["#fe4a49", "#28286e", "#74b0ff"],
+def render_starknet_downloads(rollup):
+    if len(rollup) == 0:
+        st.info("No closed months yet.")
+        return
+    start, end = month_range_control("starknet_downloads", rollup.months)
+    downloads_combined = (
+        rollup.window(start, end)
+        .rename_axis("month")
+        .reset_index()
+        .melt(id_vars="month", var_name="source", value_name="downloads")
     )
+    downloads_combined = downloads_combined[
+        downloads_combined["downloads"] > 0
+    ].sort_values("month", kind="stable")
 
-    fig_starknet_downloads.update_layout(
-        xaxis=dict(
-            categoryorder="array",
-            categoryarray=sorted(
-                downloads_combined["month"].unique(),
-                key=lambda x: pd.to_datetime(x, format="%B %Y"),
-            ),
+    # Display the plot
+    st.plotly_chart(
+        cached_figure(
+            "starknet_downloads", starknet_downloads_figure, downloads_combined
         )
     )
-    fig_starknet_downloads.update_layout(legend_title_text="Package")
-    fig_starknet_downloads.update_yaxes(title="Downloads")
-
-    # Display the plot
-    st.plotly_chart(fig_starknet_downloads)
+    st.caption(
+        f"{rollup.total(start, end).sum():,.0f} downloads over the selected months."
+    )
 
     # Add source and description
     st.markdown(
@@ -884,9 +1125,100 @@ def homepage(df):
         unsafe_allow_html=True,
     )
 
-    st.markdown("---")
 
-    add_starknet_growth_rate_visualization()
+# Most visitors only look at the first two charts; the other panels are computed
+# when their toggle is switched on.
+HOMEPAGE_PANELS = [
+    Panel(
+        "total_developers",
+        "Total Developers per Month",
+        developers_by_tier_rollup,
+        render_total_developers,
+        eager=True,
+    ),
+    Panel(
+        "total_commits",
+        "Total Commits per Month",
+        commits_by_tier_rollup,
+        render_total_commits,
+        eager=True,
+    ),
+    Panel(
+        "monthly_active_devs",
+        "Monthly Active Devs by Tenure",
+        tenure_rollup,
+        render_monthly_active_devs,
+    ),
+    Panel(
+        "developer_retention",
+        "Developer Retention Rate",
+        retention_series,
+        render_developer_retention,
+    ),
+    Panel(
+        "classified_developers",
+        "Last Month's Active Developers by Category",
+        classify_developers_per_month,
+        render_classified_developers,
+    ),
+    Panel(
+        "developer_flow",
+        "Developer Flow Between Categories",
+        get_transition_tensor,
+        render_developer_flow,
+    ),
+    Panel(
+        "commits_difference",
+        "Developer Commits Difference",
+        get_activity_matrix,
+        render_commits_difference,
+    ),
+    Panel(
+        "starknet_downloads",
+        "Monthly Downloads of Starknet Packages",
+        downloads_rollup,
+        render_starknet_downloads,
+    ),
+    Panel(
+        "starknet_growth_rate",
+        "Growth Rate of Starknet Package Downloads",
+        starknet_growth_rate_figure,
+        render_starknet_growth_rate,
+    ),
+]
+
+
+def homepage(df):
+    try:
+        with open("./github-metrics/assets/style.css") as f:
+            st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+    except:
+        try:
+            with open("../assets/style.css") as f:
+                st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+        except:
+            with open("assets/style.css") as f:
+                st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+
+    st.title("Starknet Star Tracker: GitHub Starknet Developer Insights")
+    st.markdown(
+        """
+        This tool is maintained and created by Omar Espejel ([@espejelomar](https://twitter.com/espejelomar) on Twitter and Telegram). Feel free to contact him for feedback or comments.
+        """
+    )
+
+    # Panels read the persisted monthly series, so close the pending months
+    # first (a no-op unless a month ended or the data changed).
+    with profile_panel("close_pending_months"):
+        call(close_pending_months, df)
+
+    render_panels(HOMEPAGE_PANELS, df)
+
+    # The downloads panels report the missing CSV themselves.
+    try:
+        csv_path = get_starknet_downloads_csv_path()
+    except FileNotFoundError:
+        return
 
     try:
         csv_path = get_starknet_downloads_csv_path()
@@ -0,0 +1,324 @@
+"""
+Streaming parser for cohort handle lists.
+
+Cohorts exported from event platforms can hold tens of thousands of rows, with
+extra columns, profile URLs or "@handle" mentions. Handles are read in chunks
+(CSV, TSV, JSON Lines, or a JSON array), normalized with vectorized string
+operations (case, "@", github.com URLs), deduplicated and resolved against the
+developers of the dataset one chunk at a time. Known handles are tracked as a
+boolean mask over the developer index and unknown ones as numpy arrays, so no
+Python list of the raw input is ever built.
+
+Resolution goes through a HandleIndex built once per snapshot: a hash map of
+lowercase developer names for exact matches, and a sparse trigram index that
+suggests the closest names for the handles that are not found (typos,
+suffixes, renamed accounts with a similar name), scored for all of them with
+one sparse matrix product.
+"""
+
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from activity import get_activity_matrix
+from scipy.sparse import csr_matrix
+from termcolor import colored
+from utils import dataset_snapshot
+
+CHUNK_SIZE = 10_000
+# Columns holding the handles in exports with a header row, by preference.
+HANDLE_COLUMNS = [
+    "github",
+    "github_handle",
+    "github_username",
+    "handle",
+    "login",
+    "username",
+]
+UPLOAD_TYPES = ["csv", "tsv", "txt", "json", "jsonl"]
+
+_HANDLE_PATTERN = r"^@?(?:(?:https?://)?(?:www\.)?github\.com/)?@?([^/\s?#,;]+)"
+
+# Suggestions for handles not found: at most DEFAULT_SUGGESTIONS developers
+# per handle, sharing at least MIN_SIMILARITY of their trigrams with it.
+DEFAULT_SUGGESTIONS = 3
+MIN_SIMILARITY = 0.4
+MAX_SUGGESTED_HANDLES = 1000
+
+_index_cache = {}
+_MAX_CACHED_INDEXES = 4
+
+
+def normalize_handles(values):
+    """
+    Lowercase handles of a Series of raw values (profile URLs and "@" mentions
+    included), NaN where there is none.
+    """
+    values = values.astype("string").str.strip()
+    return values.str.extract(_HANDLE_PATTERN, expand=False).str.lower()
+
+
+def _handle_column(columns):
+    names = [str(column).strip().lower() for column in columns]
+    for candidate in HANDLE_COLUMNS:
+        if candidate in names:
+            return names.index(candidate)
+    return None
+
+
+def _frame_handles(frame):
+    """
+    The handle column of a chunk: a known handle column, or the first one.
+    """
+    position = _handle_column(frame.columns)
+    return frame.iloc[:, 0 if position is None else position]
+
+
+def _file_format(uploaded_file):
+    extension = os.path.splitext(getattr(uploaded_file, "name", "") or "")[1].lower()
+    if extension in (".json", ".jsonl", ".ndjson"):
+        return extension[1:]
+    head = uploaded_file.read(1024).lstrip()
+    uploaded_file.seek(0)
+    if head.startswith(b"["):
+        return "json"
+    if head.startswith(b"{"):
+        return "jsonl"
+    return "tsv" if extension == ".tsv" or b"\t" in head.split(b"\n")[0] else "csv"
+
+
+def iter_file_handles(uploaded_file, chunk_size=CHUNK_SIZE):
+    """
+    Raw handle values of an uploaded file, as Series of up to `chunk_size`.
+
+    CSV and TSV files may have a header row naming the handle column (see
+    HANDLE_COLUMNS); without one, the first column is used. JSON Lines is read
+    in chunks too; a JSON array (of handles, or of objects with a handle field)
+    has to be loaded at once.
+    """
+    uploaded_file.seek(0)
+    file_format = _file_format(uploaded_file)
+    text = io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+    try:
+        if file_format == "json":
+            records = json.load(text)
+            for start in range(0, len(records), chunk_size):
+                chunk = records[start : start + chunk_size]
+                if chunk and isinstance(chunk[0], dict):
+                    yield _frame_handles(pd.DataFrame.from_records(chunk))
+                else:
+                    yield pd.Series(chunk, dtype="object")
+        elif file_format in ("jsonl", "ndjson"):
+            for frame in pd.read_json(text, lines=True, chunksize=chunk_size):
+                yield _frame_handles(frame)
+        else:
+            sep = "\t" if file_format == "tsv" else ","
+            first_line = text.readline()
+            text.seek(0)
+            header = _handle_column(first_line.strip().split(sep))
+            for frame in pd.read_csv(
+                text,
+                sep=sep,
+                header=None if header is None else 0,
+                usecols=[0 if header is None else header],
+                dtype=str,
+                chunksize=chunk_size,
+                skip_blank_lines=True,
+                on_bad_lines="skip",
+            ):
+                yield frame.iloc[:, 0]
+    finally:
+        text.detach()
+
+
+def iter_text_handles(input_text, chunk_size=CHUNK_SIZE):
+    """
+    Raw handle values of the text field (separated by commas or new lines).
+    """
+    values = pd.Series((input_text or "").replace("\n", ",").split(","))
+    for start in range(0, len(values), chunk_size):
+        yield values.iloc[start : start + chunk_size]
+
+
+def _trigrams(name):
+    """
+    Distinct trigrams of a name, padded so that its start and end count.
+    """
+    padded = f"  {name} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _trigram_matrix(names, vocabulary, extend=False):
+    """
+    Sparse names x trigrams indicator matrix over `vocabulary` (trigram to
+    column), adding new trigrams to it if `extend`. Trigrams missing from the
+    vocabulary are left out, but still counted in the returned sizes.
+    """
+    rows, columns, sizes = [], [], np.zeros(len(names), dtype=np.int32)
+    for row, name in enumerate(names):
+        grams = _trigrams(name)
+        sizes[row] = len(grams)
+        for gram in grams:
+            column = vocabulary.get(gram)
+            if column is None and extend:
+                column = vocabulary[gram] = len(vocabulary)
+            if column is not None:
+                rows.append(row)
+                columns.append(column)
+    matrix = csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+        shape=(len(names), len(vocabulary)),
+    )
+    return matrix, sizes
+
+
+class HandleIndex:
+    """
+    Developer names of the dataset, indexed for handle resolution: a hash map
+    from lowercase names to matrix rows for exact matches, and a trigram index
+    for suggestions on the handles that are not found.
+    """
+
+    def __init__(self, matrix):
+        self.developers = matrix.developers
+        lowercase = pd.Index(matrix.developers.str.lower())
+        unique = ~lowercase.duplicated()
+        self.lowercase = lowercase[unique]
+        self.positions = np.nonzero(unique)[0]
+        self.vocabulary = {}
+        trigrams, self.trigram_sizes = _trigram_matrix(
+            self.lowercase, self.vocabulary, extend=True
+        )
+        # trigrams x names, so that queries x trigrams products are overlaps
+        self.trigrams = trigrams.T.tocsr()
+
+    def positions_of(self, normalized):
+        """
+        Matrix rows of normalized handles, -1 for unknown ones.
+        """
+        found = self.lowercase.get_indexer(normalized)
+        return np.where(found >= 0, self.positions[found], -1)
+
+    def suggest(self, normalized, k=DEFAULT_SUGGESTIONS, min_similarity=MIN_SIMILARITY):
+        """
+        Up to `k` developers with the most similar names for each normalized
+        handle, by Jaccard similarity of their trigrams. Returns a frame with
+        the handle, the developer name and the similarity, sorted by handle
+        (in input order) and decreasing similarity.
+        """
+        normalized = list(normalized)
+        queries, query_sizes = _trigram_matrix(normalized, self.vocabulary)
+        overlaps = (queries @ self.trigrams).tocoo()
+        rows, columns = overlaps.row, overlaps.col
+        similarity = overlaps.data / (
+            query_sizes[rows] + self.trigram_sizes[columns] - overlaps.data
+        )
+        keep = similarity >= min_similarity
+        rows, columns, similarity = rows[keep], columns[keep], similarity[keep]
+
+        order = np.lexsort((columns, -similarity, rows))
+        rows, columns, similarity = rows[order], columns[order], similarity[order]
+        # Rank of every candidate within its handle's candidates.
+        starts = np.searchsorted(rows, rows)
+        keep = np.arange(len(rows)) - starts < k
+        rows, columns = rows[keep], columns[keep]
+        return pd.DataFrame(
+            {
+                "handle": np.asarray(normalized, dtype=object)[rows],
+                "suggestion": self.developers[self.positions[columns]],
+                "similarity": similarity[keep].round(2),
+            }
+        )
+
+
+def get_handle_index(df):
+    key = dataset_snapshot(df)
+    index = _index_cache.get(key)
+    if index is None:
+        index = HandleIndex(get_activity_matrix(df))
+        if len(_index_cache) >= _MAX_CACHED_INDEXES:
+            _index_cache.pop(next(iter(_index_cache)))
+        _index_cache[key] = index
+    return index
+
+
+class ResolvedHandles:
+    """
+    A cohort resolved against the dataset: `handles` are the developer names as
+    spelled in the dataset, in input order, and `unknown` the normalized
+    handles that are not in it. `n_read` counts the non-empty values read and
+    `n_duplicates` the ones repeating an earlier handle. `suggestions` holds
+    the closest developer names for the unknown handles (see
+    HandleIndex.suggest).
+    """
+
+    def __init__(self, handles, unknown, n_read, n_duplicates, suggestions):
+        self.handles = handles
+        self.unknown = unknown
+        self.n_read = n_read
+        self.n_duplicates = n_duplicates
+        self.suggestions = suggestions
+
+    def summary(self, sample_size=20):
+        summary = (
+            f"{len(self.handles)} of {self.n_read} handles found in the dataset "
+            f"({self.n_duplicates} duplicates skipped)."
+        )
+        if len(self.unknown):
+            sample = ", ".join(self.unknown[:sample_size])
+            more = len(self.unknown) - sample_size
+            summary += f" Not found ({len(self.unknown)}): {sample}"
+            summary += f" and {more} more." if more > 0 else "."
+        return summary
+
+
+def resolve_handles(chunks, index):
+    """
+    Normalize, deduplicate and resolve chunks of raw handle values, with
+    suggestions for the first MAX_SUGGESTED_HANDLES unknown ones.
+    """
+    seen = np.zeros(len(index.developers), dtype=bool)
+    found, unknown = [], []
+    n_read = 0
+    for chunk in chunks:
+        normalized = normalize_handles(chunk).dropna()
+        normalized = normalized[normalized != ""]
+        n_read += len(normalized)
+        positions = index.positions_of(normalized)
+
+        known = positions[positions >= 0]
+        _, first = np.unique(known, return_index=True)
+        known = known[np.sort(first)]
+        known = known[~seen[known]]
+        seen[known] = True
+        found.append(known)
+        unknown.append(normalized[positions < 0].to_numpy(dtype=object))
+
+    found = np.concatenate(found) if found else np.zeros(0, dtype=int)
+    unknown = np.concatenate(unknown) if unknown else np.zeros(0, dtype=object)
+    _, first = np.unique(unknown.astype(str), return_index=True)
+    unknown = unknown[np.sort(first)]
+    return ResolvedHandles(
+        index.developers[found].to_numpy(),
+        unknown,
+        n_read,
+        n_read - len(found) - len(unknown),
+        index.suggest(unknown[:MAX_SUGGESTED_HANDLES]),
+    )
+
+
+def read_handles(input_text, uploaded_file, df):
+    """
+    Cohort of the uploaded file if there is one, else of the text field,
+    resolved against the developers of `df`.
+    """
+    if uploaded_file is not None:
+        print(colored("Reading from uploaded file...", "blue"))
+        chunks = iter_file_handles(uploaded_file)
+    else:
+        chunks = iter_text_handles(input_text)
+    resolved = resolve_handles(chunks, get_handle_index(df))
+    print(colored(resolved.summary(), "blue"))
+    return resolved
@@ -0,0 +1,249 @@
+"""
+Per-panel timing and memory instrumentation.
+
+Wrap each aggregation or figure build in `profile_panel` (or decorate it with
+`profiled`) to record its wall time, CPU time, rows processed and peak
+allocation. Records are grouped per script rerun (`start_run`), written as JSON
+lines to the "github_metrics.instrumentation" logger, shown in a debug sidebar opened
+with `?debug=1`, and served by an optional metrics endpoint.
+
+Peak allocation is measured with tracemalloc, which slows allocation-heavy code
+down, so it is only tracked when STAR_TRACKER_PROFILE_MEMORY=1 or the debug
+sidebar is open. tracemalloc is process-wide: with concurrent sessions the peaks
+are approximate.
+"""
+
+import functools
+import itertools
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import orjson
+import pandas as pd
+import streamlit as st
+
+logger = logging.getLogger("github_metrics.instrumentation")
+
+_runs = deque(maxlen=200)
+_runs_lock = threading.Lock()
+_run_ids = itertools.count(1)
+_local = threading.local()
+_metrics_server = None
+
+
+def memory_tracking_enabled():
+    return os.environ.get("STAR_TRACKER_PROFILE_MEMORY") == "1" or getattr(
+        _local, "track_memory", False
+    )
+
+
+def start_run(page, track_memory=False):
+    """
+    Start collecting records for one rerun of `page` in the current thread.
+    """
+    run = {
+        "run_id": next(_run_ids),
+        "page": page,
+        "started_at": time.time(),
+        "track_memory": track_memory,
+        "records": [],
+    }
+    _local.run = run
+    _local.stack = []
+    _local.track_memory = track_memory
+    with _runs_lock:
+        _runs.append(run)
+    return run
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+def attach_run(run):
+    """
+    Add the records of the current thread (e.g. a pool worker) to `run`, tracing
+    peak memory if the run does.
+    """
+    _local.run = run
+    _local.stack = []
+    _local.track_memory = run is not None and run["track_memory"]
+
+
+@contextmanager
+def profile_panel(name, rows=None):
+    """
+    Record the wall time, CPU time, rows processed and peak allocation of the
+    block. The yielded dict can be updated, e.g. `record["rows"] = len(df)` once
+    the row count is known.
+    """
+    record = {"panel": name, "rows": rows}
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+
+    track_memory = memory_tracking_enabled()
+    if track_memory:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        start_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    frame = {"peak": 0}
+    stack.append(frame)
+
+    start_wall = time.perf_counter()
+    start_cpu = time.thread_time()
+    try:
+        yield record
+    finally:
+        record["wall_time_s"] = time.perf_counter() - start_wall
+        record["cpu_time_s"] = time.thread_time() - start_cpu
+        stack.pop()
+        if track_memory:
+            # Nested blocks reset the peak, so they hand their own up.
+            peak = max(tracemalloc.get_traced_memory()[1], frame["peak"])
+            record["peak_memory_mb"] = (peak - start_memory) / 2**20
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+            elif started_tracing:
+                tracemalloc.stop()
+        record["depth"] = len(stack)
+
+        run = current_run()
+        if run is not None:
+            record["run_id"] = run["run_id"]
+            record["page"] = run["page"]
+            run["records"].append(record)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(orjson.dumps(record).decode("utf-8"))
+
+
+def profiled(name=None, rows=None):
+    """
+    Decorator version of `profile_panel`. `rows` is an optional function of the
+    call's arguments returning the number of rows processed.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_panel(
+                name or func.__name__,
+                rows=rows(*args, **kwargs) if rows is not None else None,
+            ):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def recent_runs():
+    with _runs_lock:
+        return list(_runs)
+
+
+def panel_summary():
+    """
+    Wall time statistics per panel over the recorded runs.
+    """
+    wall_times = {}
+    for run in recent_runs():
+        for record in run["records"]:
+            wall_times.setdefault(record["panel"], []).append(record["wall_time_s"])
+    return {
+        panel: {
+            "count": len(times),
+            "mean_s": float(np.mean(times)),
+            "p50_s": float(np.percentile(times, 50)),
+            "p95_s": float(np.percentile(times, 95)),
+            "max_s": float(np.max(times)),
+        }
+        for panel, times in wall_times.items()
+    }
+
+
+def debug_requested():
+    return st.query_params.get("debug") == "1"
+
+
+def render_debug_sidebar(run=None):
+    """
+    Show the records of the current rerun in the sidebar. Hidden unless the page
+    was opened with `?debug=1`.
+    """
+    if not debug_requested():
+        return
+    run = run or current_run()
+    if run is None:
+        return
+    with st.sidebar.expander("⏱️ Profiling", expanded=True):
+        records = pd.DataFrame(run["records"])
+        if records.empty:
+            st.write("No panels recorded.")
+            return
+        st.caption(
+            f"Run {run['run_id']} ({run['page']}): "
+            f"{records.loc[records['depth'] == 0, 'wall_time_s'].sum():.2f}s"
+        )
+        st.dataframe(
+            records.drop(columns=["run_id", "page"]).sort_values(
+                "wall_time_s", ascending=False
+            ),
+            hide_index=True,
+        )
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") == "/metrics":
+            body = orjson.dumps(
+                {"panels": panel_summary(), "runs": recent_runs()[-20:]},
+                option=orjson.OPT_SERIALIZE_NUMPY,
+            )
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port):
+    """
+    Serve `GET /metrics` (per-panel summary and the latest runs as JSON) from a
+    daemon thread. Only the first call in a process starts the server.
+    """
+    global _metrics_server
+    if _metrics_server is None:
+        _metrics_server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+        threading.Thread(target=_metrics_server.serve_forever, daemon=True).start()
+        logger.info(f"Metrics endpoint listening on port {port}")
+    return _metrics_server
+
+
+def configure_from_env():
+    """
+    STAR_TRACKER_PROFILE_LOG: file receiving the JSON lines of every record.
+    STAR_TRACKER_METRICS_PORT: port of the metrics endpoint.
+    """
+    log_path = os.environ.get("STAR_TRACKER_PROFILE_LOG")
+    if log_path and not logger.handlers:
+        handler = logging.FileHandler(log_path)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    if os.environ.get("STAR_TRACKER_METRICS_PORT"):
+        start_metrics_server(int(os.environ["STAR_TRACKER_METRICS_PORT"]))
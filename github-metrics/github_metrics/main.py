@@ -1,15 +1,32 @@
 # from developer_engagement import developer_engagement_journey
 import plotly
 import streamlit as st
-from general_insights import homepage
-from program_evaluation import program_evaluation
+from compute_service import service_address
+from instrumentation import (
+    configure_from_env,
+    debug_requested,
+    profile_panel,
+    render_debug_sidebar,
+    start_run,
+)
 from utils import load_all_developers_dataset
 
-plotly.io.json.config.default_engine = "orjson"
+
+def configure_plotly():
+    # Accessing plotly.io loads its JSON machinery, which the page modules
+    # import anyway.
+    plotly.io.json.config.default_engine = "orjson"
 
 
 def main():
-    df = load_all_developers_dataset()
+    configure_from_env()
+    run = start_run("startup", track_memory=debug_requested())
+    # With a compute service, the dataset is only loaded by the service.
+    df = None
+    if not service_address():
+        with profile_panel("load_all_developers_dataset") as record:
+            df = load_all_developers_dataset()
+            record["rows"] = len(df)
     # max_available_month = df["month_year"].max().strftime("%Y-%m")
     st.set_page_config(page_title="Starknet Star Tracker")
     st.sidebar.title("Menu")
@@ -28,12 +45,22 @@ def main():
         "With love from [@espejelomar](https://twitter.com/espejelomar) at [Starknet](https://starknet.io)"
     )
 
+    run["page"] = app_mode
+    # Each page imports its modules (and their plotting, statistics and report
+    # libraries) the first time it is opened, instead of at startup.
     if app_mode == "Homepage":
+        from general_insights import homepage
+
+        configure_plotly()
         homepage(df)
     elif app_mode == "Program Evaluation":
+        from program_evaluation import program_evaluation
+
+        configure_plotly()
         program_evaluation()
     # elif app_mode == "Developer Engagement":
     #     developer_engagement_journey(df)
+    render_debug_sidebar(run)
 
 
 if __name__ == "__main__":
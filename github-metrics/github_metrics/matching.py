@@ -0,0 +1,137 @@
+"""
+Nearest-neighbor matched controls for program evaluation.
+
+Comparing a cohort against the whole ecosystem mixes the program's effect with
+how participants differed to begin with (tenure, how much they committed). A
+matched control pairs every participant with the `k` developers outside the
+cohort whose activity before the event month was the most similar, compared
+through fixed-length features:
+
+- log(1 + commits) in each of the MATCH_MONTHS months before the event month,
+- log(1 + months since the first active month), 0 if not active yet.
+
+The features of every developer with commits in the data and a KD-tree over
+them are built once per snapshot and event month, so matching a cohort is a
+batch of tree queries (matching is with replacement: a developer can be the
+neighbor of several participants).
+"""
+
+import numpy as np
+from activity import get_activity_matrix
+from utils import dataset_snapshot
+
+MATCH_MONTHS = 6
+DEFAULT_NEIGHBORS = 3
+
+_index_cache = {}
+_MAX_CACHED_INDEXES = 16
+
+
+def activity_features(matrix, positions, event_position, months=MATCH_MONTHS):
+    """
+    Matching features of the given developers for an event at the matrix
+    column `event_position`.
+    """
+    start = max(event_position - months, 0)
+    commits = np.zeros((len(positions), months))
+    commits[:, months - (event_position - start) :] = matrix.commits[
+        positions, start:event_position
+    ]
+    first_active = matrix.first_active[positions]
+    tenure = np.where(
+        (first_active >= 0) & (first_active < event_position),
+        event_position - first_active,
+        0,
+    )
+    return np.column_stack([np.log1p(commits), np.log1p(tenure)])
+
+
+class MatchingIndex:
+    """
+    KD-tree over the matching features of every developer with commits.
+    """
+
+    def __init__(self, matrix, event_position):
+        self.matrix = matrix
+        self.event_position = event_position
+        self.positions = np.nonzero(matrix.first_active >= 0)[0]
+        self.features = activity_features(matrix, self.positions, event_position)
+        # Imported here: scipy.spatial is slow to import and only needed once
+        # a cohort is matched.
+        from scipy.spatial import cKDTree
+
+        self.tree = cKDTree(self.features)
+
+    def match(self, cohort_positions, k=DEFAULT_NEIGHBORS, eligible=None):
+        """
+        Matrix positions of the `k` nearest developers outside the cohort for
+        every participant (participants x k), and their feature distances.
+        `eligible` (a boolean mask over the matrix rows) restricts the
+        candidates, e.g. to the developers passing the same filter as the
+        cohort.
+        """
+        cohort_positions = np.unique(cohort_positions)
+        excluded = np.isin(self.positions, cohort_positions)
+        if eligible is not None:
+            excluded |= ~eligible[self.positions]
+        k = min(k, len(self.positions) - excluded.sum())
+        if len(cohort_positions) == 0 or k <= 0:
+            return np.zeros((len(cohort_positions), 0), dtype=int), np.zeros(
+                (len(cohort_positions), 0)
+            )
+
+        features = activity_features(self.matrix, cohort_positions, self.event_position)
+        matches = np.zeros((len(features), k), dtype=int)
+        distances = np.zeros((len(features), k))
+        pending = np.arange(len(features))
+        n_neighbors = k + 1
+        while len(pending):
+            # Ask for a few extra neighbors, as participants (or ineligible
+            # developers) can be the nearest neighbors; rows short of k after
+            # dropping them are queried again with twice as many.
+            n_neighbors = min(2 * n_neighbors, len(self.positions))
+            found, rows = self.tree.query(features[pending], k=n_neighbors)
+            found = found.reshape(len(pending), -1)
+            rows = rows.reshape(len(pending), -1)
+            keep = ~excluded[rows]
+            complete = (keep.sum(axis=1) >= k) | (n_neighbors == len(self.positions))
+            # First k eligible neighbors outside the cohort, in distance order.
+            selected = np.argsort(~keep[complete], axis=1, kind="stable")[:, :k]
+            matches[pending[complete]] = self.positions[
+                np.take_along_axis(rows[complete], selected, axis=1)
+            ]
+            distances[pending[complete]] = np.take_along_axis(
+                found[complete], selected, axis=1
+            )
+            pending = pending[~complete]
+        return matches, distances
+
+
+def get_matching_index(df, event_date):
+    """
+    Matching index for an event at `event_date` (its month is the first one
+    starting on or after it), cached per snapshot and event month.
+    """
+    matrix = get_activity_matrix(df)
+    event_position = matrix.month_position(event_date)
+    key = (dataset_snapshot(df), event_position)
+    index = _index_cache.get(key)
+    if index is None:
+        index = MatchingIndex(matrix, event_position)
+        if len(_index_cache) >= _MAX_CACHED_INDEXES:
+            _index_cache.pop(next(iter(_index_cache)))
+        _index_cache[key] = index
+    return index
+
+
+def matched_control(df, github_handles, event_date, k=DEFAULT_NEIGHBORS, eligible=None):
+    """
+    Matrix positions of the matched control of a cohort, one entry per match
+    (repeated when a developer is matched to several participants), among the
+    `eligible` developers when given.
+    """
+    index = get_matching_index(df, event_date)
+    matches, _ = index.match(
+        index.matrix.developer_positions(github_handles), k, eligible
+    )
+    return matches.ravel()
@@ -0,0 +1,386 @@
+"""
+Month-close pipeline for the homepage time series.
+
+Instead of recomputing the whole history on every rerun just to leave out the
+current month, each month is finalized once: closing a month adds its rows to
+the persisted series under data/metrics (totals and developers per activity
+tier, active developers per tenure bucket, retention, growth rates and package
+downloads), and closed months are never recomputed. Closing a month only reads
+that month's column of the activity matrix (the 12 months before it for
+retention, and the first-active index of the matrix for tenure), so adding a
+month of data costs O(one month), not O(history).
+
+A month is closed once the calendar has moved past it and the source has data
+for a later month, so a month is not frozen from an export taken while it was
+still running. The homepage closes pending months when it loads; the job can
+also be run on its own, from the github-metrics directory:
+
+    python github_metrics/month_close.py
+    python github_metrics/month_close.py --rebuild
+
+--rebuild drops the series and closes every month again (e.g. after a corrected
+export). The series of each definition version and activity tier thresholds
+(see classifier.py) are kept in their own subdirectory, so that changing the
+thresholds starts new series instead of overwriting the others.
+STAR_TRACKER_METRICS_DIR overrides the location of the series.
+
+Several processes (app replicas, report export workers, compute service
+workers) may close months in the same directory: closing is serialized with a
+lock file, each series and the manifest are replaced whole, and a month closed
+twice (e.g. after a crash between writing a series and the manifest) is only
+kept once.
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from activity import get_activity_matrix
+from classifier import TIERS, classify, get_thresholds
+from termcolor import colored
+from utils import (
+    get_dataset_path,
+    get_starknet_downloads_csv_path,
+    load_all_developers_dataset,
+)
+
+TENURE_BUCKETS = ["0-1y", "1y-2y", "2y+"]
+# Months since the first active month, up to which each bucket goes.
+TENURE_THRESHOLDS = [12, 24]
+# Active months, total commits and average monthly commits required over the
+# period, as in general_insights.is_developer_retained.
+RETENTION_CRITERIA = {3: (2, 3, 1), 6: (4, 6, 1), 12: (8, 15, 1.25)}
+
+SERIES = {
+    "commits_by_tier": ["month", *TIERS],
+    "developers_by_tier": ["month", *TIERS],
+    "active_by_tenure": ["month", *TENURE_BUCKETS],
+    "retention": ["month", "period", "retention_rate", "active_devs", "retained_devs"],
+    "growth": ["month", "tier", "commits_growth", "developers_growth"],
+    "downloads": ["month", "source", "downloads"],
+}
+# Columns identifying a row of each series.
+SERIES_KEYS = {
+    "commits_by_tier": ["month"],
+    "developers_by_tier": ["month"],
+    "active_by_tenure": ["month"],
+    "retention": ["month", "period"],
+    "growth": ["month", "tier"],
+    "downloads": ["month", "source"],
+}
+
+# Bumped when a series changes definition, to close the series again.
+SERIES_VERSION = 2
+
+_lock = threading.Lock()
+_up_to_date = set()
+
+
+def get_metrics_dir():
+    if os.environ.get("STAR_TRACKER_METRICS_DIR"):
+        return os.environ["STAR_TRACKER_METRICS_DIR"]
+    return os.path.join(os.path.dirname(get_dataset_path()), "..", "metrics")
+
+
+def get_series_dir(metrics_dir=None):
+    """
+    Directory of the series closed with the current definitions and tier
+    thresholds, under `metrics_dir`.
+    """
+    thresholds = "-".join(str(threshold) for threshold in get_thresholds())
+    return os.path.join(
+        metrics_dir or get_metrics_dir(), f"v{SERIES_VERSION}-tiers-{thresholds}"
+    )
+
+
+def _deduplicate(series, name):
+    # The last closing of a month wins.
+    return series.drop_duplicates(SERIES_KEYS[name], keep="last")
+
+
+def tenure_buckets(tenure_months):
+    """
+    Position in TENURE_BUCKETS of tenures given in months since the first
+    active month.
+    """
+    return np.searchsorted(TENURE_THRESHOLDS, tenure_months, side="left")
+
+
+def tenure_counts(tenure_months):
+    return np.bincount(tenure_buckets(tenure_months), minlength=len(TENURE_BUCKETS))
+
+
+def _month_label(timestamp):
+    return pd.Timestamp(timestamp).strftime("%Y-%m")
+
+
+class MonthClose:
+    """
+    Persisted series and the state needed to close the next month: the manifest
+    of the last closed months and the last closed tier totals (for growth
+    rates).
+    """
+
+    def __init__(self, series_dir):
+        self.series_dir = series_dir
+        self.thresholds = list(get_thresholds())
+        self.manifest_path = os.path.join(series_dir, "manifest.json")
+        self.manifest = {
+            "commits_closed_through": None,
+            "downloads_closed_through": None,
+            "tier_thresholds": self.thresholds,
+            "version": SERIES_VERSION,
+        }
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest.update(json.load(f))
+        os.makedirs(series_dir, exist_ok=True)
+        self.rows = {name: [] for name in SERIES}
+
+    def series_path(self, name):
+        return os.path.join(self.series_dir, f"{name}.csv")
+
+    def _last_totals(self):
+        """
+        Month and tier totals of the last closed month, for growth rates.
+        """
+        closed_through = self.manifest["commits_closed_through"]
+        if closed_through is None:
+            return None
+        totals = []
+        for name in ["commits_by_tier", "developers_by_tier"]:
+            path = self.series_path(name)
+            if not os.path.exists(path):
+                return None
+            series = pd.read_csv(path)
+            # Rows of later months may be left by a save interrupted before
+            # its manifest was written.
+            last = series[series["month"] == closed_through].iloc[-1:]
+            if last.empty:
+                return None
+            totals.append(last[TIERS].to_numpy(dtype=float)[0])
+        return pd.Timestamp(closed_through), totals[0], totals[1]
+
+    def close_commits_months(self, matrix):
+        """
+        Close every closable month of the matrix after the last closed one.
+        Returns the number of months closed.
+        """
+        closed_through = self.manifest["commits_closed_through"]
+        start = (
+            0
+            if closed_through is None
+            else matrix.month_position(
+                pd.Timestamp(closed_through) + pd.DateOffset(months=1)
+            )
+        )
+        end = matrix.closed_months()
+        if start >= end:
+            return 0
+
+        last_totals = self._last_totals()
+        for column in range(start, end):
+            last_totals = self._close_commits_month(matrix, column, last_totals)
+        self.manifest["commits_closed_through"] = _month_label(matrix.months[end - 1])
+        return end - start
+
+    def _close_commits_month(self, matrix, column, last_totals):
+        month = matrix.months[column]
+        label = _month_label(month)
+        commits = matrix.commits[:, column]
+        active = commits > 0
+        tiers = classify(commits, self.thresholds)
+
+        commits_by_tier = np.bincount(tiers, weights=commits, minlength=len(TIERS))
+        developers_by_tier = np.bincount(tiers[active], minlength=len(TIERS))
+        self.rows["commits_by_tier"].append([label, *commits_by_tier.astype(int)])
+        self.rows["developers_by_tier"].append([label, *developers_by_tier])
+
+        self.rows["active_by_tenure"].append(
+            [label, *tenure_counts(column - matrix.first_active[active])]
+        )
+
+        # Retention periods ending with this month are now complete.
+        for period, (min_active, min_total, min_average) in RETENTION_CRITERIA.items():
+            initial = column - period
+            if initial < 0 or not matrix.present[:, initial].any():
+                continue
+            cohort = matrix.commits[:, initial] > 0
+            window = matrix.commits[cohort, initial + 1 : column + 1]
+            total = window.sum(axis=1)
+            retained = int(
+                (
+                    ((window > 0).sum(axis=1) >= min_active)
+                    & (total >= min_total)
+                    & (total / period >= min_average)
+                ).sum()
+            )
+            active_devs = int(cohort.sum())
+            self.rows["retention"].append(
+                [
+                    _month_label(matrix.months[initial]),
+                    period,
+                    retained / active_devs if active_devs > 0 else 0,
+                    active_devs,
+                    retained,
+                ]
+            )
+
+        # Month-over-month growth within a calendar year, per tier.
+        if (
+            last_totals is not None
+            and last_totals[0] == month - pd.DateOffset(months=1)
+            and last_totals[0].year == month.year
+        ):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                commits_growth = commits_by_tier / last_totals[1] - 1
+                developers_growth = developers_by_tier / last_totals[2] - 1
+        else:
+            commits_growth = developers_growth = np.full(len(TIERS), np.nan)
+        for tier, commit_rate, developer_rate in zip(
+            TIERS, commits_growth, developers_growth
+        ):
+            self.rows["growth"].append([label, tier, commit_rate, developer_rate])
+
+        return month, commits_by_tier, developers_by_tier
+
+    def close_downloads_months(self, downloads):
+        """
+        Close the months of the downloads export, with the same rule as commits.
+        """
+        current_month = pd.Timestamp.now().strftime("%Y-%m")
+        months = np.sort(downloads["month"].unique())
+        closable = months[:-1][months[:-1] < current_month]
+        closed_through = self.manifest["downloads_closed_through"]
+        if closed_through is not None:
+            closable = closable[closable > closed_through]
+        if len(closable) == 0:
+            return 0
+
+        closing = downloads[downloads["month"].isin(closable)]
+        closing = closing.sort_values("month", kind="stable")
+        self.rows["downloads"].extend(
+            closing[["month", "source", "downloads"]].itertuples(index=False)
+        )
+        self.manifest["downloads_closed_through"] = closable[-1]
+        return len(closable)
+
+    def save(self):
+        """
+        Add the rows of the months closed since the last save to the series,
+        then record them as closed. Files are written aside and swapped in, so
+        that readers never see a partial series.
+        """
+        for name, rows in self.rows.items():
+            if rows:
+                path = self.series_path(name)
+                series = pd.DataFrame(rows, columns=SERIES[name])
+                if os.path.exists(path):
+                    series = pd.concat(
+                        [pd.read_csv(path), series.astype({"month": str})],
+                        ignore_index=True,
+                    )
+                temporary_path = f"{path}.tmp"
+                _deduplicate(series, name).to_csv(temporary_path, index=False)
+                os.replace(temporary_path, path)
+                rows.clear()
+
+        temporary_path = f"{self.manifest_path}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(temporary_path, self.manifest_path)
+
+
+def _locked(series_dir):
+    """
+    Open lock file of `series_dir`, held exclusively until closed.
+    """
+    os.makedirs(series_dir, exist_ok=True)
+    lock_file = open(os.path.join(series_dir, ".lock"), "w")
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    return lock_file
+
+
+def close_pending_months(df, metrics_dir=None):
+    """
+    Close the months of `df` and of the downloads export that are not closed yet.
+    Cheap when everything is already closed. Returns the number of commit and
+    download months closed.
+    """
+    series_dir = get_series_dir(metrics_dir)
+    current_month = pd.Timestamp.now().strftime("%Y-%m")
+    key = (
+        os.path.abspath(series_dir),
+        str(df["month_year"].max()),
+        current_month,
+        get_thresholds(),
+    )
+    if key in _up_to_date:
+        return 0, 0
+
+    with _lock, _locked(series_dir):
+        pipeline = MonthClose(series_dir)
+        commit_months = pipeline.close_commits_months(get_activity_matrix(df))
+        try:
+            downloads = pd.read_csv(get_starknet_downloads_csv_path())
+            download_months = pipeline.close_downloads_months(downloads)
+        except FileNotFoundError:
+            download_months = 0
+        pipeline.save()
+
+    if commit_months or download_months:
+        print(
+            colored(
+                f"Closed {commit_months} commit and {download_months} download months",
+                "green",
+            )
+        )
+    _up_to_date.add(key)
+    return commit_months, download_months
+
+
+def load_series(name, metrics_dir=None):
+    """
+    Persisted series `name` (see SERIES), with `month` as datetime.
+    """
+    path = os.path.join(get_series_dir(metrics_dir), f"{name}.csv")
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=SERIES[name])
+    series = _deduplicate(pd.read_csv(path), name)
+    series["month"] = pd.to_datetime(series["month"], format="%Y-%m")
+    return series
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Close the pending months.")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Drop the series and close every month"
+    )
+    args = parser.parse_args()
+
+    metrics_dir = get_metrics_dir()
+    series_dir = get_series_dir(metrics_dir)
+    if args.rebuild and os.path.exists(series_dir):
+        print(colored(f"Removing {series_dir}...", "yellow"))
+        with _locked(series_dir):
+            for name in os.listdir(series_dir):
+                if name != ".lock":
+                    os.remove(os.path.join(series_dir, name))
+    commit_months, download_months = close_pending_months(
+        load_all_developers_dataset(), metrics_dir
+    )
+    print(
+        colored(
+            f"{commit_months} commit and {download_months} download months closed "
+            f"in {series_dir}",
+            "blue",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
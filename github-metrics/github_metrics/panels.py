@@ -0,0 +1,157 @@
+"""
+Lazily computed dashboard panels.
+
+A page declares its panels as a list of `Panel`s: a `compute(df)` function
+producing the panel's data and a `render(data)` function drawing it. Eager panels
+are drawn on every rerun; the others sit behind a toggle and are only computed
+once it is switched on. The panels of a rerun are computed concurrently as one
+TaskGraph over the shared, read-only dataset, and their results are cached per
+dataset snapshot, so a slow panel never holds back a fast one and a panel
+switched off and on again is not recomputed.
+
+Panels run on a thread pool by default. Aggregations that hold the GIL (e.g. the
+retention loop) only run in parallel on a process pool: set
+STAR_TRACKER_PANEL_PROCESSES to the number of worker processes. Each worker then
+receives the dataset once, when the pool is created for a snapshot, and panels
+must be module-level functions. Profiling records of panels computed in worker
+processes are not collected.
+
+With a compute service configured (see compute_service), panels are computed by
+the service on its own dataset, and the pages pass None for `df`.
+"""
+
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import streamlit as st
+from compute_service import call, service_address
+from instrumentation import attach_run, current_run
+from taskgraph import TaskGraph
+from termcolor import colored
+from utils import dataset_snapshot
+
+_thread_pool = ThreadPoolExecutor(
+    max_workers=min(8, os.cpu_count() or 1), thread_name_prefix="panel"
+)
+_process_pool = None
+_process_pool_snapshot = None
+_worker_df = None
+_futures = {}
+_MAX_CACHED_RESULTS = 64
+
+
+class Panel:
+    def __init__(self, key, title, compute, render, eager=False):
+        self.key = key
+        self.title = title
+        self.compute = compute
+        self.render = render
+        self.eager = eager
+
+
+def _compute_in_thread(compute, run, df):
+    attach_run(run)
+    return compute(df)
+
+
+def _init_worker(df):
+    global _worker_df
+    _worker_df = df
+
+
+def _compute_in_worker(compute):
+    return compute(_worker_df)
+
+
+def _get_process_pool(df, snapshot):
+    """
+    Process pool whose workers hold `df`, recreated when the snapshot changes.
+    """
+    global _process_pool, _process_pool_snapshot
+    if _process_pool is None or _process_pool_snapshot != snapshot:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+        print(colored("Starting panel worker processes...", "blue"))
+        # Streamlit serves sessions from threads, which makes forking unsafe.
+        _process_pool = ProcessPoolExecutor(
+            max_workers=int(os.environ["STAR_TRACKER_PANEL_PROCESSES"]),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(df,),
+        )
+        _process_pool_snapshot = snapshot
+    return _process_pool
+
+
+def submit_panels(panels, df):
+    """
+    Futures holding the data of `panels`, by panel key. Panels that are not
+    already computed or running for this snapshot are started together as one
+    TaskGraph; failed computations are retried on the next call.
+    """
+    use_service = service_address() is not None
+    snapshot = call(dataset_snapshot, df)
+    # Several panels leave out the current month, so results expire with it.
+    month = pd.Timestamp.now().strftime("%Y-%m")
+    use_processes = not use_service and bool(
+        os.environ.get("STAR_TRACKER_PANEL_PROCESSES")
+    )
+
+    futures, graph = {}, TaskGraph()
+    for panel in panels:
+        future = _futures.get((panel.key, snapshot, month))
+        if future is None or (future.done() and future.exception() is not None):
+            if use_service:
+                graph.add(panel.key, functools.partial(call, panel.compute))
+            elif use_processes:
+                graph.add(
+                    panel.key, functools.partial(_compute_in_worker, panel.compute)
+                )
+            else:
+                graph.add(
+                    panel.key,
+                    functools.partial(_compute_in_thread, panel.compute, current_run()),
+                )
+        else:
+            futures[panel.key] = future
+
+    if len(graph):
+        if use_processes:
+            started = graph.submit(_get_process_pool(df, snapshot))
+        else:
+            started = graph.submit(_thread_pool, df)
+        for key, future in started.items():
+            if len(_futures) >= _MAX_CACHED_RESULTS:
+                _futures.pop(next(iter(_futures)))
+            _futures[(key, snapshot, month)] = future
+        futures.update(started)
+    return futures
+
+
+def render_panels(panels, df):
+    """
+    Draw `panels` in order. Eager panels and the lazy panels the user switched on
+    are computed concurrently; each one is drawn in its slot as soon as its data
+    is ready.
+    """
+    slots = {}
+    for panel in panels:
+        if panel.eager or st.toggle(f"Show {panel.title}", key=f"panel_{panel.key}"):
+            slots[panel.key] = st.empty()
+            slots[panel.key].info(f"Computing {panel.title}...")
+        st.markdown("---")
+
+    shown = [panel for panel in panels if panel.key in slots]
+    futures = submit_panels(shown, df)
+    by_future = {futures[panel.key]: panel for panel in shown}
+    for future in as_completed(by_future):
+        panel = by_future[future]
+        with slots[panel.key].container():
+            try:
+                panel.render(future.result())
+            except Exception as e:
+                print(colored(f"Error in panel {panel.key}: {e}", "red"))
+                st.error(f"Error: {str(e)}")
@@ -1,50 +1,77 @@
 from io import BytesIO
 
+import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
-from pptx import Presentation
-from pptx.util import Inches
-from scipy.stats import mannwhitneyu
+from activity import get_activity_matrix
+from baseline import get_ecosystem_baseline
+from chart_summaries import (
+    MAX_INDIVIDUAL_LINES,
+    box_statistics,
+    percentile_bands,
+)
+from classifier import TIERS, classify_labels, get_thresholds, tier_labels
+from compute_service import call, service_address
+from event_study import DEFAULT_PRE_MONTHS, active_before, event_study
+from handles import UPLOAD_TYPES, read_handles
+from instrumentation import profile_panel, profiled
+from matching import DEFAULT_NEIGHBORS, matched_control
+from rank_stats import bootstrap_effect_ci, mannwhitneyu_against, mannwhitneyu_test
+from sensitivity import sweep_around
+from storage import tracked_rows
 from termcolor import colored
 from utils import load_all_developers_dataset
 
 
-def process_input(input_text, uploaded_file, program_end_date=None, event_name=None):
+@profiled()
+def process_input(
+    input_text,
+    uploaded_file,
+    program_end_date=None,
+    event_name=None,
+    df=None,
+    matched=False,
+    highlighted_input=None,
+    figures=True,
+):
+    """
+    Results of a program evaluation. With `figures` off (e.g. for the API),
+    the charts are not built, the figures are None and no debug.csv is written.
+    """
+    resolved = None
     try:
         print(colored("Processing input...", "blue"))
-        if uploaded_file is not None:
-            print(colored("Reading from uploaded file...", "blue"))
-            file_content = uploaded_file.read().decode("utf-8")
-            github_handles = [
-                handle.strip() for handle in file_content.split("\n") if handle.strip()
-            ]
-        else:
-            github_handles = [handle.strip() for handle in input_text.split(",")]
-            print(colored(f"GitHub handles: {github_handles}", "blue"))
+        if df is None:
+            df = load_all_developers_dataset()
+
+        resolved = read_handles(input_text, uploaded_file, df)
+        github_handles = list(resolved.handles)
 
         if program_end_date == "":
             program_end_date = None
 
-        df = load_all_developers_dataset()
-
         print(colored("Filtering dataset...", "blue"))
         one_year_ago = pd.Timestamp.now() - pd.DateOffset(years=1)
-        filtered_df = df[
-            (df["developer"].isin(github_handles)) & (df["month_year"] >= one_year_ago)
-        ]
+        filtered_df = tracked_rows(df, github_handles, one_year_ago)
         filtered_df = filtered_df.sort_values(by=["developer", "month_year"])
         filtered_df.loc[:, "month_year"] = pd.to_datetime(filtered_df["month_year"])
-        line_fig = create_line_plot(filtered_df, github_handles, program_end_date)
+        line_fig = box_fig = None
+        if figures:
+            highlighted = None
+            if highlighted_input:
+                highlighted = list(read_handles(highlighted_input, None, df).handles)
+            line_fig = create_line_plot(
+                filtered_df, github_handles, program_end_date, highlighted=highlighted
+            )
 
-        # Debug
-        # print(colored("Debugging filtered dataset and github handles...", "blue"))
-        # print(filtered_df.head(100))
-        # print(filtered_df["developer"].unique())
-        # print(github_handles)
-        filtered_df.to_csv("debug.csv", index=False)
-        # Debug
+            # Debug
+            # print(colored("Debugging filtered dataset and github handles...", "blue"))
+            # print(filtered_df.head(100))
+            # print(filtered_df["developer"].unique())
+            # print(github_handles)
+            filtered_df.to_csv("debug.csv", index=False)
+            # Debug
 
         analysis_result = perform_statistical_analysis(
             filtered_df, github_handles, program_end_date
@@ -56,31 +83,42 @@ def process_input(input_text, uploaded_file, program_end_date=None, event_name=N
 
         last_3_months = pd.Timestamp.now() - pd.DateOffset(months=3)
         recent_activity_user = filtered_df[filtered_df["month_year"] >= last_3_months]
-        all_devs_df = load_all_developers_dataset()
-        all_devs_filtered_df = all_devs_df[(all_devs_df["month_year"] >= last_3_months)]
-        other_devs_recent_activity = all_devs_filtered_df[
-            ~all_devs_filtered_df["developer"].isin(github_handles)
-        ]
-
         user_specified_active = recent_activity_user[
             recent_activity_user["total_commits"] > 0
         ]
-        other_developers_active = other_devs_recent_activity[
-            other_devs_recent_activity["total_commits"] > 0
-        ]
+        with profile_panel("get_ecosystem_baseline"):
+            baseline = get_ecosystem_baseline(df, last_3_months)
 
-        box_fig = create_box_plot(user_specified_active, other_developers_active)
+        if figures:
+            box_fig = create_box_plot(
+                user_specified_active, baseline.other_active_commits(github_handles)
+            )
 
         print(colored("Classifying developers...", "blue"))
         classification_df = classify_developers(github_handles, recent_activity_user)
         print(colored("Classification completed.", "blue"))
 
+        control = None
+        if matched:
+            # The comparisons only keep the participants active in the last 3
+            # months: they are matched among the developers active then too.
+            compared = baseline.matrix.developers[
+                baseline.cohort_active(github_handles)
+            ]
+            with profile_panel("matched_control"):
+                control = matched_control(
+                    df,
+                    compared,
+                    program_end_date or last_3_months,
+                    eligible=baseline.active,
+                )
+
         comparison_result = compare_user_developers_to_others(
-            user_specified_active, other_developers_active, df, program_end_date
+            github_handles, baseline, program_end_date, control=control
         )
 
         growth_rate_result = compare_growth_rate(
-            user_specified_active, other_developers_active, df
+            github_handles, baseline, control=control
         )
 
         tldr_summary = generate_tldr_summary(
@@ -102,6 +140,7 @@ def process_input(input_text, uploaded_file, program_end_date=None, event_name=N
             comparison_result,
             growth_rate_result,
             tldr_summary,
+            resolved,
         )
     except Exception as e:
         print(colored(f"Error processing input: {e}", "red"))
@@ -114,10 +153,111 @@ def process_input(input_text, uploaded_file, program_end_date=None, event_name=N
             None,
             None,
             "Error in processing input. Check logs for more details on the error",
+            resolved,
+        )
+
+
+def evaluate(
+    df,
+    input_text,
+    uploaded_file,
+    program_end_date,
+    event_name,
+    matched,
+    highlighted_input=None,
+    figures=True,
+):
+    """
+    Results of process_input, and the resolved handles of the cohort apart.
+    """
+    *results, resolved = process_input(
+        input_text,
+        uploaded_file,
+        program_end_date,
+        event_name,
+        df=df,
+        matched=matched,
+        highlighted_input=highlighted_input,
+        figures=figures,
+    )
+    if resolved is None:
+        raise RuntimeError("The handles could not be read. Check logs for details.")
+    return tuple(results), resolved
+
+
+def sweep_end_dates(df, github_handles, program_end_date):
+    return sweep_around(get_activity_matrix(df), github_handles, program_end_date)
+
+
+def program_event_study(df, github_handles, program_end_date, matched):
+    control = None
+    if matched:
+        # Matched among the developers the study keeps: active before the event.
+        matrix = get_activity_matrix(df)
+        pre_event = active_before(matrix, matrix.month_position(program_end_date))
+        positions = matrix.developer_positions(github_handles)
+        control = matched_control(
+            df,
+            matrix.developers[positions[pre_event[positions]]],
+            program_end_date,
+            eligible=pre_event,
         )
+    return event_study(df, github_handles, program_end_date, control_positions=control)
+
 
+def latest_month(df):
+    return df["month_year"].max().strftime("%Y-%m")
 
-def create_line_plot(filtered_df, github_handles, program_end_date):
+
+def evaluation_summary(df, input_text, program_end_date, event_name, matched):
+    """
+    Results of process_input as plain data (without the figures), for the API.
+    """
+    (
+        _,
+        _,
+        classification_df,
+        analysis_result,
+        new_developers_count,
+        comparison_result,
+        growth_rate_result,
+        tldr_summary,
+    ), resolved = evaluate(
+        df, input_text, None, program_end_date, event_name, matched, figures=False
+    )
+    if classification_df is None:
+        raise RuntimeError(new_developers_count)
+    return {
+        "handles": list(resolved.handles),
+        "not_found": list(resolved.unknown),
+        "suggestions": resolved.suggestions.to_dict("records"),
+        "program_end_date": program_end_date,
+        "event_name": event_name,
+        "matched": matched,
+        "classification": classification_df.astype(str).to_dict("records"),
+        "statistical_analysis": analysis_result,
+        "new_developers": new_developers_count,
+        "comparison": comparison_result,
+        "growth_rate": growth_rate_result,
+        "summary": tldr_summary,
+    }
+
+
+@profiled(rows=lambda filtered_df, *args, **kwargs: len(filtered_df))
+def create_line_plot(filtered_df, github_handles, program_end_date, highlighted=None):
+    if len(github_handles) > MAX_INDIVIDUAL_LINES:
+        line_fig = create_band_plot(filtered_df, github_handles, highlighted)
+    else:
+        line_fig = create_developer_lines_plot(filtered_df, github_handles)
+    if program_end_date:
+        program_end_date = pd.to_datetime(program_end_date)
+        line_fig.add_vline(
+            x=program_end_date, line_width=2, line_dash="dash", line_color="red"
+        )
+    return line_fig
+
+
+def create_developer_lines_plot(filtered_df, github_handles):
     plot_df = filtered_df.copy()
     missing_developers = set(github_handles) - set(plot_df["developer"].unique())
     for developer in missing_developers:
@@ -130,10 +270,14 @@ def create_line_plot(filtered_df, github_handles, program_end_date):
         )
         plot_df = pd.concat([plot_df, new_row], ignore_index=True)
     plot_df = (
-        plot_df.groupby(["developer", "month_year"])["total_commits"]
+        plot_df.groupby(["developer", "month_year"], observed=True)["total_commits"]
         .sum()
         .reset_index()
     )
+    # plotly.express, python-pptx and fpdf are imported on first use, so that the
+    # page shows up before they are loaded.
+    import plotly.express as px
+
     line_fig = px.line(
         plot_df,
         x="month_year",
@@ -142,24 +286,87 @@ def create_line_plot(filtered_df, github_handles, program_end_date):
         labels={"month_year": "Month", "total_commits": "Number of Commits"},
         title="Commits per Month",
     )
-    if program_end_date:
-        program_end_date = pd.to_datetime(program_end_date)
-        line_fig.add_vline(
-            x=program_end_date, line_width=2, line_dash="dash", line_color="red"
-        )
     return line_fig
 
 
-def create_box_plot(user_specified_active, other_developers_active):
-    box_fig = go.Figure()
-    box_fig.add_trace(
-        go.Box(
-            y=user_specified_active["total_commits"], name="User Specified Developers"
+def create_band_plot(filtered_df, github_handles, highlighted=None):
+    """
+    Commits per month of a large cohort as the band between the 10th and 90th
+    percentiles of its developers and their median, with a line for each of the
+    `highlighted` developers.
+    """
+    monthly = filtered_df.pivot_table(
+        index="developer",
+        columns="month_year",
+        values="total_commits",
+        aggfunc="sum",
+        fill_value=0,
+        observed=True,
+    ).reindex(github_handles, fill_value=0)
+    bands = percentile_bands(monthly)
+    low, median, high = bands.columns
+
+    band_fig = go.Figure()
+    band_fig.add_trace(
+        go.Scatter(
+            x=bands.index,
+            y=bands[high],
+            mode="lines",
+            line=dict(width=0),
+            showlegend=False,
+            hoverinfo="skip",
         )
     )
-    box_fig.add_trace(
-        go.Box(y=other_developers_active["total_commits"], name="Other Developers")
+    band_fig.add_trace(
+        go.Scatter(
+            x=bands.index,
+            y=bands[low],
+            mode="lines",
+            line=dict(width=0),
+            fill="tonexty",
+            fillcolor="rgba(116, 176, 255, 0.4)",
+            name=f"{low}-{high} of developers",
+        )
     )
+    band_fig.add_trace(
+        go.Scatter(
+            x=bands.index,
+            y=bands[median],
+            mode="lines",
+            line=dict(color="#28286e", width=2),
+            name="Median developer",
+        )
+    )
+    # Individual developers are drawn with WebGL, in case many are selected.
+    for developer in monthly.index.intersection(highlighted or [], sort=False):
+        band_fig.add_trace(
+            go.Scattergl(
+                x=monthly.columns,
+                y=monthly.loc[developer],
+                mode="lines",
+                name=developer,
+            )
+        )
+    band_fig.update_layout(
+        title=f"Commits per Month ({len(github_handles)} developers)",
+        xaxis_title="Month",
+        yaxis_title="Number of Commits",
+    )
+    return band_fig
+
+
+@profiled()
+def create_box_plot(user_specified_active, other_developers_commits):
+    # The boxes are drawn from their statistics, not from the raw values of every
+    # developer of the ecosystem.
+    box_fig = go.Figure()
+    for values, name in [
+        (user_specified_active["total_commits"], "User Specified Developers"),
+        (other_developers_commits, "Other Developers"),
+    ]:
+        statistics = box_statistics(values)
+        if statistics is not None:
+            box_fig.add_trace(go.Box(x=[name], name=name, **statistics))
     box_fig.update_layout(
         title="Monthly Commits: User Specified vs. Other Developers (Active Only)",
         yaxis_title="Total Monthly Commits",
@@ -168,32 +375,87 @@ def create_box_plot(user_specified_active, other_developers_active):
     return box_fig
 
 
-def classify_developers(github_handles, recent_activity_user):
-    classification = []
-    for handle in github_handles:
-        dev_df = recent_activity_user[recent_activity_user["developer"] == handle]
-        total_recent_commits = dev_df["total_commits"].sum()
-        if dev_df.empty or total_recent_commits == 0:
-            status = "Always been inactive"
-        elif total_recent_commits < 10:
-            status = "Low-level active (<10 commits)"
-        elif total_recent_commits < 20:
-            status = "Moderately active (10-19 commits)"
-        else:
-            status = "Highly involved (20+ commits)"
-        classification.append((handle, status, total_recent_commits))
-
-    sort_keys = {
-        "Highly involved": 1,
-        "Moderately active": 2,
-        "Low-level active": 3,
-        "Previously active but no longer": 4,
-        "Always been inactive": 5,
+@profiled(rows=lambda sweep_df, value: len(sweep_df))
+def create_sweep_heatmap(sweep_df, value):
+    titles = {
+        "p_value": "P-value of the Before/After Test by Program End Date and Window",
+        "effect_size": "Effect Size (Rank-Biserial) by Program End Date and Window",
     }
+    surface = sweep_df.pivot(index="window_months", columns="end_date", values=value)
+    import plotly.express as px
+
+    heatmap_fig = px.imshow(
+        surface,
+        x=surface.columns.strftime("%b %Y"),
+        y=[f"{window} months" for window in surface.index],
+        color_continuous_scale="RdBu" if value == "effect_size" else "Viridis",
+        zmin=-1 if value == "effect_size" else 0,
+        zmax=1,
+        text_auto=".2f",
+        aspect="auto",
+        labels={"x": "Program End Date", "y": "Window After the Program"},
+        title=titles[value],
+    )
+    return heatmap_fig
+
+
+@profiled(rows=lambda study: len(study))
+def create_event_study_plot(study):
+    event_fig = go.Figure()
+    event_fig.add_trace(
+        go.Scatter(
+            x=np.concatenate([study["relative_month"], study["relative_month"][::-1]]),
+            y=np.concatenate([study["effect_high"], study["effect_low"][::-1]]),
+            fill="toself",
+            fillcolor="rgba(116, 176, 255, 0.3)",
+            line=dict(width=0),
+            hoverinfo="skip",
+            name="95% bootstrap band",
+        )
+    )
+    event_fig.add_trace(
+        go.Scatter(
+            x=study["relative_month"],
+            y=study["effect"],
+            mode="lines+markers",
+            line=dict(color="#28286e"),
+            customdata=study["month"].dt.strftime("%b %Y"),
+            hovertemplate="%{customdata}: %{y:.2f} commits<extra></extra>",
+            name="Effect",
+        )
+    )
+    event_fig.add_hline(y=0, line_width=1, line_color="gray")
+    event_fig.add_vline(x=-0.5, line_width=2, line_dash="dash", line_color="red")
+    event_fig.update_layout(
+        title="Change in Monthly Commits vs. Other Developers, by Months Since the Program End",
+        xaxis_title="Months Since the Program End Date",
+        yaxis_title="Difference in Differences (Commits per Developer)",
+    )
+    return event_fig
+
+
+@profiled()
+def classify_developers(github_handles, recent_activity_user):
+    total_recent_commits = (
+        recent_activity_user.groupby("developer", observed=True)["total_commits"]
+        .sum()
+        .reindex(github_handles, fill_value=0)
+    )
     classification_df = pd.DataFrame(
-        classification, columns=["Developer", "Classification", "Total Recent Commits"]
+        {
+            "Developer": github_handles,
+            "Classification": classify_labels(
+                total_recent_commits.to_numpy(), inactive_label="Always been inactive"
+            ),
+            "Total Recent Commits": total_recent_commits.to_numpy(),
+        }
+    )
+    # Most involved first: the tiers from high to low, then the inactive ones.
+    classification_df["Sort Key"] = classification_df["Classification"].cat.codes
+    classification_df["Sort Key"] = classification_df["Sort Key"].where(
+        classification_df["Sort Key"] == len(TIERS),
+        len(TIERS) - 1 - classification_df["Sort Key"],
     )
-    classification_df["Sort Key"] = classification_df["Classification"].map(sort_keys)
     classification_df.sort_values(
         by=["Sort Key", "Total Recent Commits"], ascending=[True, False], inplace=True
     )
@@ -201,6 +463,14 @@ def classify_developers(github_handles, recent_activity_user):
     return classification_df
 
 
+def format_rank_test(result, ci):
+    return (
+        f"Mann-Whitney U test statistic: {result.statistic:.3f}, P-value: {result.pvalue:.3f}\n"
+        f"Effect size (rank-biserial): {result.effect_size:.3f}, 95% bootstrap CI: [{ci[0]:.3f}, {ci[1]:.3f}]\n"
+    )
+
+
+@profiled(rows=lambda filtered_df, *args: len(filtered_df))
 def perform_statistical_analysis(filtered_df, github_handles, program_end_date_str):
     if program_end_date_str is None:
         return "Program end date not provided. Unable to perform statistical analysis."
@@ -209,8 +479,12 @@ def perform_statistical_analysis(filtered_df, github_handles, program_end_date_s
     before_program = filtered_df[filtered_df["month_year"] < program_end_date]
     after_program = filtered_df[filtered_df["month_year"] >= program_end_date]
 
-    before_counts = before_program.groupby("developer")["total_commits"].median()
-    after_counts = after_program.groupby("developer")["total_commits"].median()
+    before_counts = before_program.groupby("developer", observed=True)[
+        "total_commits"
+    ].median()
+    after_counts = after_program.groupby("developer", observed=True)[
+        "total_commits"
+    ].median()
 
     all_developers = pd.Series(0, index=github_handles)
     before_counts = before_counts.reindex(all_developers.index, fill_value=0)
@@ -219,13 +493,14 @@ def perform_statistical_analysis(filtered_df, github_handles, program_end_date_s
     if (before_counts == 0).all() or (after_counts == 0).all():
         return "Not enough data for statistical analysis. All values are zero in either before or after counts."
 
-    stat, p_value = mannwhitneyu(after_counts, before_counts)
-    analysis_result = (
-        f"Mann-Whitney U test statistic: {stat:.3f}, P-value: {p_value:.3f}\n"
+    result = mannwhitneyu_test(after_counts, before_counts)
+    p_value = result.pvalue
+    analysis_result = format_rank_test(
+        result, bootstrap_effect_ci(after_counts, before_counts, seed=0)
     )
 
     if p_value < 0.2:
-        if stat > 0:
+        if result.effect_size > 0:
             analysis_result += (
                 "CONGRATULATIONS! The commit activity from the builders taking part in this program is statistically higher after the program."
                 "Difference in commit activity before and after the program is considered significant."
@@ -241,6 +516,7 @@ def perform_statistical_analysis(filtered_df, github_handles, program_end_date_s
     return analysis_result
 
 
+@profiled(rows=lambda filtered_df, *args: len(filtered_df))
 def count_new_developers(filtered_df, github_handles, program_end_date_str):
     if program_end_date_str is None:
         print(
@@ -271,8 +547,22 @@ def count_new_developers(filtered_df, github_handles, program_end_date_str):
     return f"Number of new developers committing code within 2 months after the program: {len(new_developers)}\nNew developers: {new_developers_str}"
 
 
+@profiled()
+def describe_control(control):
+    """
+    First line of the comparisons with other developers.
+    """
+    if control is None:
+        return "Compared with all other developers active in the last 3 months.\n"
+    return (
+        f"Compared with {len(np.unique(control))} matched developers active in the "
+        f"last 3 months, the {DEFAULT_NEIGHBORS} most similar by activity before "
+        f"the program end date for each participant active in the last 3 months.\n"
+    )
+
+
 def compare_user_developers_to_others(
-    user_specified_active, other_developers_active, df, program_end_date_str
+    github_handles, baseline, program_end_date_str, control=None
 ):
     if program_end_date_str is None:
         print(
@@ -284,16 +574,20 @@ def compare_user_developers_to_others(
         return "Program end date not provided. Unable to compare user-specified developers to others. No problem."
 
     program_end_date = pd.to_datetime(program_end_date_str)
-    user_commits = df[
-        (df["developer"].isin(user_specified_active["developer"]))
-        & (df["month_year"] >= program_end_date)
-    ]["total_commits"]
-    other_commits = df[
-        (df["developer"].isin(other_developers_active["developer"]))
-        & (df["month_year"] >= program_end_date)
-    ]["total_commits"]
-
-    if len(user_commits) == 0 or len(other_commits) == 0:
+    user_commits = baseline.commits_since(
+        program_end_date, baseline.cohort_active(github_handles)
+    )
+    if control is None:
+        other_commits = baseline.ecosystem_commits_since(program_end_date)
+        exclude = user_commits
+        control_size = len(other_commits) - len(exclude)
+    else:
+        # A matched control is small: it is resampled in the bootstrap too.
+        other_commits = baseline.commits_since(program_end_date, control)
+        exclude = None
+        control_size = len(other_commits)
+
+    if len(user_commits) == 0 or control_size == 0:
         print(
             colored(
                 "Not enough data for comparison. Either user-specified developers or developers in the database have no commits after the program end date. Update database",
@@ -301,13 +595,18 @@ def compare_user_developers_to_others(
             )
         )
 
-    stat, p_value = mannwhitneyu(user_commits, other_commits)
-    comparison_result = (
-        f"Mann-Whitney U test statistic: {stat:.3f}, P-value: {p_value:.3f}\n"
+    if control is None:
+        result = mannwhitneyu_against(user_commits, other_commits, exclude=exclude)
+    else:
+        result = mannwhitneyu_test(user_commits, other_commits)
+    p_value = result.pvalue
+    comparison_result = describe_control(control) + format_rank_test(
+        result,
+        bootstrap_effect_ci(user_commits, other_commits, exclude=exclude, seed=0),
     )
 
     if p_value < 0.25:
-        if stat > 0:
+        if result.effect_size > 0:
             comparison_result += "GREAT! The user-specified developers have a significantly higher number of commits compared to other developers since the program end date."
         else:
             comparison_result += "BAD! The user-specified developers have a significantly lower number of commits compared to other developers since the program end date."
@@ -317,31 +616,29 @@ def compare_user_developers_to_others(
     return comparison_result
 
 
-def compare_growth_rate(user_specified_active, other_developers_active, df):
-    user_growth_rates = []
-    other_growth_rates = []
-
-    for developer in user_specified_active["developer"].unique():
-        user_df = df[df["developer"] == developer]
-        user_df = user_df.sort_values("month_year")
-        user_commits = user_df["total_commits"].tolist()
-        user_growth_rate = calculate_average_growth_rate(user_commits)
-        user_growth_rates.append(user_growth_rate)
-
-    for developer in other_developers_active["developer"].unique():
-        other_df = df[df["developer"] == developer]
-        other_df = other_df.sort_values("month_year")
-        other_commits = other_df["total_commits"].tolist()
-        other_growth_rate = calculate_average_growth_rate(other_commits)
-        other_growth_rates.append(other_growth_rate)
-
-    stat, p_value = mannwhitneyu(user_growth_rates, other_growth_rates)
-    comparison_result = (
-        f"Mann-Whitney U test statistic: {stat:.3f}, P-value: {p_value:.3f}\n"
+@profiled()
+def compare_growth_rate(github_handles, baseline, control=None):
+    user_growth_rates = baseline.growth_rates[baseline.cohort_active(github_handles)]
+    if control is None:
+        other_growth_rates = baseline.active_growth_rates
+        exclude = user_growth_rates
+        result = mannwhitneyu_against(
+            user_growth_rates, other_growth_rates, exclude=exclude
+        )
+    else:
+        other_growth_rates = baseline.growth_rates[control]
+        exclude = None
+        result = mannwhitneyu_test(user_growth_rates, other_growth_rates)
+    p_value = result.pvalue
+    comparison_result = describe_control(control) + format_rank_test(
+        result,
+        bootstrap_effect_ci(
+            user_growth_rates, other_growth_rates, exclude=exclude, seed=0
+        ),
     )
 
     if p_value < 0.25:
-        if stat > 0:
+        if result.effect_size > 0:
             comparison_result += "GOOD! These developers have a significantly higher average growth rate of commit activity compared to other developers."
         else:
             comparison_result += "BAD! These developers have a significantly lower average growth rate of commit activity compared to other developers."
@@ -372,9 +669,12 @@ def generate_tldr_summary(
     growth_rate_result,
     event_name,
 ):
-    summary = f"### TLDR Summary for {', '.join(github_handles)}\n\n"
+    if len(github_handles) > 20:
+        summary = f"### TLDR Summary for {len(github_handles)} developers\n\n"
+    else:
+        summary = f"### TLDR Summary for {', '.join(github_handles)}\n\n"
     highly_involved_devs = classification_df[
-        classification_df["Classification"] == "Highly involved"
+        classification_df["Classification"] == tier_labels()["high"]
     ]["Developer"].tolist()
     if highly_involved_devs:
         summary += f"**High Performers:** {', '.join(highly_involved_devs)}\n\n"
@@ -405,6 +705,58 @@ def generate_tldr_summary(
     return summary
 
 
+def report_sections(
+    tldr_summary,
+    classification_df,
+    analysis_result,
+    new_developers_count,
+    comparison_result,
+    growth_rate_result,
+    line_image,
+    box_image,
+):
+    """
+    Ordered (title, kind, content) sections shared by the PPTX and PDF reports.
+    `kind` is either "text" or "image"; image content is a path to a PNG file.
+    """
+    return [
+        ("TLDR Summary", "text", tldr_summary),
+        ("Commits per Month", "image", line_image),
+        ("Box Plot Comparison (Last 3 Months)", "image", box_image),
+        (
+            "Which developers are the most active?",
+            "text",
+            "\n".join(
+                [
+                    f"{row['Developer']}: {row['Classification']}"
+                    for _, row in classification_df.iterrows()
+                ]
+            ),
+        ),
+        (
+            "Are these developers committing more code after the program than before the program?",
+            "text",
+            analysis_result,
+        ),
+        (
+            "Do we have new developers after the program?",
+            "text",
+            new_developers_count,
+        ),
+        (
+            "Do the developers of this program commit more code than other Starknet developers?",
+            "text",
+            comparison_result,
+        ),
+        (
+            "Is the increase rate in commits from these developers higher than that of other Starknet developers?",
+            "text",
+            growth_rate_result,
+        ),
+    ]
+
+
+@profiled()
 def create_ppt_report(
     tldr_summary,
     line_fig,
@@ -415,79 +767,99 @@ def create_ppt_report(
     comparison_result,
     growth_rate_result,
     ppt_buffer,
+    line_image=None,
+    box_image=None,
 ):
-    prs = Presentation()
-    # Add TLDR summary slide
-    slide = prs.slides.add_slide(prs.slide_layouts[1])
-    title = slide.shapes.title
-    title.text = "TLDR Summary"
-    content = slide.placeholders[1]
-    content.text = tldr_summary
-
-    # Add line plot slide
-    slide = prs.slides.add_slide(prs.slide_layouts[1])
-    title = slide.shapes.title
-    title.text = "Commits per Month"
-    line_fig.write_image("line_plot.png")
-    slide.shapes.add_picture(
-        "line_plot.png", Inches(1), Inches(2), width=Inches(8), height=Inches(5)
-    )
-
-    # Add box plot slide
-    slide = prs.slides.add_slide(prs.slide_layouts[1])
-    title = slide.shapes.title
-    title.text = "Box Plot Comparison (Last 3 Months)"
-    box_fig.write_image("box_plot.png")
-    slide.shapes.add_picture(
-        "box_plot.png", Inches(1), Inches(2), width=Inches(8), height=Inches(5)
-    )
-
-    # Add developer classification slide
-    slide = prs.slides.add_slide(prs.slide_layouts[1])
-    title = slide.shapes.title
-    title.text = "Which developers are the most active?"
-    content = slide.placeholders[1]
-    content.text = "\n".join(
-        [
-            f"{row['Developer']}: {row['Classification']}"
-            for _, row in classification_df.iterrows()
-        ]
-    )
+    if line_image is None:
+        line_image = "line_plot.png"
+        line_fig.write_image(line_image)
+    if box_image is None:
+        box_image = "box_plot.png"
+        box_fig.write_image(box_image)
 
-    # Add statistical analysis slide
-    slide = prs.slides.add_slide(prs.slide_layouts[1])
-    title = slide.shapes.title
-    title.text = "Are these developers committing more code after the program than before the program?"
-    content = slide.placeholders[1]
-    content.text = analysis_result
-
-    # Add new developers count slide
-    slide = prs.slides.add_slide(prs.slide_layouts[1])
-    title = slide.shapes.title
-    title.text = "Do we have new developers after the program?"
-    content = slide.placeholders[1]
-    content.text = new_developers_count
-
-    # Add comparison with other developers slide
-    slide = prs.slides.add_slide(prs.slide_layouts[1])
-    title = slide.shapes.title
-    title.text = "Do the developers of this program commit more code than other Starknet developers?"
-    content = slide.placeholders[1]
-    content.text = comparison_result
-
-    # Add growth rate comparison slide
-    slide = prs.slides.add_slide(prs.slide_layouts[1])
-    title = slide.shapes.title
-    title.text = "Is the increase rate in commits from these developers higher than that of other Starknet developers?"
-    content = slide.placeholders[1]
-    content.text = growth_rate_result
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    prs = Presentation()
+    for title_text, kind, content in report_sections(
+        tldr_summary,
+        classification_df,
+        analysis_result,
+        new_developers_count,
+        comparison_result,
+        growth_rate_result,
+        line_image,
+        box_image,
+    ):
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = title_text
+        if kind == "image":
+            slide.shapes.add_picture(
+                content, Inches(1), Inches(2), width=Inches(8), height=Inches(5)
+            )
+        else:
+            slide.placeholders[1].text = content
 
     prs.save(ppt_buffer)
 
 
+def _pdf_text(text):
+    # FPDF 1.7 core fonts only cover latin-1; drop markdown emphasis as well.
+    text = text.replace("**", "").replace("### ", "").replace("*", "")
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+def create_pdf_report(
+    tldr_summary,
+    line_fig,
+    box_fig,
+    classification_df,
+    analysis_result,
+    new_developers_count,
+    comparison_result,
+    growth_rate_result,
+    pdf_path,
+    line_image=None,
+    box_image=None,
+):
+    if line_image is None:
+        line_image = "line_plot.png"
+        line_fig.write_image(line_image)
+    if box_image is None:
+        box_image = "box_plot.png"
+        box_fig.write_image(box_image)
+
+    from fpdf import FPDF
+
+    pdf = FPDF(orientation="L", unit="mm", format="A4")
+    pdf.set_auto_page_break(auto=True, margin=15)
+    for title_text, kind, content in report_sections(
+        tldr_summary,
+        classification_df,
+        analysis_result,
+        new_developers_count,
+        comparison_result,
+        growth_rate_result,
+        line_image,
+        box_image,
+    ):
+        pdf.add_page()
+        pdf.set_font("Arial", "B", 16)
+        pdf.multi_cell(0, 8, _pdf_text(title_text))
+        pdf.ln(4)
+        if kind == "image":
+            pdf.image(content, x=40, w=217)
+        else:
+            pdf.set_font("Arial", "", 11)
+            pdf.multi_cell(0, 6, _pdf_text(content))
+
+    pdf.output(pdf_path)
+
+
 def program_evaluation():
-    df = load_all_developers_dataset()
-    max_available_month = df["month_year"].max().strftime("%Y-%m")
+    # With a compute service, the dataset is only loaded by the service.
+    df = None if service_address() else load_all_developers_dataset()
+    max_available_month = call(latest_month, df)
 
     try:
         with open("./github-metrics/assets/style.css") as f:
@@ -509,7 +881,7 @@ def program_evaluation():
     st.markdown(
         """
         This tool allows you to analyze the GitHub activity of developers within the Starknet ecosystem.
-        Enter GitHub handles separated by commas or upload a CSV file with GitHub handles in a single column
+        Enter GitHub handles separated by commas or upload a file with GitHub handles
         to see their monthly commit activity, involvement classification, and comparisons with other develope        """
     )
     st.markdown(
@@ -523,12 +895,12 @@ def program_evaluation():
         placeholder="e.g., user1,user2,user3",
     )
     file_input = st.file_uploader(
-        "Or upload a CSV file with GitHub handles in a single column",
-        type=["csv"],
+        "Or upload a file with GitHub handles (CSV, TSV or JSON)",
+        type=UPLOAD_TYPES,
     )
     st.markdown(
         """
-        *Note:* When uploading a CSV, ensure it contains a single column of GitHub handles without a header row.
+        *Note:* Uploaded files can be a single column of GitHub handles without a header row, or an export with a header row and the handles in a `github`, `github_handle`, `github_username`, `handle`, `login` or `username` column (otherwise the first column is used). Profile URLs and @mentions are accepted, and duplicates are skipped.
         """
     )
 
@@ -546,6 +918,18 @@ def program_evaluation():
         """
     )
 
+    highlighted_input = st.text_input(
+        "Developers to show individually (optional)",
+        placeholder="e.g., user1,user2",
+        help=f"Cohorts of more than {MAX_INDIVIDUAL_LINES} developers are plotted as the range and median of their commits per month; the developers listed here are added as their own lines.",
+    )
+
+    matched_input = st.checkbox(
+        "Compare with matched developers",
+        value=False,
+        help=f"Compare the cohort with the {DEFAULT_NEIGHBORS} developers whose activity before the program end date was the most similar to each participant's, instead of with every other developer. The results then differ from the default comparison with every other developer.",
+    )
+
     if st.button("Analyze"):
         if program_end_date_input > max_available_month:
             st.warning(
@@ -561,9 +945,26 @@ def program_evaluation():
                 comparison_result,
                 growth_rate_result,
                 tldr_summary,
-            ) = process_input(
-                text_input, file_input, program_end_date_input, event_name_input
+            ), resolved = call(
+                evaluate,
+                df,
+                text_input,
+                file_input,
+                program_end_date_input,
+                event_name_input,
+                matched_input,
+                highlighted_input,
             )
+            if len(resolved.unknown) or resolved.n_duplicates:
+                st.info(resolved.summary())
+            if len(resolved.suggestions):
+                with st.expander("🔎 Did you mean one of these developers?"):
+                    st.markdown(
+                        "Closest developer names in the dataset for the handles "
+                        "that were not found. Add the right ones to the handle "
+                        "list to include them in the analysis."
+                    )
+                    st.dataframe(resolved.suggestions, hide_index=True)
 
         st.markdown(tldr_summary)
 
@@ -572,14 +973,15 @@ def program_evaluation():
 
         with st.expander("🏆 Which developers are the most active?"):
             st.dataframe(classification_df)
+            low, high = get_thresholds()
             st.markdown(
-                """
+                f"""
                 ### Developer Classification Criteria
                 - **Always been inactive**: No commits have been recorded in the dataset.
                 - **Previously active but no longer**: Had commits earlier but none in the last 3 months.
-                - **Low-level active**: Fewer than 10 commits in the last 3 months.
-                - **Moderately active**: 10 to 19 commits in the last 3 months.
-                - **Highly involved**: 20 or more commits in the last 3 months.
+                - **Low-level active**: Fewer than {low} commits in the last 3 months.
+                - **Moderately active**: {low} to {high - 1} commits in the last 3 months.
+                - **Highly involved**: {high} or more commits in the last 3 months.
                 """
             )
 
@@ -596,7 +998,8 @@ def program_evaluation():
                 - The test statistic measures the difference in the distribution of commits between the two groups (before and after).
                 - The p-value indicates the probability of observing such a difference by chance, assuming there is no real difference between the groups.
                 - A p-value less than 0.2 suggests that the difference is considered significant.
-                - A positive test statistic indicates that the commit activity is higher after the program, while a negative value indicates lower activity.
+                - The effect size (rank-biserial correlation) goes from -1 to 1: positive values mean the first group tends to have higher values. The 95% bootstrap confidence interval shows how precisely it is estimated.
+                - A positive effect size indicates that the commit activity is higher after the program, while a negative value indicates lower activity.
                 """
             )
 
@@ -606,11 +1009,12 @@ def program_evaluation():
             st.text(comparison_result)
             st.markdown(
                 """
-                The Mann-Whitney U test is used to compare the commit activity of the user-specified developers with the rest of the developers in the database since the program end date.
+                The Mann-Whitney U test is used to compare the commit activity of the user-specified developers with other developers since the program end date: by default the rest of the developers in the database, or with "Compare with matched developers" the developers matched to each participant on tenure and monthly commits before the program end date. Both groups only include developers active in the last 3 months.
                 - The test statistic measures the difference in the distribution of commits between the two groups.
                 - The p-value indicates the probability of observing such a difference by chance, assuming there is no real difference between the groups.
                 - A p-value less than 0.25 suggests that the difference is considered significant.
-                - If the test statistic is positive, it means the user-specified developers have a higher number of commits compared to other developers, and vice versa.
+                - The effect size (rank-biserial correlation) goes from -1 to 1: positive values mean the first group tends to have higher values. The 95% bootstrap confidence interval shows how precisely it is estimated.
+                - If the effect size is positive, it means the user-specified developers have a higher number of commits compared to other developers, and vice versa.
                 """
             )
 
@@ -620,14 +1024,70 @@ def program_evaluation():
             st.text(growth_rate_result)
             st.markdown(
                 """
-                The average growth rate of commit activity is compared between the user-specified developers and other developers.
+                The average growth rate of commit activity is compared between the user-specified developers and other developers (the matched developers when "Compare with matched developers" is checked).
                 - The growth rate is calculated as the relative change in the number of commits from one month to the next.
                 - The Mann-Whitney U test is used to compare the average growth rates between the two groups.
                 - A p-value less than 0.25 suggests that the difference in average growth rates is statistically significant.
-                - If the test statistic is positive, it means the user-specified developers have a higher average growth rate compared to other developers, and vice versa.
+                - The effect size (rank-biserial correlation) goes from -1 to 1: positive values mean the first group tends to have higher values. The 95% bootstrap confidence interval shows how precisely it is estimated.
+                - If the effect size is positive, it means the user-specified developers have a higher average growth rate compared to other developers, and vice versa.
                 """
             )
 
+        if program_end_date_input:
+            with st.expander(
+                "🧭 How sensitive is the before/after result to the program end date?"
+            ):
+                sweep_df = call(
+                    sweep_end_dates, df, resolved.handles, program_end_date_input
+                )
+                if sweep_df.empty:
+                    st.write("Not enough history around the program end date.")
+                else:
+                    st.plotly_chart(create_sweep_heatmap(sweep_df, "p_value"))
+                    st.plotly_chart(create_sweep_heatmap(sweep_df, "effect_size"))
+                st.markdown(
+                    """
+                    The before/after comparison is repeated for end dates up to six months before and after the one provided, and for windows of 1 to 6 months after each end date.
+                    - "Before" is always the 12 months preceding the end date.
+                    - A result that only holds for one end date or one window length should be taken with caution.
+                    """
+                )
+
+        if program_end_date_input:
+            with st.expander(
+                "📐 Did the program change activity compared with the rest of the ecosystem?"
+            ):
+                study = call(
+                    program_event_study,
+                    df,
+                    resolved.handles,
+                    program_end_date_input,
+                    matched_input,
+                )
+                if study.empty:
+                    st.write(
+                        f"Not enough complete months around the program end date (at least {DEFAULT_PRE_MONTHS} before and 1 after are needed)."
+                    )
+                else:
+                    st.plotly_chart(create_event_study_plot(study))
+                    effect, low, high = study.attrs["post_effect"]
+                    st.text(
+                        f"Average effect after the program: {effect:+.2f} commits per developer per month, 95% bootstrap CI: [{low:+.2f}, {high:+.2f}]"
+                    )
+                excluded = study.attrs.get("excluded_cohort", [])
+                if excluded:
+                    st.text(
+                        f"Left out: {len(excluded)} developers of the program with no commits before the program end date ({', '.join(excluded)})."
+                    )
+                st.markdown(
+                    f"""
+                    Monthly commits are aligned on the months since the program end date, and the change of the program developers from their own average over the {DEFAULT_PRE_MONTHS} months before the end date is compared with the change of the other developers over the same months: the matched developers, or with matching turned off every developer who committed before the end date. Both groups only include developers who committed before the end date.
+                    - Positive values mean the program developers gained more (or lost less) activity than the rest of the ecosystem, which takes ecosystem-wide trends out of the before/after comparison.
+                    - The shaded band is a 95% bootstrap confidence band over developers; months where it excludes 0 show a clear difference.
+                    - Months before the end date should stay close to 0; large differences there mean the two groups were already diverging.
+                    """
+                )
+
         st.markdown(
             """
             💡 *Disclaimer: This information is only for open-source repos and should be taken with a grain of salt. Commits in certain repos may be more important than others, and there are many private repos from several teams that are not included in this analysis.*
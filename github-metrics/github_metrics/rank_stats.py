@@ -0,0 +1,249 @@
+"""
+Rank statistics against large, reused samples.
+
+Program evaluations run the Mann-Whitney U test of a small cohort against the
+same ecosystem-wide sample over and over. `SortedSample` keeps that sample sorted
+together with its tie counts, so each test only has to locate the cohort's values
+in it: O(m log n) for a cohort of m values against a sample of n values, instead
+of ranking all m + n values again.
+
+Results match `scipy.stats.mannwhitneyu` with its default settings (two-sided,
+continuity correction, exact p-values for small samples without ties).
+scipy.stats takes most of a second to import, so it is only imported by the
+functions that use it.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+from scipy.special import ndtr
+
+RankTestResult = namedtuple("RankTestResult", ["statistic", "pvalue", "effect_size"])
+
+# Values ranked at once by the two-sample bootstrap.
+_MAX_BATCH_VALUES = 2_000_000
+
+
+def _tie_term(counts):
+    counts = np.asarray(counts, dtype=float)
+    return float(np.sum(counts**3 - counts))
+
+
+def _count_between(sorted_values, low, high, side="left"):
+    return np.searchsorted(sorted_values, high, side=side) - np.searchsorted(
+        sorted_values, low, side="left"
+    )
+
+
+def remove_values(sorted_values, values):
+    """
+    Multiset difference: drop one occurrence of each of `values` from the sorted
+    array `sorted_values`. Every value must be present in `sorted_values`.
+    """
+    if len(values) == 0:
+        return sorted_values
+    values = np.sort(values)
+    first = np.searchsorted(sorted_values, values, side="left")
+    offset = np.arange(len(values)) - np.searchsorted(values, values, side="left")
+    return np.delete(sorted_values, first + offset)
+
+
+class SortedSample:
+    """
+    A sample kept sorted, with the tie correction term of its own values.
+    """
+
+    def __init__(self, values, presorted=False):
+        values = np.asarray(values, dtype=float)
+        self.values = values if presorted else np.sort(values)
+        _, counts = np.unique(self.values, return_counts=True)
+        self.tie_term = _tie_term(counts)
+
+    def __len__(self):
+        return len(self.values)
+
+    def count_less(self, x):
+        return np.searchsorted(self.values, x, side="left")
+
+    def count_equal(self, x):
+        return np.searchsorted(self.values, x, side="right") - self.count_less(x)
+
+
+def rank_biserial(statistic, n1, n2):
+    """
+    Effect size of a U statistic, from -1 (every x below y) to 1 (every x above y).
+    """
+    return 2 * statistic / (n1 * n2) - 1
+
+
+def _u_statistic(x, sample, exclude):
+    less = sample.count_less(x) - np.searchsorted(exclude, x, side="left")
+    equal = sample.count_equal(x) - _count_between(exclude, x, x, side="right")
+    return np.sum(less, axis=-1) + 0.5 * np.sum(equal, axis=-1)
+
+
+def _combined_tie_term(x, sample, exclude):
+    touched = np.unique(np.concatenate([x, exclude]))
+    in_sample = sample.count_equal(touched)
+    in_exclude = _count_between(exclude, touched, touched, side="right")
+    in_x = _count_between(np.sort(x), touched, touched, side="right")
+    after = in_sample - in_exclude + in_x
+    return sample.tie_term - _tie_term(in_sample) + _tie_term(after)
+
+
+def mannwhitneyu_against(x, sample, exclude=None, alternative="two-sided"):
+    """
+    Mann-Whitney U test of `x` against `sample` (a SortedSample) with the values
+    in `exclude` taken out of the sample first. `exclude` must be a sub-multiset
+    of the sample, typically the cohort's own rows within an ecosystem baseline.
+    """
+    x = np.asarray(x, dtype=float)
+    exclude = np.sort(np.asarray([] if exclude is None else exclude, dtype=float))
+    n1, n2 = len(x), len(sample) - len(exclude)
+    if n1 == 0 or n2 == 0:
+        return RankTestResult(np.nan, np.nan, np.nan)
+
+    tie_term = _combined_tie_term(x, sample, exclude)
+    if not (n1 > 8 and n2 > 8) and tie_term == 0:
+        # Small samples without ties get scipy's exact distribution.
+        from scipy.stats import mannwhitneyu
+
+        y = remove_values(sample.values, exclude)
+        statistic, pvalue = mannwhitneyu(x, y, alternative=alternative)
+        return RankTestResult(statistic, pvalue, rank_biserial(statistic, n1, n2))
+
+    u1 = _u_statistic(x, sample, exclude)
+    if alternative == "greater":
+        u, factor = u1, 1
+    elif alternative == "less":
+        u, factor = n1 * n2 - u1, 1
+    else:
+        u, factor = max(u1, n1 * n2 - u1), 2
+
+    n = n1 + n2
+    s = np.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (u - n1 * n2 / 2 - 0.5) / s
+    pvalue = float(np.clip(ndtr(-z) * factor, 0.0, 1.0))
+    return RankTestResult(float(u1), pvalue, rank_biserial(u1, n1, n2))
+
+
+def mannwhitneyu_test(x, y, alternative="two-sided"):
+    """
+    Two-sample Mann-Whitney U test with the effect size attached.
+    """
+    return mannwhitneyu_against(x, SortedSample(y), alternative=alternative)
+
+
+def mannwhitneyu_batch(x, y, alternative="two-sided"):
+    """
+    Many independent Mann-Whitney U tests at once, one per row of the 2-D arrays
+    `x` (tests x n1) and `y` (tests x n2), using the asymptotic p-value.
+    Returns arrays of statistics, p-values and effect sizes.
+    """
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    n1, n2 = x.shape[1], y.shape[1]
+    xy = np.concatenate([x, y], axis=1)
+
+    from scipy.stats import rankdata
+
+    ranks = rankdata(xy, axis=1)
+    u1 = ranks[:, :n1].sum(axis=1) - n1 * (n1 + 1) / 2
+
+    sorted_xy = np.sort(xy, axis=1)
+    starts = np.ones(sorted_xy.shape, dtype=bool)
+    starts[:, 1:] = sorted_xy[:, 1:] != sorted_xy[:, :-1]
+    rows, cols = np.nonzero(starts)
+    run_ends = np.append(cols[1:], 0)
+    run_ends[np.append(rows[1:] != rows[:-1], True)] = xy.shape[1]
+    counts = (run_ends - cols).astype(float)
+    tie_term = np.bincount(rows, weights=counts**3 - counts, minlength=len(xy))
+
+    if alternative == "greater":
+        u, factor = u1, 1
+    elif alternative == "less":
+        u, factor = n1 * n2 - u1, 1
+    else:
+        u, factor = np.maximum(u1, n1 * n2 - u1), 2
+
+    n = n1 + n2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = np.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))))
+        z = (u - n1 * n2 / 2 - 0.5) / s
+    pvalue = np.clip(ndtr(-z) * factor, 0.0, 1.0)
+    return u1, pvalue, rank_biserial(u1, n1, n2)
+
+
+def bootstrap_effect_ci(
+    x, y, exclude=None, n_resamples=2000, confidence_level=0.95, seed=None
+):
+    """
+    Percentile bootstrap confidence interval of the rank-biserial effect size of
+    `x` against `y`, with every resample evaluated in one vectorized batch.
+
+    When `y` is a SortedSample (an ecosystem baseline, optionally minus
+    `exclude`), only `x` is resampled: the baseline is large enough for its own
+    sampling error to be negligible, and each resample is just located in it.
+    Otherwise both samples are resampled.
+    """
+    x = np.asarray(x, dtype=float)
+    rng = np.random.default_rng(seed)
+    n1 = len(x)
+
+    if isinstance(y, SortedSample):
+        exclude = np.sort(np.asarray([] if exclude is None else exclude, dtype=float))
+        n2 = len(y) - len(exclude)
+        if n1 == 0 or n2 == 0:
+            return np.nan, np.nan
+        resamples = x[rng.integers(0, n1, size=(n_resamples, n1))]
+        effects = rank_biserial(_u_statistic(resamples, y, exclude), n1, n2)
+    else:
+        y = np.asarray(y, dtype=float)
+        n2 = len(y)
+        if n1 == 0 or n2 == 0:
+            return np.nan, np.nan
+        # Resamples are ranked in chunks to bound memory on large samples.
+        chunk = max(1, _MAX_BATCH_VALUES // (n1 + n2))
+        effects = []
+        for start in range(0, n_resamples, chunk):
+            size = min(chunk, n_resamples - start)
+            x_resamples = x[rng.integers(0, n1, size=(size, n1))]
+            y_resamples = y[rng.integers(0, n2, size=(size, n2))]
+            effects.append(mannwhitneyu_batch(x_resamples, y_resamples)[2])
+        effects = np.concatenate(effects)
+
+    alpha = (1 - confidence_level) / 2
+    low, high = np.quantile(effects, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+
+def permutation_test(x, y, n_resamples=5000, alternative="two-sided", seed=None):
+    """
+    Permutation p-value of the Mann-Whitney U statistic of `x` against `y`. The
+    pooled sample is ranked once and every permutation is a row of a random
+    index matrix, so the whole null distribution is computed in one batch.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n1, n2 = len(x), len(y)
+    if n1 == 0 or n2 == 0:
+        return np.nan
+
+    from scipy.stats import rankdata
+
+    ranks = rankdata(np.concatenate([x, y]))
+    observed = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+
+    rng = np.random.default_rng(seed)
+    permutations = np.argsort(rng.random((n_resamples, n1 + n2)), axis=1)[:, :n1]
+    null = ranks[permutations].sum(axis=1) - n1 * (n1 + 1) / 2
+
+    center = n1 * n2 / 2
+    if alternative == "greater":
+        extreme = null >= observed
+    elif alternative == "less":
+        extreme = null <= observed
+    else:
+        extreme = np.abs(null - center) >= abs(observed - center)
+    return float((extreme.sum() + 1) / (n_resamples + 1))
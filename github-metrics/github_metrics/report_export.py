@@ -0,0 +1,226 @@
+"""
+Headless batch export of program evaluation reports.
+
+Renders one PPTX and/or PDF deck per event listed in a batch file, spreading the
+events over worker processes. Each worker loads the commits dataset once and
+reuses it for every event it handles.
+
+The batch file is either a CSV with the columns `event_name`, `program_end_date`
+and `handles` (comma separated, quoted) or `handles_file` (one handle per line,
+relative to the batch file), or a JSON list of objects with the same keys
+(`handles` may be a list). Events sharing a name get numbered file names.
+
+Usage:
+    python report_export.py events.csv --output-dir reports --formats pptx pdf
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+from program_evaluation import create_pdf_report, create_ppt_report, process_input
+from termcolor import colored
+from utils import load_all_developers_dataset
+
+_worker_df = None
+
+
+def load_events(batch_path):
+    if batch_path.endswith(".json"):
+        with open(batch_path) as f:
+            records = json.load(f)
+    else:
+        records = pd.read_csv(batch_path, dtype=str).fillna("").to_dict("records")
+
+    events = []
+    for record in records:
+        handles = record.get("handles") or []
+        if isinstance(handles, str):
+            handles = handles.split(",")
+        if record.get("handles_file"):
+            handles_path = os.path.join(
+                os.path.dirname(os.path.abspath(batch_path)), record["handles_file"]
+            )
+            with open(handles_path) as f:
+                handles = list(handles) + f.read().split("\n")
+        handles = [handle.strip() for handle in handles if handle.strip()]
+        if not handles:
+            print(
+                colored(
+                    f"Skipping event {record.get('event_name')!r}: no handles", "yellow"
+                )
+            )
+            continue
+        events.append(
+            {
+                "event_name": record.get("event_name") or "",
+                "program_end_date": record.get("program_end_date") or None,
+                "handles": handles,
+            }
+        )
+    return events
+
+
+def slugify(name):
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_").lower()
+    return slug or "event"
+
+
+def assign_slugs(events):
+    """
+    File name of each event's decks, numbered when several events share one.
+    """
+    used = set()
+    for event in events:
+        base = slug = slugify(event["event_name"])
+        number = 1
+        while slug in used:
+            number += 1
+            slug = f"{base}_{number}"
+        used.add(slug)
+        event["slug"] = slug
+    return events
+
+
+def render_figure_image(fig, image_dir):
+    """
+    Write a figure to a PNG named after the hash of its spec and return the path.
+    Identical figures, across events and across workers (e.g. events with the
+    same cohort and date) and across runs into the same output directory, are
+    rendered only once. The box plot's "other developers" leave out each
+    event's cohort, so its image is specific to the event.
+    """
+    key = hashlib.sha1(fig.to_json().encode("utf-8")).hexdigest()
+    path = os.path.join(image_dir, f"{key}.png")
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{os.getpid()}.tmp.png"
+        fig.write_image(tmp_path)
+        os.replace(tmp_path, path)
+    return path
+
+
+def _init_worker():
+    global _worker_df
+    _worker_df = load_all_developers_dataset()
+
+
+def export_event(event, output_dir, formats):
+    (
+        line_fig,
+        box_fig,
+        classification_df,
+        analysis_result,
+        new_developers_count,
+        comparison_result,
+        growth_rate_result,
+        tldr_summary,
+        _,
+    ) = process_input(
+        ",".join(event["handles"]),
+        None,
+        event["program_end_date"],
+        event["event_name"],
+        df=_worker_df,
+    )
+    if line_fig is None:
+        raise RuntimeError(new_developers_count)
+
+    image_dir = os.path.join(output_dir, "images")
+    line_image = render_figure_image(line_fig, image_dir)
+    box_image = render_figure_image(box_fig, image_dir)
+
+    report_args = (
+        tldr_summary,
+        line_fig,
+        box_fig,
+        classification_df,
+        analysis_result,
+        new_developers_count,
+        comparison_result,
+        growth_rate_result,
+    )
+    base_path = os.path.join(output_dir, event["slug"])
+    outputs = []
+    if "pptx" in formats:
+        create_ppt_report(
+            *report_args,
+            f"{base_path}.pptx",
+            line_image=line_image,
+            box_image=box_image,
+        )
+        outputs.append(f"{base_path}.pptx")
+    if "pdf" in formats:
+        create_pdf_report(
+            *report_args,
+            f"{base_path}.pdf",
+            line_image=line_image,
+            box_image=box_image,
+        )
+        outputs.append(f"{base_path}.pdf")
+    return outputs
+
+
+def export_reports(events, output_dir, formats=("pptx", "pdf"), workers=None):
+    os.makedirs(os.path.join(output_dir, "images"), exist_ok=True)
+    assign_slugs(events)
+
+    manifest = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {
+            pool.submit(export_event, event, output_dir, formats): event
+            for event in events
+        }
+        for future in as_completed(futures):
+            event = futures[future]
+            try:
+                outputs = future.result()
+                print(colored(f"Exported {event['event_name']}", "green"))
+                manifest.append(
+                    {
+                        "event_name": event["event_name"],
+                        "status": "ok",
+                        "outputs": ";".join(outputs),
+                    }
+                )
+            except Exception as e:
+                print(colored(f"Error exporting {event['event_name']}: {e}", "red"))
+                manifest.append(
+                    {"event_name": event["event_name"], "status": str(e), "outputs": ""}
+                )
+
+    manifest_df = pd.DataFrame(manifest, columns=["event_name", "status", "outputs"])
+    manifest_df.to_csv(os.path.join(output_dir, "manifest.csv"), index=False)
+    return manifest_df
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export program evaluation reports for a batch of events."
+    )
+    parser.add_argument("batch_file", help="CSV or JSON file describing the events")
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument(
+        "--formats", nargs="+", choices=["pptx", "pdf"], default=["pptx", "pdf"]
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (defaults to the number of CPUs)",
+    )
+    args = parser.parse_args()
+
+    events = load_events(args.batch_file)
+    print(colored(f"Exporting reports for {len(events)} events...", "blue"))
+    manifest_df = export_reports(events, args.output_dir, args.formats, args.workers)
+    failed = (manifest_df["status"] != "ok").sum()
+    if failed:
+        print(colored(f"{failed} events failed, see manifest.csv", "red"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Monthly rollups of the closed series for interactive filtering.
+
+A rollup holds one row per closed month and one column per activity tier, tenure
+bucket or download source, with prefix sums over months. Changing a chart's
+date range or selected tiers is then a slice of at most a few hundred months
+(and a range total a difference of two prefix rows) instead of a rescan of the
+commits frame.
+"""
+
+import numpy as np
+import pandas as pd
+from month_close import load_series
+
+
+class MonthlyRollup:
+    def __init__(self, months, columns, values):
+        self.months = pd.DatetimeIndex(months)
+        self.columns = list(columns)
+        self.values = np.asarray(values, dtype=float).reshape(
+            len(self.months), len(self.columns)
+        )
+        self.prefix = np.zeros((len(self.months) + 1, len(self.columns)))
+        np.cumsum(self.values, axis=0, out=self.prefix[1:])
+
+    @classmethod
+    def from_series(cls, name, columns=None, column=None, value=None):
+        """
+        Rollup of a persisted series (see month_close.SERIES), either wide (one
+        value column per entry of `columns`) or long (`column` holding the
+        entries and `value` the values, e.g. downloads per source).
+        """
+        series = load_series(name)
+        if column is not None:
+            series = series.pivot_table(
+                index="month", columns=column, values=value, aggfunc="sum"
+            )
+            columns = list(series.columns) if columns is None else columns
+            series = series.reindex(columns=columns, fill_value=0).fillna(0)
+            return cls(series.index, columns, series.to_numpy())
+        series = series.sort_values("month")
+        return cls(series["month"], columns, series[columns].to_numpy())
+
+    def __len__(self):
+        return len(self.months)
+
+    def _bounds(self, start, end):
+        first = 0 if start is None else self.months.searchsorted(pd.Timestamp(start))
+        last = (
+            len(self.months)
+            if end is None
+            else self.months.searchsorted(pd.Timestamp(end), side="right")
+        )
+        return first, max(first, last)
+
+    def _positions(self, columns):
+        if columns is None:
+            return list(range(len(self.columns)))
+        return [self.columns.index(column) for column in columns]
+
+    def window(self, start=None, end=None, columns=None):
+        """
+        Monthly values from `start` to `end` (inclusive) as a frame indexed by
+        month, restricted to `columns`.
+        """
+        first, last = self._bounds(start, end)
+        positions = self._positions(columns)
+        return pd.DataFrame(
+            self.values[first:last][:, positions],
+            index=self.months[first:last],
+            columns=[self.columns[position] for position in positions],
+        )
+
+    def total(self, start=None, end=None, columns=None):
+        """
+        Sum of each column from `start` to `end` (inclusive).
+        """
+        first, last = self._bounds(start, end)
+        positions = self._positions(columns)
+        return pd.Series(
+            self.prefix[last, positions] - self.prefix[first, positions],
+            index=[self.columns[position] for position in positions],
+        )
+
+    def months_between(self, start=None, end=None):
+        first, last = self._bounds(start, end)
+        return last - first
@@ -0,0 +1,124 @@
+"""
+Program end-date sensitivity sweep.
+
+`perform_statistical_analysis` and `count_new_developers` look at a single
+program end date. The sweep evaluates the same cohort for a grid of end dates and
+post-program windows at once, from sliding windows over the cohort's rows of the
+activity matrix, and runs every Mann-Whitney test of the grid in one batch.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from rank_stats import mannwhitneyu_batch
+
+DEFAULT_WINDOWS = range(1, 7)
+
+
+def _window_medians(values, window):
+    """
+    Median over every run of `window` consecutive months, ignoring months without
+    a row (NaN) and counting developers without any row in the run as 0.
+    Column j holds the median of months j .. j + window - 1.
+    """
+    windows = sliding_window_view(values, window, axis=1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        medians = np.nanmedian(windows, axis=2)
+    return np.nan_to_num(medians, nan=0.0)
+
+
+def _window_sums(values, window):
+    cumulative = np.zeros((values.shape[0], values.shape[1] + 1))
+    cumulative[:, 1:] = np.cumsum(values, axis=1)
+    return cumulative[:, window:] - cumulative[:, :-window]
+
+
+def end_date_sweep(
+    matrix, github_handles, end_dates, windows=DEFAULT_WINDOWS, lookback_months=12
+):
+    """
+    Evaluate a cohort for every combination of program end date and post-program
+    window (in months).
+
+    For each end date, "before" is the `lookback_months` months preceding it and
+    "after" the first `window` months starting at it; each developer contributes
+    the median of their monthly commits in each period, as in
+    `perform_statistical_analysis`. New developers are cohort members with a row
+    after the end date and none in the lookback period, as in
+    `count_new_developers`.
+
+    Returns one row per (end_date, window_months) with the Mann-Whitney statistic,
+    p-value and rank-biserial effect size of after vs. before, and the number of
+    new developers. Cells without enough data have NaN statistics.
+    """
+    positions = matrix.developer_positions(github_handles)
+    n_months = len(matrix.months)
+    columns = [
+        "end_date",
+        "window_months",
+        "statistic",
+        "p_value",
+        "effect_size",
+        "new_developers",
+    ]
+
+    starts = np.array(
+        sorted({matrix.month_position(end_date) for end_date in end_dates})
+    )
+    starts = starts[(starts >= lookback_months) & (starts < n_months)]
+    windows = [window for window in windows if window >= 1]
+    if len(positions) == 0 or len(starts) == 0 or not windows:
+        return pd.DataFrame(columns=columns)
+
+    present = matrix.present[positions]
+    values = np.where(present, matrix.commits[positions], np.nan).astype(float)
+
+    # Pad the end so that windows running past the last month simply see fewer
+    # months, like an open-ended filter on the frame would.
+    max_window = max(windows)
+    padded = np.pad(values, ((0, 0), (0, max_window)), constant_values=np.nan)
+    padded_present = np.pad(present, ((0, 0), (0, max_window))).astype(float)
+
+    before = _window_medians(values, lookback_months)[:, starts - lookback_months]
+    present_before = _window_sums(present.astype(float), lookback_months)[
+        :, starts - lookback_months
+    ]
+
+    grid, after_medians, new_developers = [], [], []
+    for window in windows:
+        after = _window_medians(padded, window)[:, starts]
+        present_after = _window_sums(padded_present, window)[:, starts]
+        after_medians.append(after.T)
+        new_developers.append(((present_after > 0) & (present_before == 0)).sum(axis=0))
+        grid.extend((matrix.months[start], window) for start in starts)
+
+    x = np.concatenate(after_medians)
+    y = np.tile(before.T, (len(windows), 1))
+    statistic, p_value, effect_size = mannwhitneyu_batch(x, y)
+
+    insufficient = (x == 0).all(axis=1) | (y == 0).all(axis=1)
+    statistic[insufficient] = np.nan
+    p_value[insufficient] = np.nan
+    effect_size[insufficient] = np.nan
+
+    sweep = pd.DataFrame(grid, columns=["end_date", "window_months"])
+    sweep["statistic"] = statistic
+    sweep["p_value"] = p_value
+    sweep["effect_size"] = effect_size
+    sweep["new_developers"] = np.concatenate(new_developers)
+    return sweep[columns]
+
+
+def sweep_around(matrix, github_handles, program_end_date, months_each_side=6):
+    """
+    Sweep the end dates within `months_each_side` months of `program_end_date`.
+    """
+    center = pd.Timestamp(program_end_date)
+    end_dates = [
+        center + pd.DateOffset(months=offset)
+        for offset in range(-months_each_side, months_each_side + 1)
+    ]
+    return end_date_sweep(matrix, github_handles, end_dates)
@@ -0,0 +1,200 @@
+"""
+Dense and sparse storage of the commits table.
+
+The source exports have one row per developer and month, from the month a
+developer is first tracked to the end of the export, most of them zero-commit
+padding. Sparse storage keeps the rows with commits only, plus a roster with
+one row per developer: their network and the first and last month they are
+tracked. Every tracked month without a row has zero commits, so aggregations
+can skip the padding and the few analyses that need it get it back exactly
+(see tracked_rows).
+
+A sparse export is a commits CSV with a `<name>.roster.csv` file next to it.
+To convert an export, from the github-metrics directory:
+
+    python github_metrics/storage.py data/source/<export>.csv <sparse export>.csv
+
+In memory, a sparse frame holds its roster in `attrs["roster"]`, in the order
+of the `developer` categories (every developer of the roster is a category,
+with commits or not).
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+from termcolor import colored
+
+MONTH_FORMAT = "%B_%Y"
+
+# Compact in-memory encoding of the commits table: developer and network names
+# are dictionary-encoded (one small integer code per row instead of a Python
+# string), and commit counts fit in 32 bits.
+DATASET_DTYPES = {
+    "developer": "category",
+    "network": "category",
+    "total_commits": "int32",
+}
+ROSTER_DTYPES = {"developer": str, "network": "category"}
+
+
+def roster_path(path):
+    return f"{os.path.splitext(path)[0]}.roster.csv"
+
+
+def _month_ordinals(month_year):
+    return month_year.dt.to_period("M").array.asi8
+
+
+def _months(ordinals):
+    return pd.PeriodIndex.from_ordinals(ordinals, freq="M").to_timestamp()
+
+
+def build_roster(df):
+    """
+    Roster of a dense commits frame: one row per developer, sorted by name,
+    with their network and first and last tracked months.
+    """
+    roster = (
+        df.groupby("developer", observed=True, sort=True)
+        .agg(
+            network=("network", "first"),
+            first_month=("month_year", "min"),
+            last_month=("month_year", "max"),
+        )
+        .reset_index()
+    )
+    roster["developer"] = roster["developer"].astype(str)
+    return roster
+
+
+def with_roster(entries, roster):
+    """
+    Sparse frame of the rows with commits `entries` and their `roster`.
+    """
+    roster = roster.sort_values("developer", ignore_index=True)
+    entries = entries[entries["total_commits"] > 0].astype(
+        {"developer": pd.CategoricalDtype(roster["developer"])}
+    )
+    entries.attrs["roster"] = roster
+    return entries
+
+
+def sparsify(df):
+    """
+    Sparse frame of a dense commits frame (sparse frames are returned as is).
+    """
+    if "roster" in df.attrs:
+        return df
+    return with_roster(df, build_roster(df))
+
+
+def read_dataset(path):
+    """
+    Commits table of an export, with `month_year` as datetime. Exports with a
+    roster file are read as sparse frames; set STAR_TRACKER_SPARSE=1 to also
+    drop the padding of dense exports when loading them.
+    """
+    df = pd.read_csv(path, dtype=DATASET_DTYPES)
+    df["month_year"] = pd.to_datetime(df["month_year"], format=MONTH_FORMAT)
+    if os.path.exists(roster_path(path)):
+        roster = pd.read_csv(roster_path(path), dtype=ROSTER_DTYPES)
+        for column in ["first_month", "last_month"]:
+            roster[column] = pd.to_datetime(roster[column], format=MONTH_FORMAT)
+        return with_roster(df, roster)
+    if os.environ.get("STAR_TRACKER_SPARSE") == "1":
+        return sparsify(df)
+    return df
+
+
+def write_sparse(df, path):
+    """
+    Write the dense commits frame `df` as a sparse export to `path`.
+    """
+    sparse = sparsify(df)
+    roster = sparse.attrs["roster"].copy()
+    for column in ["first_month", "last_month"]:
+        roster[column] = roster[column].dt.strftime(MONTH_FORMAT)
+    roster.to_csv(roster_path(path), index=False)
+    sparse.assign(month_year=sparse["month_year"].dt.strftime(MONTH_FORMAT)).to_csv(
+        path, index=False
+    )
+    return len(sparse), len(roster)
+
+
+def tracked_rows(df, developers=None, start=None):
+    """
+    Rows of `df` for `developers` (all by default) in the months starting from
+    `start` on, as in a dense export: for a sparse frame, the zero-commit rows
+    of the months each developer is tracked are put back.
+    """
+    roster = df.attrs.get("roster")
+    if roster is None:
+        rows = df
+        if developers is not None:
+            rows = rows[rows["developer"].isin(developers)]
+        if start is not None:
+            rows = rows[rows["month_year"] >= start]
+        return rows
+
+    codes = np.arange(len(roster))
+    if developers is not None:
+        codes = pd.Index(roster["developer"]).get_indexer(pd.Index(developers))
+        codes = np.unique(codes[codes >= 0])
+    first = _month_ordinals(roster["first_month"])[codes]
+    last = _month_ordinals(roster["last_month"])[codes]
+    if start is not None:
+        # First month starting on or after `start`.
+        start = pd.Timestamp(start)
+        month = start.to_period("M")
+        first = np.maximum(first, month.ordinal + (month.to_timestamp() < start))
+    span = np.maximum(last - first + 1, 0)
+    row_codes = np.repeat(codes, span)
+    ordinals = np.repeat(first, span) + (
+        np.arange(span.sum()) - np.repeat(np.cumsum(span) - span, span)
+    )
+
+    # Commits of the rows the frame has, zero for the others, matched on
+    # (developer, month) keys within the months of the roster.
+    lowest = _month_ordinals(roster["first_month"]).min()
+    n_months = _month_ordinals(roster["last_month"]).max() - lowest + 1
+    keys = pd.Index(
+        df["developer"].cat.codes.to_numpy(np.int64) * n_months
+        + _month_ordinals(df["month_year"])
+        - lowest
+    )
+    found = keys.get_indexer(row_codes.astype(np.int64) * n_months + ordinals - lowest)
+    commits = df["total_commits"].to_numpy()
+    return pd.DataFrame(
+        {
+            "developer": pd.Categorical.from_codes(
+                row_codes, dtype=df["developer"].dtype
+            ),
+            "month_year": _months(ordinals),
+            "network": roster["network"].array.take(row_codes),
+            "total_commits": np.where(found >= 0, commits[found], 0).astype(
+                commits.dtype
+            ),
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert an export to sparse storage.")
+    parser.add_argument("source", help="Dense export (CSV)")
+    parser.add_argument("destination", help="Sparse export to write (CSV)")
+    args = parser.parse_args()
+
+    rows, developers = write_sparse(read_dataset(args.source), args.destination)
+    print(
+        colored(
+            f"{rows} rows with commits and {developers} developers written to "
+            f"{args.destination} and {roster_path(args.destination)}",
+            "blue",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Small dependency-aware task scheduler over a concurrent.futures executor.
+
+Tasks are added with the names of the tasks they depend on and called with the
+graph's arguments followed by the results of their dependencies. A task is
+handed to the executor as soon as its dependencies are done, so independent
+tasks run concurrently and the graph finishes in the time of its longest chain.
+Scheduling happens in the calling process, so thread and process pools both
+work (with a process pool, tasks and their results must be picklable).
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class TaskGraph:
+    def __init__(self):
+        self._tasks = {}
+
+    def add(self, name, func, requires=()):
+        for dependency in requires:
+            if dependency not in self._tasks:
+                raise ValueError(f"Unknown dependency {dependency!r} of {name!r}")
+        self._tasks[name] = (func, tuple(requires))
+        return self
+
+    def __contains__(self, name):
+        return name in self._tasks
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def submit(self, executor, *args):
+        """
+        Start the graph on `executor`. Returns a dict of futures by task name, in
+        the order the tasks were added. A failed task fails its dependents with
+        the same exception.
+        """
+        futures = {name: Future() for name in self._tasks}
+        waiting = {name: set(requires) for name, (_, requires) in self._tasks.items()}
+        dependents = {name: [] for name in self._tasks}
+        for name, (_, requires) in self._tasks.items():
+            for dependency in requires:
+                dependents[dependency].append(name)
+        lock = threading.Lock()
+
+        def start(name):
+            func, requires = self._tasks[name]
+            futures[name].set_running_or_notify_cancel()
+            dependency_results = [
+                futures[dependency].result() for dependency in requires
+            ]
+            try:
+                task = executor.submit(func, *args, *dependency_results)
+            except Exception as e:
+                resolve(name, error=e)
+                return
+            task.add_done_callback(
+                lambda task: resolve(
+                    name,
+                    result=task.result() if task.exception() is None else None,
+                    error=task.exception(),
+                )
+            )
+
+        def resolve(name, result=None, error=None):
+            if error is None:
+                futures[name].set_result(result)
+            else:
+                futures[name].set_exception(error)
+
+            for dependent in dependents[name]:
+                with lock:
+                    waiting[dependent].discard(name)
+                    ready = not waiting[dependent]
+                if not ready:
+                    continue
+                errors = [
+                    futures[dependency].exception()
+                    for dependency in self._tasks[dependent][1]
+                    if futures[dependency].exception() is not None
+                ]
+                if errors:
+                    futures[dependent].set_running_or_notify_cancel()
+                    resolve(dependent, error=errors[0])
+                else:
+                    start(dependent)
+
+        for name, (_, requires) in self._tasks.items():
+            if not requires:
+                start(name)
+        return futures
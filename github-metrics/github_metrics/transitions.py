@@ -0,0 +1,94 @@
+"""
+Developer flows between activity tiers.
+
+The transition tensor counts how many developers went from each state (an
+activity tier, or not active) in one month of the activity matrix to each state
+in another. The month-over-month counts are built once per dataset snapshot, so
+the flow month by month across a quarter is a lookup; the flow between two
+arbitrary months is counted on demand, in one pass over the developers.
+"""
+
+import numpy as np
+import pandas as pd
+from activity import get_activity_matrix
+from classifier import INACTIVE, TIERS, get_thresholds, get_tier_matrix
+from termcolor import colored
+from utils import dataset_snapshot
+
+STATES = [*TIERS, "inactive"]
+
+_tensor_cache = {}
+_MAX_CACHED_TENSORS = 4
+
+
+class TransitionTensor:
+    """
+    `states[d, i]` is the state (an index of `STATES`) of developer `d` in
+    `months[i]`. `steps[i]` counts the developers going from state x in
+    `months[i]` to state y in `months[i + 1]` (month x from state x to state).
+    Developers count as not active in the months they have no commits, so the
+    inactive to inactive cells also count developers not seen yet. `version`
+    identifies the data of the tensor (its dataset snapshot and thresholds).
+    """
+
+    def __init__(self, months, states, version=None):
+        self.months = months
+        self.states = states
+        self.version = version
+        self.steps = np.array(
+            [
+                _count_pairs(states[:, i], states[:, i + 1])
+                for i in range(len(months) - 1)
+            ],
+            dtype=np.int64,
+        ).reshape(-1, len(STATES), len(STATES))
+
+    @classmethod
+    def from_tiers(cls, months, tiers):
+        return cls(
+            months, np.where(tiers == INACTIVE, len(TIERS), tiers).astype(np.int8)
+        )
+
+    def between(self, start, end):
+        """
+        From state x to state counts between the months `start` and `end`.
+        """
+        return _count_pairs(
+            self.states[:, self._position(start)], self.states[:, self._position(end)]
+        )
+
+    def path(self, start, end):
+        """
+        Month-over-month counts for every month from `start` to `end`.
+        """
+        return self.steps[self._position(start) : self._position(end)]
+
+    def _position(self, month):
+        return self.months.get_loc(pd.Timestamp(month))
+
+
+def _count_pairs(first, second):
+    """
+    From state x to state counts of developers in state `first` then `second`.
+    """
+    codes = first.astype(np.int64) * len(STATES) + second
+    counts = np.bincount(codes, minlength=len(STATES) ** 2)
+    return counts.reshape(len(STATES), len(STATES))
+
+
+def get_transition_tensor(df):
+    """
+    Transition tensor of `df`, built once per dataset snapshot and thresholds.
+    """
+    key = (dataset_snapshot(df), get_thresholds())
+    tensor = _tensor_cache.get(key)
+    if tensor is None:
+        print(colored("Building transition tensor...", "blue"))
+        tensor = TransitionTensor.from_tiers(
+            get_activity_matrix(df).months, get_tier_matrix(df)
+        )
+        tensor.version = key
+        if len(_tensor_cache) >= _MAX_CACHED_TENSORS:
+            _tensor_cache.pop(next(iter(_tensor_cache)))
+        _tensor_cache[key] = tensor
+    return tensor
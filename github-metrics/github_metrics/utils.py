@@ -2,8 +2,44 @@ import os
 from datetime import datetime
 
 import pandas as pd
+from storage import read_dataset
 from termcolor import colored
 
+DATASET_PATHS = [
+    "./github-metrics/data/source/all_networks_developer_commits_2024-12-03.csv",
+    "../data/source/all_networks_developer_commits_2024-12-03.csv",
+    "data/source/all_networks_developer_commits_2024-12-03.csv",
+]
+
+
+def get_dataset_path():
+    # Lets benchmarks and deployments point the app at another export.
+    if os.environ.get("STAR_TRACKER_DATASET"):
+        return os.environ["STAR_TRACKER_DATASET"]
+
+    for path in DATASET_PATHS:
+        if os.path.exists(path):
+            return path
+
+    raise FileNotFoundError(
+        f"Dataset not found in any of the expected locations: {', '.join(DATASET_PATHS)}"
+    )
+
+
+def get_starknet_downloads_csv_path():
+    possible_paths = [
+        "data/source/starknet_downloads.csv",
+        "github-metrics/data/source/starknet_downloads.csv",
+    ]
+
+    for path in possible_paths:
+        if os.path.exists(path):
+            return path
+
+    raise FileNotFoundError(
+        f"CSV file not found in any of the expected locations: {', '.join(possible_paths)}"
+    )
+
 
 def load_all_developers_dataset():
     try:
@@ -14,26 +50,54 @@ def load_all_developers_dataset():
         # print(os.listdir("."))
         # DEBUG
 
-        try:
-            df = pd.read_csv(
-                "./github-metrics/data/source/all_networks_developer_commits_2024-12-03.csv"
-            )
-        except FileNotFoundError:
-            try:
-                df = pd.read_csv(
-                    "../data/source/all_networks_developer_commits_2024-12-03.csv"
-                )
-            except FileNotFoundError:
-                df = pd.read_csv(
-                    "data/source/all_networks_developer_commits_2024-12-03.csv"
-                )
-        df["month_year"] = pd.to_datetime(df["month_year"], format="%B_%Y")
+        path = get_dataset_path()
+        df = read_dataset(path)
+        stat = os.stat(path)
+        df.attrs["source"] = (os.path.abspath(path), stat.st_mtime)
+        # Computed once here rather than on every cache lookup; see
+        # dataset_snapshot.
+        df.attrs["snapshot"] = (
+            os.path.abspath(path),
+            stat.st_mtime_ns,
+            stat.st_size,
+            len(df),
+        )
         return df
     except Exception as e:
         print(colored(f"Error loading dataset: {e}", "red"))
         raise
 
 
+def dataset_snapshot(df):
+    """
+    Key identifying the data held by a commits frame, used to cache structures
+    derived from it across reruns. Frames loaded by load_all_developers_dataset
+    carry their key in `attrs`, made of the file's path, modification time and
+    size. Other frames, and filtered copies (which inherit `attrs` but not the
+    row count of the key), are keyed by a summary of the frame itself.
+    """
+    snapshot = df.attrs.get("snapshot")
+    if snapshot is not None and snapshot[-1] == len(df):
+        return snapshot
+    return (
+        df.attrs.get("source"),
+        len(df),
+        str(df["month_year"].max()),
+        int(df["total_commits"].sum()),
+    )
+
+
+def with_month_dates(df):
+    """
+    `df` with `month_year` parsed to datetime. The caller's frame is left
+    untouched (it may be shared between panel workers), and a frame that is
+    already parsed is returned as is.
+    """
+    if pd.api.types.is_datetime64_any_dtype(df["month_year"]):
+        return df
+    return df.assign(month_year=pd.to_datetime(df["month_year"], format="%B_%Y"))
+
+
 def save_plot(plt, base_filename):
     """
     Save a matplotlib plot to a file with a timestamped filename.
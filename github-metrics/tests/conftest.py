@@ -0,0 +1,29 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The modules import each other by name, as when run from github_metrics/.
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "github_metrics")
+)
+
+
+@pytest.fixture
+def commits_df():
+    """
+    Small commits table: 40 developers over 2022-2024, each tracked (with
+    zero-commit padding rows) from their first month.
+    """
+    rng = np.random.default_rng(7)
+    months = pd.date_range("2022-01-01", "2024-12-01", freq="MS")
+    rows = []
+    for i in range(40):
+        first = rng.integers(0, len(months) - 6)
+        rate = rng.choice([0.5, 3, 12, 25])
+        for month in months[first:]:
+            commits = rng.poisson(rate) if rng.random() < 0.7 else 0
+            rows.append((f"dev{i:02d}", month, int(commits)))
+    return pd.DataFrame(rows, columns=["developer", "month_year", "total_commits"])
@@ -0,0 +1,39 @@
+import os
+
+import orjson
+import program_evaluation
+import pytest
+from api import ApiError, route
+
+
+def test_evaluation_summary_builds_no_figures(commits_df, monkeypatch, tmp_path):
+    def no_figures(*args, **kwargs):
+        raise AssertionError("a figure was built")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(program_evaluation, "create_line_plot", no_figures)
+    monkeypatch.setattr(program_evaluation, "create_box_plot", no_figures)
+
+    summary = program_evaluation.evaluation_summary(
+        commits_df, "dev01,@dev02,nobody", "2024-06-01", "Test", False
+    )
+
+    assert summary["handles"] == ["dev01", "dev02"]
+    assert summary["not_found"] == ["nobody"]
+    assert not os.path.exists(tmp_path / "debug.csv")
+    orjson.dumps(summary, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+@pytest.mark.parametrize(
+    "path, query, status",
+    [
+        ("/nothing", {}, 404),
+        ("/series/unknown", {}, 404),
+        ("/program-evaluation", {}, 400),
+        ("/program-evaluation", {"handles": ["a"], "date": ["not a date"]}, 400),
+    ],
+)
+def test_invalid_requests_are_rejected(path, query, status):
+    with pytest.raises(ApiError) as error:
+        route(path, query)
+    assert error.value.status == status
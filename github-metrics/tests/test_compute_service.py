@@ -0,0 +1,53 @@
+import multiprocessing
+import os
+import stat
+import threading
+from multiprocessing.connection import Client
+
+import pytest
+from compute_service import ComputeService, _authkey
+
+
+@pytest.fixture(autouse=True)
+def key_file(tmp_path, monkeypatch):
+    monkeypatch.delenv("STAR_TRACKER_COMPUTE_KEY", raising=False)
+    path = tmp_path / "compute.key"
+    monkeypatch.setenv("STAR_TRACKER_COMPUTE_KEY_FILE", str(path))
+    return path
+
+
+def test_client_refuses_to_connect_without_a_key(key_file):
+    with pytest.raises(RuntimeError, match="No compute service key"):
+        _authkey()
+
+
+def test_service_writes_a_private_key(key_file):
+    service = ComputeService(port=0, workers=1)
+    try:
+        assert stat.S_IMODE(os.stat(key_file).st_mode) == 0o600
+        assert _authkey() == key_file.read_text().encode()
+    finally:
+        service.close()
+
+
+def test_key_file_readable_by_others_is_refused(key_file):
+    key_file.write_text("secret")
+    os.chmod(key_file, 0o644)
+    with pytest.raises(RuntimeError, match="chmod 600"):
+        _authkey()
+
+
+def test_service_rejects_connections_without_the_key(key_file):
+    service = ComputeService(port=0, workers=1)
+    threading.Thread(target=service.serve_forever, daemon=True).start()
+    try:
+        with pytest.raises(multiprocessing.AuthenticationError):
+            Client(service.address, authkey=b"wrong")
+    finally:
+        service.close()
+
+
+def test_non_loopback_host_requires_an_explicit_key(key_file):
+    with pytest.raises(RuntimeError, match="STAR_TRACKER_COMPUTE_KEY"):
+        ComputeService(host="0.0.0.0", port=0, workers=1)
+    assert not key_file.exists()
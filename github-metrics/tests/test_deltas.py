@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from activity import get_activity_matrix
+from deltas import developer_deltas, top_movers, window_commits
+
+
+def test_window_commits_sums_the_window(commits_df):
+    matrix = get_activity_matrix(commits_df)
+    commits, present = window_commits(matrix, 5, window=3)
+    np.testing.assert_array_equal(commits, matrix.commits[:, 3:6].sum(axis=1))
+    np.testing.assert_array_equal(present, matrix.present[:, 3:6].any(axis=1))
+
+
+def test_window_ending_before_the_first_month_is_empty(commits_df):
+    matrix = get_activity_matrix(commits_df)
+    commits, present = window_commits(matrix, -2, window=3)
+    assert not commits.any()
+    assert not present.any()
+
+
+def test_windows_reaching_past_the_first_month_give_no_deltas(commits_df):
+    matrix = get_activity_matrix(commits_df)
+    # The earlier window of the second month would end at month -2.
+    assert developer_deltas(matrix, matrix.months[1], window=3).empty
+    assert developer_deltas(matrix, matrix.months[4], window=3).empty
+    assert not developer_deltas(matrix, matrix.months[5], window=3).empty
+
+
+def test_deltas_match_the_frame(commits_df):
+    matrix = get_activity_matrix(commits_df)
+    later, earlier = pd.Timestamp("2024-06-01"), pd.Timestamp("2024-03-01")
+
+    deltas = developer_deltas(matrix, later, window=3).set_index("developer")
+
+    def window_sums(end):
+        rows = commits_df[
+            (commits_df["month_year"] > end - pd.DateOffset(months=3))
+            & (commits_df["month_year"] <= end)
+        ]
+        return rows.groupby("developer")["total_commits"].sum()
+
+    expected = pd.concat(
+        [window_sums(earlier), window_sums(later)],
+        axis=1,
+        keys=["earlier_commits", "later_commits"],
+        join="inner",
+    )
+    pd.testing.assert_series_equal(
+        deltas["commits_difference"].sort_index(),
+        (expected["later_commits"] - expected["earlier_commits"]).sort_index(),
+        check_names=False,
+        check_dtype=False,
+        check_index_type=False,
+    )
+
+    gainers, decliners = top_movers(deltas.reset_index(), k=3)
+    assert (gainers["commits_difference"] > 0).all()
+    assert (decliners["commits_difference"] < 0).all()
+    assert gainers["commits_difference"].max() == deltas["commits_difference"].max()
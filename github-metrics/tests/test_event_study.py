@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from event_study import align_event_time, event_study
+
+EVENT_DATE = pd.Timestamp("2024-01-01")
+
+
+def _commits(rows):
+    return pd.DataFrame(rows, columns=["developer", "month_year", "total_commits"])
+
+
+def _history(developer, start, values):
+    months = pd.date_range(start, periods=len(values), freq="MS")
+    return [(developer, month, commits) for month, commits in zip(months, values)]
+
+
+def test_align_event_time_pads_outside_months_with_nan():
+    values = np.arange(12).reshape(2, 6)
+    aligned = align_event_time(values, [1, 4], pre=2, post=1)
+    np.testing.assert_array_equal(aligned[0], [np.nan, 0, 1, 2])
+    np.testing.assert_array_equal(aligned[1], [8, 9, 10, 11])
+
+
+def test_effect_is_the_difference_in_differences():
+    # 2023-07 to 2024-07 (the last month stays open): the cohort gains 4
+    # commits a month after the event, the control 1.
+    rows = []
+    for i in range(3):
+        rows += _history(f"cohort{i}", "2023-07-01", [2] * 6 + [6] * 7)
+        rows += _history(f"other{i}", "2023-07-01", [5] * 6 + [6] * 7)
+    study = event_study(
+        _commits(rows), ["cohort0", "cohort1", "cohort2"], EVENT_DATE, n_resamples=50
+    )
+    post = study[study["relative_month"] >= 0]
+    np.testing.assert_allclose(post["effect"], 3)
+    np.testing.assert_allclose(study.attrs["post_effect"], (3, 3, 3))
+    np.testing.assert_allclose(study[study["relative_month"] < 0]["effect"], 0)
+    assert study.attrs["excluded_cohort"] == []
+
+
+def test_cohort_members_first_active_after_the_event_are_left_out():
+    rows = []
+    for i in range(3):
+        rows += _history(f"cohort{i}", "2023-07-01", [2] * 13)
+        rows += _history(f"other{i}", "2023-07-01", [2] * 13)
+    # Tracked from the start, first commits after the event.
+    rows += _history("newcomer", "2023-07-01", [0] * 6 + [20] * 7)
+    df = _commits(rows)
+
+    study = event_study(
+        df, ["cohort0", "cohort1", "cohort2", "newcomer"], EVENT_DATE, n_resamples=50
+    )
+
+    assert study.attrs["excluded_cohort"] == ["newcomer"]
+    np.testing.assert_allclose(study["effect"], 0)
+    np.testing.assert_allclose(study["cohort_mean"], 2)
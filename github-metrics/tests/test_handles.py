@@ -0,0 +1,84 @@
+import io
+
+import pandas as pd
+from handles import normalize_handles, read_handles
+
+
+def _upload(content, name):
+    upload = io.BytesIO(content.encode())
+    upload.name = name
+    return upload
+
+
+def test_normalize_handles_strips_urls_and_mentions():
+    values = pd.Series(
+        [
+            "Alice",
+            "@Bob",
+            "https://github.com/Carol",
+            "http://www.github.com/dave/",
+            "github.com/@erin?tab=repositories",
+            "  frank  ",
+            "",
+            None,
+        ]
+    )
+    normalized = normalize_handles(values)
+    assert normalized.iloc[:6].tolist() == [
+        "alice",
+        "bob",
+        "carol",
+        "dave",
+        "erin",
+        "frank",
+    ]
+    assert normalized.iloc[6:].isna().all()
+
+
+def test_text_handles_are_resolved_once_in_input_order(commits_df):
+    resolved = read_handles(
+        "dev03, @DEV01\nhttps://github.com/dev03,nobody,dev01,Nobody", None, commits_df
+    )
+    assert list(resolved.handles) == ["dev03", "dev01"]
+    assert list(resolved.unknown) == ["nobody"]
+    assert resolved.n_read == 6
+    assert resolved.n_duplicates == 3
+
+
+def test_csv_upload_uses_the_handle_column(commits_df):
+    upload = _upload(
+        "name,github\nA,github.com/dev02\nB,@dev05\nC,dev02\nD,\n", "cohort.csv"
+    )
+    resolved = read_handles("ignored", upload, commits_df)
+    assert list(resolved.handles) == ["dev02", "dev05"]
+    assert resolved.n_duplicates == 1
+
+
+def test_json_upload(commits_df):
+    upload = _upload('[{"login": "dev07"}, {"login": "dev077"}]', "cohort.json")
+    resolved = read_handles(None, upload, commits_df)
+    assert list(resolved.handles) == ["dev07"]
+    assert list(resolved.unknown) == ["dev077"]
+    assert "dev07" in resolved.suggestions["suggestion"].tolist()
+
+
+def test_evaluate_reads_the_upload_once(commits_df, monkeypatch, tmp_path):
+    import program_evaluation
+
+    calls = []
+
+    def counting_read_handles(*args):
+        calls.append(args)
+        return read_handles(*args)
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(program_evaluation, "read_handles", counting_read_handles)
+    upload = _upload("dev01\ndev02\n", "cohort.txt")
+
+    results, resolved = program_evaluation.evaluate(
+        commits_df, "", upload, "2024-06-01", "Test", False
+    )
+
+    assert len(calls) == 1
+    assert list(resolved.handles) == ["dev01", "dev02"]
+    assert len(results) == 8
@@ -0,0 +1,17 @@
+from general_insights import HOMEPAGE_PANELS
+from instrumentation import start_run
+from panels import submit_panels
+
+
+def test_pool_panels_trace_memory_of_the_run(commits_df, tmp_path, monkeypatch):
+    monkeypatch.setenv("STAR_TRACKER_METRICS_DIR", str(tmp_path))
+    run = start_run("Homepage", track_memory=True)
+    # The package download panels read downloads data the fixture does not have.
+    panels = [panel for panel in HOMEPAGE_PANELS if "starknet" not in panel.key]
+    futures = submit_panels(panels, commits_df)
+    for future in futures.values():
+        future.result()
+
+    records = [record for record in run["records"] if record["depth"] == 0]
+    assert records
+    assert all("peak_memory_mb" in record for record in records)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+from activity import get_activity_matrix
+from matching import MatchingIndex, activity_features, matched_control
+
+EVENT_DATE = pd.Timestamp("2024-03-01")
+
+
+def _brute_force_distances(matrix, event_position, participant, candidates, k):
+    features = activity_features(matrix, candidates, event_position)
+    own = activity_features(matrix, [participant], event_position)[0]
+    return np.sort(np.linalg.norm(features - own, axis=1))[:k]
+
+
+def test_matches_are_the_nearest_developers_outside_the_cohort(commits_df):
+    matrix = get_activity_matrix(commits_df)
+    event_position = matrix.month_position(EVENT_DATE)
+    index = MatchingIndex(matrix, event_position)
+    cohort = index.positions[:8]
+
+    matches, distances = index.match(cohort, k=3)
+
+    assert matches.shape == (8, 3)
+    assert not np.isin(matches, cohort).any()
+    candidates = index.positions[~np.isin(index.positions, cohort)]
+    for participant, found in zip(np.unique(cohort), distances):
+        np.testing.assert_allclose(
+            found,
+            _brute_force_distances(matrix, event_position, participant, candidates, 3),
+        )
+
+
+def test_matches_are_restricted_to_eligible_developers(commits_df):
+    matrix = get_activity_matrix(commits_df)
+    eligible = np.zeros(len(matrix.developers), dtype=bool)
+    eligible[::2] = True
+    cohort = ["dev01", "dev03", "dev05"]
+
+    control = matched_control(commits_df, cohort, EVENT_DATE, k=2, eligible=eligible)
+
+    assert len(control) == 6
+    assert eligible[control].all()
+    assert not np.isin(control, matrix.developer_positions(cohort)).any()
+
+
+def test_k_is_capped_by_the_candidates(commits_df):
+    matrix = get_activity_matrix(commits_df)
+    eligible = np.zeros(len(matrix.developers), dtype=bool)
+    eligible[matrix.developer_positions(["dev10"])] = True
+
+    control = matched_control(commits_df, ["dev01"], EVENT_DATE, k=3, eligible=eligible)
+
+    np.testing.assert_array_equal(control, matrix.developer_positions(["dev10"]))
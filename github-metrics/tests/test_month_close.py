@@ -0,0 +1,106 @@
+import json
+import multiprocessing
+import os
+
+import pandas as pd
+import pytest
+from month_close import (
+    SERIES,
+    SERIES_KEYS,
+    close_pending_months,
+    get_series_dir,
+    load_series,
+)
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    # No downloads export, and a fresh in-process "already closed" memo.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("month_close._up_to_date", set())
+
+
+def _series_files(metrics_dir):
+    series_dir = get_series_dir(str(metrics_dir))
+    return {
+        name: pd.read_csv(os.path.join(series_dir, f"{name}.csv"))
+        for name in SERIES
+        if os.path.exists(os.path.join(series_dir, f"{name}.csv"))
+    }
+
+
+def test_close_is_idempotent(commits_df, tmp_path, monkeypatch):
+    metrics_dir = tmp_path / "metrics"
+    commit_months, _ = close_pending_months(commits_df, str(metrics_dir))
+    assert commit_months == 35  # every month but the last one of the data
+    first = _series_files(metrics_dir)
+
+    monkeypatch.setattr("month_close._up_to_date", set())
+    assert close_pending_months(commits_df, str(metrics_dir)) == (0, 0)
+    second = _series_files(metrics_dir)
+    for name, series in first.items():
+        pd.testing.assert_frame_equal(series, second[name])
+
+    commits = load_series("commits_by_tier", str(metrics_dir))
+    assert len(commits) == 35
+    assert commits[["low", "moderate", "high"]].to_numpy().sum() == (
+        commits_df[commits_df["month_year"] < "2024-12-01"]["total_commits"].sum()
+    )
+
+
+def test_interrupted_save_does_not_duplicate_months(commits_df, tmp_path, monkeypatch):
+    metrics_dir = tmp_path / "metrics"
+    close_pending_months(commits_df, str(metrics_dir))
+    expected = _series_files(metrics_dir)
+
+    # As if the series had been written but not the manifest.
+    manifest_path = os.path.join(get_series_dir(str(metrics_dir)), "manifest.json")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest["commits_closed_through"] = "2024-06"
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+
+    monkeypatch.setattr("month_close._up_to_date", set())
+    assert close_pending_months(commits_df, str(metrics_dir))[0] == 5
+    for name, series in _series_files(metrics_dir).items():
+        assert not series.duplicated(SERIES_KEYS[name]).any()
+        pd.testing.assert_frame_equal(series, expected[name])
+
+
+def _close(df, metrics_dir, start):
+    start.wait()
+    close_pending_months(df, metrics_dir)
+
+
+def test_concurrent_processes_close_each_month_once(commits_df, tmp_path):
+    metrics_dir = str(tmp_path / "metrics")
+    context = multiprocessing.get_context("fork")
+    start = context.Event()
+    processes = [
+        context.Process(target=_close, args=(commits_df, metrics_dir, start))
+        for _ in range(4)
+    ]
+    for process in processes:
+        process.start()
+    start.set()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    for name, series in _series_files(metrics_dir).items():
+        assert not series.duplicated(SERIES_KEYS[name]).any(), name
+    assert len(load_series("commits_by_tier", metrics_dir)) == 35
+
+
+def test_thresholds_get_their_own_series(commits_df, tmp_path, monkeypatch):
+    metrics_dir = str(tmp_path / "metrics")
+    close_pending_months(commits_df, metrics_dir)
+    default_dir = get_series_dir(metrics_dir)
+
+    monkeypatch.setenv("STAR_TRACKER_TIER_THRESHOLDS", "5,15")
+    close_pending_months(commits_df, metrics_dir)
+    assert get_series_dir(metrics_dir) != default_dir
+    # The series of the default thresholds are left alone.
+    assert os.path.exists(os.path.join(default_dir, "commits_by_tier.csv"))
+    assert len(load_series("commits_by_tier", metrics_dir)) == 35
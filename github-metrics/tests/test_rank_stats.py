@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from rank_stats import (
+    SortedSample,
+    bootstrap_effect_ci,
+    mannwhitneyu_against,
+    mannwhitneyu_batch,
+    mannwhitneyu_test,
+    remove_values,
+)
+from scipy.stats import mannwhitneyu
+
+
+def _samples(seed, n1, n2, ties):
+    rng = np.random.default_rng(seed)
+    if ties:
+        return rng.poisson(3, n1).astype(float), rng.poisson(4, n2).astype(float)
+    return rng.normal(0, 1, n1), rng.normal(0.3, 1, n2)
+
+
+@pytest.mark.parametrize("alternative", ["two-sided", "greater", "less"])
+@pytest.mark.parametrize(
+    "n1, n2, ties", [(5, 7, False), (30, 400, False), (25, 300, True), (3, 50, True)]
+)
+def test_matches_scipy(n1, n2, ties, alternative):
+    x, y = _samples(n1 * n2, n1, n2, ties)
+    expected = mannwhitneyu(x, y, alternative=alternative)
+
+    result = mannwhitneyu_test(x, y, alternative=alternative)
+
+    assert result.statistic == pytest.approx(expected.statistic)
+    assert result.pvalue == pytest.approx(expected.pvalue, rel=1e-9, abs=1e-12)
+    assert result.effect_size == pytest.approx(2 * expected.statistic / (n1 * n2) - 1)
+
+
+def test_excluded_values_are_taken_out_of_the_sample():
+    x, y = _samples(1, 20, 500, ties=True)
+    cohort = y[:20]
+    expected = mannwhitneyu(x, y[20:])
+
+    result = mannwhitneyu_against(x, SortedSample(y), exclude=cohort)
+
+    assert result.statistic == pytest.approx(expected.statistic)
+    assert result.pvalue == pytest.approx(expected.pvalue, rel=1e-9)
+
+
+def test_remove_values_is_a_multiset_difference():
+    sample = np.array([1.0, 1.0, 2.0, 2.0, 2.0, 5.0])
+    np.testing.assert_array_equal(
+        remove_values(sample, np.array([2.0, 1.0, 2.0])), [1.0, 2.0, 5.0]
+    )
+
+
+def test_batch_matches_scipy_row_by_row():
+    rng = np.random.default_rng(3)
+    x = rng.poisson(3, (10, 15)).astype(float)
+    y = rng.poisson(4, (10, 40)).astype(float)
+
+    statistics, pvalues, _ = mannwhitneyu_batch(x, y)
+
+    for row in range(10):
+        expected = mannwhitneyu(x[row], y[row], method="asymptotic")
+        assert statistics[row] == pytest.approx(expected.statistic)
+        assert pvalues[row] == pytest.approx(expected.pvalue, rel=1e-9)
+
+
+def test_empty_samples_give_nan():
+    assert np.isnan(mannwhitneyu_test([], [1.0, 2.0]).pvalue)
+    assert np.isnan(bootstrap_effect_ci([1.0], [], seed=0)[0])
+
+
+def test_bootstrap_interval_contains_the_effect():
+    x, y = _samples(4, 40, 60, ties=True)
+    effect = mannwhitneyu_test(x, y).effect_size
+
+    low, high = bootstrap_effect_ci(x, y, seed=0)
+    low_sorted, high_sorted = bootstrap_effect_ci(x, SortedSample(y), seed=0)
+
+    assert low < effect < high
+    assert low_sorted < effect < high_sorted
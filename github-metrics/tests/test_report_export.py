@@ -0,0 +1,43 @@
+from report_export import assign_slugs, load_events
+
+
+def test_handles_file_is_relative_to_the_batch_file(tmp_path, monkeypatch):
+    batch_dir = tmp_path / "batch"
+    batch_dir.mkdir()
+    (batch_dir / "cohort.txt").write_text("alice\nbob\n\n")
+    (batch_dir / "events.csv").write_text(
+        "event_name,program_end_date,handles,handles_file\n"
+        'Basecamp,2024-06-01,"carol, dave",cohort.txt\n'
+        "Empty,2024-06-01,,\n"
+    )
+    monkeypatch.chdir(tmp_path)
+
+    events = load_events(str(batch_dir / "events.csv"))
+
+    assert events == [
+        {
+            "event_name": "Basecamp",
+            "program_end_date": "2024-06-01",
+            "handles": ["carol", "dave", "alice", "bob"],
+        }
+    ]
+
+
+def test_events_sharing_a_name_keep_it_and_get_numbered_files():
+    events = assign_slugs(
+        [
+            {"event_name": "Basecamp X"},
+            {"event_name": "basecamp x"},
+            {"event_name": "Basecamp_X_2"},
+        ]
+    )
+    assert [event["event_name"] for event in events] == [
+        "Basecamp X",
+        "basecamp x",
+        "Basecamp_X_2",
+    ]
+    assert [event["slug"] for event in events] == [
+        "basecamp_x",
+        "basecamp_x_2",
+        "basecamp_x_2_2",
+    ]
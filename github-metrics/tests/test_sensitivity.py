@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from activity import get_activity_matrix
+from scipy.stats import mannwhitneyu
+from sensitivity import end_date_sweep
+
+LOOKBACK = 12
+
+
+def _brute_force_cell(matrix, positions, start, window):
+    """
+    One cell of the sweep, developer by developer.
+    """
+
+    def median(row, first, last):
+        months = np.arange(max(first, 0), min(last, len(matrix.months)))
+        months = months[matrix.present[row, months]]
+        return float(np.median(matrix.commits[row, months])) if len(months) else 0.0
+
+    before = [median(row, start - LOOKBACK, start) for row in positions]
+    after = [median(row, start, start + window) for row in positions]
+    new = sum(
+        not matrix.present[row, start - LOOKBACK : start].any()
+        and matrix.present[row, start : start + window].any()
+        for row in positions
+    )
+    if not any(after) or not any(before):
+        return np.nan, np.nan, new
+    result = mannwhitneyu(after, before, method="asymptotic")
+    return result.statistic, result.pvalue, new
+
+
+def test_sweep_matches_brute_force(commits_df):
+    # Gaps in the rows, so that medians skip months without a row.
+    df = commits_df.sample(frac=0.85, random_state=0).reset_index(drop=True)
+    matrix = get_activity_matrix(df)
+    cohort = [f"dev{i:02d}" for i in range(0, 40, 3)]
+    end_dates = pd.date_range("2023-01-01", "2024-12-01", freq="3MS")
+
+    sweep = end_date_sweep(matrix, cohort, end_dates, windows=[1, 3, 6])
+
+    assert len(sweep) == len(end_dates) * 3
+    positions = matrix.developer_positions(cohort)
+    for cell in sweep.itertuples():
+        statistic, p_value, new = _brute_force_cell(
+            matrix, positions, matrix.month_position(cell.end_date), cell.window_months
+        )
+        assert cell.new_developers == new
+        if np.isnan(statistic):
+            assert np.isnan(cell.statistic) and np.isnan(cell.p_value)
+        else:
+            assert cell.statistic == pytest.approx(statistic)
+            assert cell.p_value == pytest.approx(p_value, rel=1e-9)
+
+
+def test_end_dates_without_a_full_lookback_are_left_out(commits_df):
+    matrix = get_activity_matrix(commits_df)
+    sweep = end_date_sweep(
+        matrix, ["dev01", "dev02"], [pd.Timestamp("2022-06-01")], windows=[1]
+    )
+    assert sweep.empty
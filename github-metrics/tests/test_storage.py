@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from activity import ActivityMatrix
+from storage import MONTH_FORMAT, read_dataset, roster_path, tracked_rows, write_sparse
+
+
+def _dense_export(commits_df, path):
+    dense = commits_df.assign(
+        network=np.where(commits_df["developer"] < "dev20", "starknet", "ethereum"),
+        month_year=commits_df["month_year"].dt.strftime(MONTH_FORMAT),
+    )
+    dense[["developer", "month_year", "network", "total_commits"]].to_csv(
+        path, index=False
+    )
+    return read_dataset(path)
+
+
+def _sorted(rows):
+    rows = rows.astype({"developer": str, "network": str})
+    return rows.sort_values(["developer", "month_year"], ignore_index=True)[
+        ["developer", "month_year", "network", "total_commits"]
+    ]
+
+
+def test_sparse_round_trip(commits_df, tmp_path):
+    dense = _dense_export(commits_df, tmp_path / "dense.csv")
+    sparse_path = str(tmp_path / "sparse.csv")
+
+    n_rows, n_developers = write_sparse(dense, sparse_path)
+    sparse = read_dataset(sparse_path)
+
+    assert n_rows == (dense["total_commits"] > 0).sum() == len(sparse)
+    assert n_developers == dense["developer"].nunique()
+    assert (sparse["total_commits"] > 0).all()
+    assert len(pd.read_csv(roster_path(sparse_path))) == n_developers
+    pd.testing.assert_frame_equal(_sorted(tracked_rows(sparse)), _sorted(dense))
+
+
+def test_tracked_rows_filters_like_the_dense_frame(commits_df, tmp_path):
+    dense = _dense_export(commits_df, tmp_path / "dense.csv")
+    write_sparse(dense, str(tmp_path / "sparse.csv"))
+    sparse = read_dataset(str(tmp_path / "sparse.csv"))
+    developers = ["dev03", "dev17", "dev31", "nobody"]
+    start = pd.Timestamp("2023-05-15")
+
+    pd.testing.assert_frame_equal(
+        _sorted(tracked_rows(sparse, developers, start)),
+        _sorted(tracked_rows(dense, developers, start)),
+    )
+
+
+def test_activity_matrix_is_the_same(commits_df, tmp_path):
+    dense = _dense_export(commits_df, tmp_path / "dense.csv")
+    write_sparse(dense, str(tmp_path / "sparse.csv"))
+    sparse = read_dataset(str(tmp_path / "sparse.csv"))
+
+    dense_matrix = ActivityMatrix.from_frame(dense)
+    sparse_matrix = ActivityMatrix.from_frame(sparse)
+
+    assert list(dense_matrix.developers) == list(sparse_matrix.developers)
+    np.testing.assert_array_equal(dense_matrix.commits, sparse_matrix.commits)
+    np.testing.assert_array_equal(dense_matrix.present, sparse_matrix.present)
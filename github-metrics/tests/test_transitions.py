@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from activity import get_activity_matrix
+from transitions import STATES, get_transition_tensor
+
+
+def _crosstab(commits_df, start, end):
+    """
+    Developers in each state in `start` and `end`, counted from the frame.
+    """
+    matrix = get_activity_matrix(commits_df)
+    states = {}
+    for month in (start, end):
+        commits = commits_df[commits_df["month_year"] == month]
+        commits = commits[commits["total_commits"] > 0]
+        state = pd.Series("inactive", index=matrix.developers)
+        # Default thresholds: below 10, below 20, from 20 commits.
+        state[commits["developer"].to_numpy()] = pd.cut(
+            commits["total_commits"],
+            [0, 9, 19, np.inf],
+            labels=STATES[:-1],
+        ).to_numpy()
+        states[month] = pd.Categorical(state, categories=STATES)
+    table = pd.crosstab(states[start], states[end], dropna=False)
+    return table.to_numpy()
+
+
+def test_steps_match_a_crosstab(commits_df, monkeypatch):
+    monkeypatch.delenv("STAR_TRACKER_TIER_THRESHOLDS", raising=False)
+    tensor = get_transition_tensor(commits_df)
+
+    assert tensor.steps.shape == (len(tensor.months) - 1, len(STATES), len(STATES))
+    for i in [0, 11, len(tensor.months) - 2]:
+        np.testing.assert_array_equal(
+            tensor.steps[i],
+            _crosstab(commits_df, tensor.months[i], tensor.months[i + 1]),
+        )
+
+
+def test_between_matches_a_crosstab(commits_df, monkeypatch):
+    monkeypatch.delenv("STAR_TRACKER_TIER_THRESHOLDS", raising=False)
+    tensor = get_transition_tensor(commits_df)
+    start, end = tensor.months[3], tensor.months[20]
+
+    np.testing.assert_array_equal(
+        tensor.between(start, end), _crosstab(commits_df, start, end)
+    )
+    np.testing.assert_array_equal(
+        tensor.path(start, end).sum(axis=(1, 2)), len(tensor.states)
+    )
@@ -0,0 +1,41 @@
+import os
+
+from storage import MONTH_FORMAT
+from utils import dataset_snapshot, load_all_developers_dataset
+
+
+def _load_export(commits_df, path, monkeypatch):
+    commits_df.assign(
+        network="starknet",
+        month_year=commits_df["month_year"].dt.strftime(MONTH_FORMAT),
+    ).to_csv(path, index=False)
+    monkeypatch.setenv("STAR_TRACKER_DATASET", str(path))
+    monkeypatch.delenv("STAR_TRACKER_SPARSE", raising=False)
+    return load_all_developers_dataset()
+
+
+def test_loaded_frames_carry_their_snapshot(commits_df, tmp_path, monkeypatch):
+    df = _load_export(commits_df, tmp_path / "export.csv", monkeypatch)
+
+    assert dataset_snapshot(df) == df.attrs["snapshot"]
+    assert dataset_snapshot(df.copy()) == dataset_snapshot(df)
+
+
+def test_filtered_copies_get_their_own_snapshot(commits_df, tmp_path, monkeypatch):
+    df = _load_export(commits_df, tmp_path / "export.csv", monkeypatch)
+    recent = df[df["month_year"] >= "2024-01-01"]
+
+    assert dataset_snapshot(recent) != dataset_snapshot(df)
+    assert dataset_snapshot(recent) == dataset_snapshot(recent.copy())
+
+
+def test_reexports_get_a_new_snapshot(commits_df, tmp_path, monkeypatch):
+    path = tmp_path / "export.csv"
+    first = _load_export(commits_df, path, monkeypatch)
+    # Same rows, so the same summary, written again a second later.
+    mtime_ns = os.stat(path).st_mtime_ns
+    _load_export(commits_df, path, monkeypatch)
+    os.utime(path, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+    second = load_all_developers_dataset()
+
+    assert dataset_snapshot(second) != dataset_snapshot(first)